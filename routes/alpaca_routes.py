@@ -195,7 +195,7 @@ def get_bars():
         if bars is not None:
             return jsonify({
                 'success': True,
-                'bars': bars
+                'bars': bars.to_records()
             })
         else:
             return jsonify({
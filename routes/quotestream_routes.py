@@ -6,6 +6,7 @@ import json
 from flask import Blueprint, jsonify, request, render_template, current_app, redirect, url_for
 from flask_login import login_required, current_user
 from quotestream_integration import get_quotestream_integration
+from quotestream_reader import get_quote_reader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,7 +31,8 @@ def api_status():
     quotestream = get_quotestream_integration()
     return jsonify({
         'connected': quotestream.connected,
-        'api_base': quotestream.api_base
+        'api_base': quotestream.api_base,
+        'quote_board': get_quote_reader().stats()
     })
 
 @quotestream_bp.route('/api/watchlist', methods=['GET'])
@@ -102,8 +104,7 @@ def get_quotes():
         return jsonify({}), 400
     
     symbol_list = [s.strip().upper() for s in symbols.split(',')]
-    quotestream = get_quotestream_integration()
-    quotes = quotestream.get_quotes(symbol_list)
+    quotes = get_quote_reader().quotes(symbol_list)
     
     return jsonify(quotes)
 
@@ -245,7 +246,6 @@ def get_volume_analysis(symbol):
 def get_historical_data(symbol):
     """Get historical price data for a symbol"""
     timeframe = request.args.get('timeframe', '1d')
-    quotestream = get_quotestream_integration()
     
     try:
         # Try to connect to the QuotestreamPY API to get historical data
@@ -258,10 +258,7 @@ def get_historical_data(symbol):
         now = datetime.datetime.now()
         
         # Get current price from quotes if available
-        current_price = None
-        quotes = quotestream.get_quotes([symbol])
-        if symbol in quotes:
-            current_price = quotes[symbol].get('last')
+        current_price = get_quote_reader().last_price(symbol)
         
         # Use a reasonable default if not available
         if not current_price:
@@ -5,7 +5,7 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 from models import Signal, Trade, db
 from logs_service import log_to_db
-from socketio_server import broadcast_signal, broadcast_trade
+from socketio_service import broadcast_signal, broadcast_trade
 
 signal_api = Blueprint('signal_api', __name__)
 
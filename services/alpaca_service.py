@@ -6,6 +6,9 @@ import json
 import pandas as pd
 from datetime import datetime, timedelta
 
+from bars import Bars
+from bar_batch import BarFetchPool, split_by_symbol, lookback_start, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+
 logger = logging.getLogger(__name__)
 
 class AlpacaService:
@@ -22,6 +25,7 @@ class AlpacaService:
         self.base_url = os.environ.get('ALPACA_API_BASE_URL', 'https://paper-api.alpaca.markets')
         self.data_url = os.environ.get('ALPACA_DATA_URL', 'https://data.alpaca.markets')
         self.paper_trading = self.base_url == 'https://paper-api.alpaca.markets'
+        self.bar_pool = BarFetchPool(int(os.environ.get('BAR_FETCH_WORKERS', DEFAULT_MAX_WORKERS)))
         
         # Try to initialize the API
         self._initialize_api()
@@ -155,7 +159,7 @@ class AlpacaService:
             limit: Maximum number of bars to return
             
         Returns:
-            List of bars or None on error
+            Columnar Bars or None on error
         """
         if not self.enabled:
             return None
@@ -171,23 +175,54 @@ class AlpacaService:
                 limit=limit
             ).df
             
-            # Convert dataframe to list of dictionaries
-            bars_list = []
-            for index, row in bars.iterrows():
-                bars_list.append({
-                    'timestamp': index.isoformat(),
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': int(row['volume'])
-                })
-            
-            return bars_list
+            # Wrap the dataframe columns; no per-row conversion
+            return Bars.from_dataframe(bars)
         except Exception as e:
             logger.error(f"Failed to get bars for {symbol}: {str(e)}")
             return None
     
+    def get_bars_many(self, symbols, timeframe='1Day', limit=100, timeout=DEFAULT_TIMEOUT):
+        """
+        Get price bars for several symbols at once
+        
+        Uses one multi-symbol request; symbols it failed for or returned
+        fewer than ``limit`` bars for fall back to get_bars() per symbol
+        on a bounded thread pool.
+        
+        Args:
+            symbols: Asset symbols
+            timeframe: Bar timeframe (1Day, 1Hour, etc.)
+            limit: Maximum number of bars per symbol
+            timeout: Seconds each per-symbol request may take
+            
+        Returns:
+            Dictionary of symbol to Bars; symbols that failed are left out
+        """
+        if not self.enabled or not symbols:
+            return {}
+        
+        symbols = list(dict.fromkeys(symbols))
+        result = {}
+        missing = symbols
+        try:
+            # Alpaca's limit counts bars across all the symbols of the request,
+            # so bound it by start time to give each symbol its own history
+            bars = self.api.get_bars(
+                symbols,
+                timeframe,
+                start=lookback_start(timeframe, limit)
+            ).df
+            fetched = split_by_symbol(bars, limit)
+            result = {symbol: bars for symbol, bars in fetched.items() if len(bars) >= limit}
+            missing = [symbol for symbol in symbols if symbol not in result]
+        except Exception as e:
+            logger.error(f"Failed to get bars for {len(symbols)} symbols: {str(e)}")
+        
+        if missing:
+            fetched, _ = self.bar_pool.fetch(missing, lambda symbol: self.get_bars(symbol, timeframe, limit), timeout)
+            result.update(fetched)
+        return {symbol: result[symbol] for symbol in symbols if symbol in result}
+    
     def place_order(self, symbol, qty, side, order_type='market', time_in_force='day', limit_price=None):
         """
         Place an order with Alpaca
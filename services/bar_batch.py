@@ -0,0 +1,163 @@
+"""
+Bar Batch - Multi-symbol bar fetching for the market data services
+Splits a provider's multi-symbol bar response into per-symbol Bars, and
+runs per-symbol fetches on a bounded thread pool with a time limit when
+no multi-symbol request is possible, returning whatever finished
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from bars import Bars
+
+logger = logging.getLogger(__name__)
+
+# Concurrent per-symbol requests, and seconds each symbol may take
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 10.0
+
+# Minutes of regular trading per session, and calendar days per trading day
+# with slack for holidays
+SESSION_MINUTES = 390
+CALENDAR_DAYS_PER_SESSION = 1.5
+
+_TIMEFRAME = re.compile(r'^(\d*)\s*(Min|T|H|Hour|D|Day|W|Week|M|Month)$', re.IGNORECASE)
+
+
+def lookback_start(timeframe: str, limit: int, now: Optional[datetime] = None) -> str:
+    """
+    Get a start time far enough back to hold ``limit`` bars of a timeframe
+
+    A multi-symbol request bounded by a bar limit shares that limit across
+    all its symbols, so batches are bounded by start time instead and
+    every symbol gets its own history. Nights, weekends and holidays are
+    allowed for, so the range usually holds more than ``limit`` bars.
+
+    Args:
+        timeframe: Bar timeframe ('5Min', '1H', '1Hour', '1D', '1Day', '1W', ...)
+        limit: Number of bars wanted per symbol
+        now: Current time (UTC); defaults to the clock
+
+    Returns:
+        RFC 3339 UTC start time
+    """
+    match = _TIMEFRAME.match(timeframe.strip())
+    if not match:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    size = int(match.group(1) or 1)
+    unit = match.group(2).lower()
+    if unit in ('min', 't', 'h', 'hour'):
+        minutes = size * (60 if unit in ('h', 'hour') else 1)
+        sessions = math.ceil(limit / max(SESSION_MINUTES // minutes, 1))
+        days = sessions * CALENDAR_DAYS_PER_SESSION
+    elif unit in ('d', 'day'):
+        days = size * limit * CALENDAR_DAYS_PER_SESSION
+    elif unit in ('w', 'week'):
+        days = size * limit * 7
+    else:
+        days = size * limit * 31
+    start = (now or datetime.now(timezone.utc)) - timedelta(days=math.ceil(days) + 4)
+    return start.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def split_by_symbol(df: pd.DataFrame, limit: Optional[int] = None) -> Dict[str, Bars]:
+    """
+    Split a multi-symbol bar DataFrame into Bars per symbol
+
+    Args:
+        df: Bars of several symbols with a 'symbol' column
+        limit: Keep only the newest ``limit`` bars of each symbol
+
+    Returns:
+        Mapping of symbol to its bars, oldest first
+    """
+    if df.empty:
+        return {}
+    result = {}
+    for symbol, group in df.groupby('symbol', sort=False):
+        bars = Bars.from_dataframe(group)
+        result[symbol] = bars.tail(limit) if limit else bars
+    return result
+
+
+class BarFetchPool:
+    """
+    Bounded thread pool for per-symbol bar requests.
+
+    ``fetch()`` submits one task per symbol and waits until each has had
+    ``timeout`` seconds of its own (tasks queued behind a full pool get
+    their time once they start). Symbols that failed or are still
+    running then are reported, not waited for.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.errors = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='bars')
+            return self._executor
+
+    def fetch(self, symbols: Iterable[str], fetch_one: Callable[[str], Optional[Bars]],
+              timeout: float = DEFAULT_TIMEOUT) -> Tuple[Dict[str, Bars], List[str]]:
+        """
+        Fetch bars for several symbols concurrently
+
+        Args:
+            symbols: Symbols to fetch
+            fetch_one: Fetches one symbol's bars; returns None or raises on failure.
+                Empty bars count as a failure too
+            timeout: Seconds each symbol may take
+
+        Returns:
+            (bars per symbol that succeeded, symbols that failed or timed out)
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}, []
+        pool = self._pool()
+        futures = {pool.submit(fetch_one, symbol): symbol for symbol in symbols}
+        waves = math.ceil(len(symbols) / self.max_workers)
+        deadline = time.monotonic() + timeout * waves
+
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        result = {}
+        failed = []
+        for future, symbol in futures.items():
+            if future in pending:
+                future.cancel()
+                self.timeouts += 1
+                failed.append(symbol)
+                continue
+            try:
+                bars = future.result()
+            except Exception as e:
+                logger.error(f"Error getting bars for {symbol}: {str(e)}")
+                bars = None
+            if bars is None or not len(bars):
+                self.errors += 1
+                failed.append(symbol)
+            else:
+                result[symbol] = bars
+        if failed:
+            logger.warning(f"No bars for {len(failed)} of {len(symbols)} symbols: {', '.join(failed[:10])}")
+        return result, failed
@@ -0,0 +1,180 @@
+"""
+Bar Cache - Window-aware price bar cache for the market data services
+Keeps the longest window of bars fetched per symbol and timeframe, serves
+any shorter request as a slice of it, and on expiry fetches only the bars
+newer than the last one cached
+"""
+
+import time
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from bars import Bars
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached window is served before its tail is refreshed
+DEFAULT_TTL = 300.0
+
+# Memory budget of all cached bar columns; least recently used windows go first
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Window:
+    """Cached bars of one symbol and timeframe"""
+
+    __slots__ = ('bars', 'limit', 'fetched_at')
+
+    def __init__(self, bars: Bars, limit: int, fetched_at: float):
+        self.bars = bars
+        self.limit = limit  # longest window requested, which may exceed the bars the provider had
+        self.fetched_at = fetched_at
+
+
+class BarCache:
+    """
+    Bars per (symbol, timeframe), least recently used first.
+
+    A request for ``limit`` bars is a hit while the cached window is at
+    least that long and younger than ``ttl``. A longer request fetches
+    the longer window and replaces the cached one. Once a window is
+    older than ``ttl`` it is refreshed by fetching only from its last
+    bar on, which also replaces that bar in case it was still forming.
+    Ages use the monotonic clock.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds before a window's tail is refreshed
+            max_bytes: Memory budget of the cached bar columns
+            clock: Monotonic time source in seconds
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.windows: 'OrderedDict[Tuple[str, str], _Window]' = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def get(self, symbol: str, timeframe: str, limit: int,
+            fetch: Callable[[int], Optional[Bars]],
+            fetch_since: Callable[[np.datetime64], Optional[Bars]]) -> Optional[Bars]:
+        """
+        Get the newest ``limit`` bars, fetching only what the cache lacks
+
+        Args:
+            symbol: The stock symbol
+            timeframe: Bar timeframe
+            limit: Number of bars wanted
+            fetch: Fetches the newest N bars; returns None on failure
+            fetch_since: Fetches every bar from a UTC timestamp on; returns
+                None on failure
+
+        Returns:
+            Up to ``limit`` bars, or None if they had to be fetched and the
+            fetch failed. A failed tail refresh serves the stale window.
+        """
+        key = (symbol, timeframe)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is not None:
+                self.windows.move_to_end(key)
+                if window.limit >= limit and self.clock() - window.fetched_at < self.ttl:
+                    self.hits += 1
+                    return window.bars.tail(limit)
+
+        if window is not None and window.limit >= limit and len(window.bars):
+            newer = fetch_since(window.bars.ts[-1])
+            if newer is None:
+                return window.bars.tail(limit)
+            bars = window.bars.merge(newer).tail(window.limit)
+            with self.lock:
+                self.refreshes += 1
+            self._store(key, bars, window.limit)
+            return bars.tail(limit)
+
+        with self.lock:
+            self.misses += 1
+        bars = fetch(limit)
+        if bars is not None and len(bars):
+            self._store(key, bars, limit)
+        return bars
+
+    def lookup(self, symbol: str, timeframe: str, limit: int) -> Optional[Bars]:
+        """
+        Get cached bars without fetching
+
+        Returns:
+            The newest ``limit`` bars if a fresh window covers them, else
+            None (counted as a miss; fetch and ``put()`` them)
+        """
+        key = (symbol, timeframe)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is not None and window.limit >= limit and self.clock() - window.fetched_at < self.ttl:
+                self.windows.move_to_end(key)
+                self.hits += 1
+                return window.bars.tail(limit)
+            self.misses += 1
+            return None
+
+    def put(self, symbol: str, timeframe: str, bars: Bars, limit: int):
+        """Cache bars fetched for a request of ``limit`` bars; empty bars are not cached"""
+        if not len(bars):
+            return
+        key = (symbol, timeframe)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is not None and window.limit > limit:
+                # Keep the longer window's older bars
+                bars = window.bars.merge(bars).tail(window.limit)
+                limit = window.limit
+        self._store(key, bars, limit)
+
+    def _store(self, key: Tuple[str, str], bars: Bars, limit: int):
+        """Cache a window and evict the least recently used ones over the budget"""
+        with self.lock:
+            old = self.windows.pop(key, None)
+            if old is not None:
+                self.bytes -= old.bars.nbytes
+            self.windows[key] = _Window(bars, limit, self.clock())
+            self.bytes += bars.nbytes
+            while self.bytes > self.max_bytes and len(self.windows) > 1:
+                _, evicted = self.windows.popitem(last=False)
+                self.bytes -= evicted.bars.nbytes
+                self.evictions += 1
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop the cached windows of one symbol, or all of them"""
+        with self.lock:
+            for key in [k for k in self.windows if symbol is None or k[0] == symbol]:
+                self.bytes -= self.windows.pop(key).bars.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for status endpoints"""
+        with self.lock:
+            requests = self.hits + self.misses + self.refreshes
+            return {
+                "windows": len(self.windows),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / requests, 4) if requests else None
+            }
@@ -0,0 +1,230 @@
+"""
+Bar Store - Persistent on-disk historical bars for backtests and model training
+One directory per symbol and timeframe holding a NumPy file per UTC month
+and a manifest of the time ranges already fetched, so repeated runs read
+history from memory-mapped files and only ask the provider for the gaps
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+
+from bars import Bars, FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Record layout of the month files
+BAR_DTYPE = np.dtype([
+    ('ts', 'M8[ns]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _month(ts: np.datetime64) -> np.datetime64:
+    return ts.astype('datetime64[M]')
+
+
+def _merge_ranges(ranges: List[Tuple[np.datetime64, np.datetime64]]) -> List[Tuple[np.datetime64, np.datetime64]]:
+    """Sort half-open ranges and join the ones that overlap or touch"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class BarStore:
+    """
+    Historical bars on disk, partitioned by symbol, timeframe and month.
+
+    Month files are rewritten whole (to a temporary file, then renamed over
+    the old one), so readers in other threads or processes always see a
+    complete file. The manifest lists the half-open UTC ranges that have
+    been fetched, including stretches without bars such as weekends, and
+    ``gaps()`` returns what is still missing from a requested range.
+    Bars are stored as the provider adjusted them when fetched; ``drop()``
+    a symbol to fetch it again after a split or dividend.
+    """
+
+    def __init__(self, root: str):
+        """
+        Open (and create) a store
+
+        Args:
+            root: Directory holding the store
+        """
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, symbol.upper(), timeframe)
+
+    def _month_path(self, symbol: str, timeframe: str, month: np.datetime64) -> str:
+        return os.path.join(self._dir(symbol, timeframe), f"{month}.npy")
+
+    def _write_atomic(self, path: str, write):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def coverage(self, symbol: str, timeframe: str) -> List[Tuple[np.datetime64, np.datetime64]]:
+        """
+        Get the fetched ranges of a symbol and timeframe
+
+        Returns:
+            Sorted, non-overlapping half-open (start, end) UTC ranges
+        """
+        try:
+            with open(os.path.join(self._dir(symbol, timeframe), MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+        return [(np.datetime64(start, 'ns'), np.datetime64(end, 'ns')) for start, end in manifest['ranges']]
+
+    def gaps(self, symbol: str, timeframe: str, start: np.datetime64,
+             end: np.datetime64) -> List[Tuple[np.datetime64, np.datetime64]]:
+        """
+        Find the parts of a range that have not been fetched yet
+
+        Args:
+            symbol: The stock symbol
+            timeframe: Bar timeframe
+            start: Range start (inclusive, UTC)
+            end: Range end (exclusive, UTC)
+
+        Returns:
+            Half-open (start, end) ranges still missing, oldest first
+        """
+        start, end = np.datetime64(start, 'ns'), np.datetime64(end, 'ns')
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(symbol, timeframe):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def ingest(self, symbol: str, timeframe: str, bars: Bars, start: np.datetime64,
+               end: np.datetime64):
+        """
+        Add fetched bars and record their range as covered
+
+        Bars at timestamps already stored replace the stored ones; all
+        other stored bars are kept.
+
+        Args:
+            symbol: The stock symbol
+            timeframe: Bar timeframe
+            bars: Bars fetched for the range, oldest first
+            start: Start of the fetched range (inclusive, UTC)
+            end: End of the fetched range (exclusive, UTC)
+        """
+        start, end = np.datetime64(start, 'ns'), np.datetime64(end, 'ns')
+        records = np.empty(len(bars), dtype=BAR_DTYPE)
+        for field in FIELDS[1:]:
+            records[field] = getattr(bars, field)
+        records['ts'] = bars.ts
+
+        with self.lock:
+            months = _month(records['ts'])
+            for month in np.unique(months):
+                new = records[months == month]
+                path = self._month_path(symbol, timeframe, month)
+                if os.path.exists(path):
+                    old = np.load(path)
+                    old = old[~np.isin(old['ts'], new['ts'])]
+                    new = np.concatenate([old, new])
+                    new = new[np.argsort(new['ts'], kind='stable')]
+                self._write_atomic(path, lambda f, new=new: np.save(f, new))
+
+            ranges = _merge_ranges(self.coverage(symbol, timeframe) + [(start, end)])
+            manifest = {
+                'symbol': symbol.upper(),
+                'timeframe': timeframe,
+                'ranges': [[str(s), str(e)] for s, e in ranges]
+            }
+            self._write_atomic(os.path.join(self._dir(symbol, timeframe), MANIFEST_NAME),
+                               lambda f: f.write(json.dumps(manifest).encode()))
+
+    def read(self, symbol: str, timeframe: str, start: np.datetime64, end: np.datetime64) -> Bars:
+        """
+        Read stored bars in a range
+
+        Month files are memory-mapped and only the rows in the range are
+        copied out.
+
+        Args:
+            symbol: The stock symbol
+            timeframe: Bar timeframe
+            start: Range start (inclusive, UTC)
+            end: Range end (exclusive, UTC)
+
+        Returns:
+            Bars in the range, oldest first; empty if none are stored
+        """
+        start, end = np.datetime64(start, 'ns'), np.datetime64(end, 'ns')
+        parts = []
+        month = _month(start)
+        while month <= _month(end - np.timedelta64(1, 'ns')):
+            path = self._month_path(symbol, timeframe, month)
+            if os.path.exists(path):
+                records = np.load(path, mmap_mode='r')
+                ts = records['ts']
+                first, last = np.searchsorted(ts, [start, end], 'left')
+                if last > first:
+                    parts.append(records[first:last])
+            month += 1
+        if not parts:
+            return Bars.empty()
+        records = np.concatenate(parts)
+        return Bars(records['ts'], *(records[field] for field in FIELDS[1:]))
+
+    def drop(self, symbol: str, timeframe: Optional[str] = None):
+        """Delete the stored bars of a symbol, for one timeframe or all of them"""
+        with self.lock:
+            root = os.path.join(self.root, symbol.upper())
+            timeframes = [timeframe] if timeframe else (os.listdir(root) if os.path.isdir(root) else [])
+            for tf in timeframes:
+                directory = os.path.join(root, tf)
+                for name in os.listdir(directory) if os.path.isdir(directory) else []:
+                    os.unlink(os.path.join(directory, name))
+                if os.path.isdir(directory):
+                    os.rmdir(directory)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of stored series, month files and bytes"""
+        series = files = size = 0
+        for directory, _, names in os.walk(self.root):
+            if MANIFEST_NAME in names:
+                series += 1
+            for name in names:
+                if name.endswith('.npy'):
+                    files += 1
+                    size += os.path.getsize(os.path.join(directory, name))
+        return {"root": self.root, "series": series, "month_files": files, "bytes": size}
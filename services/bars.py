@@ -0,0 +1,187 @@
+"""
+Bars - Columnar OHLCV price bars shared by the market data services
+Holds one NumPy array per field instead of a list of per-bar dictionaries,
+so bars from an Alpaca DataFrame are wrapped without touching each row and
+are only turned into a DataFrame or JSON records when a caller asks
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Price fields, in the order responses list them
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+FIELDS = ('timestamp',) + PRICE_FIELDS + ('volume',)
+
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    """Get a read-only view of an array so the bars sharing it stay unchanged"""
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+class Bars:
+    """
+    Immutable columnar OHLCV bars of one symbol, oldest first.
+
+    ``ts`` is UTC ``datetime64[ns]``; prices are float64 and volume is
+    int64. The arrays are read-only and may be shared with the DataFrame
+    they came from and with every slice and DataFrame made from them.
+    Indexing with an integer or iterating yields per-bar dictionaries in
+    the old list-of-dicts format for callers that still want them.
+    """
+
+    __slots__ = ('ts', 'open', 'high', 'low', 'close', 'volume', '_records')
+
+    def __init__(self, ts: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray):
+        """
+        Wrap bar columns of equal length
+
+        Args:
+            ts: Bar start times as UTC datetime64[ns]
+            open, high, low, close: Prices
+            volume: Traded volume
+        """
+        self.ts = _readonly(np.asarray(ts, dtype='datetime64[ns]'))
+        self.open = _readonly(np.asarray(open, dtype=np.float64))
+        self.high = _readonly(np.asarray(high, dtype=np.float64))
+        self.low = _readonly(np.asarray(low, dtype=np.float64))
+        self.close = _readonly(np.asarray(close, dtype=np.float64))
+        self.volume = _readonly(np.asarray(volume, dtype=np.int64))
+        if not all(len(column) == len(self.ts) for column in (self.open, self.high, self.low,
+                                                                 self.close, self.volume)):
+            raise ValueError("Bar columns must have the same length")
+        self._records = None
+
+    @classmethod
+    def empty(cls) -> 'Bars':
+        """Get bars with no rows"""
+        return cls(np.empty(0, dtype='datetime64[ns]'), *(np.empty(0) for _ in PRICE_FIELDS),
+                   np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'Bars':
+        """
+        Wrap a provider DataFrame without converting it row by row
+
+        Args:
+            df: Bars with open/high/low/close/volume columns and a DatetimeIndex
+                or a 'timestamp' column; naive times are taken as UTC
+
+        Returns:
+            Bars sharing the DataFrame's float64 columns where possible
+        """
+        index = pd.DatetimeIndex(df['timestamp'] if 'timestamp' in df.columns else df.index)
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        return cls(index.to_numpy(dtype='datetime64[ns]'),
+                   *(df[field].to_numpy(dtype=np.float64, copy=False) for field in PRICE_FIELDS),
+                   df['volume'].to_numpy(dtype=np.int64, copy=False))
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'Bars':
+        """
+        Build bars from per-bar dictionaries
+
+        Args:
+            records: Dictionaries with timestamp (ISO string or datetime), open,
+                high, low, close and volume keys
+
+        Returns:
+            Bars in the order of the records
+        """
+        if not records:
+            return cls.empty()
+        index = pd.DatetimeIndex([r['timestamp'] for r in records])
+        if index.tz is not None:
+            index = index.tz_convert(None)
+        return cls(index.to_numpy(dtype='datetime64[ns]'),
+                   *(np.fromiter((r[field] for r in records), np.float64, len(records))
+                     for field in PRICE_FIELDS),
+                   np.fromiter((r['volume'] for r in records), np.int64, len(records)))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, key):
+        """Get one bar as a dictionary, or a slice of the bars as Bars sharing the arrays"""
+        if isinstance(key, slice):
+            return Bars(self.ts[key], self.open[key], self.high[key], self.low[key],
+                        self.close[key], self.volume[key])
+        if self._records is not None:
+            return self._records[key]
+        bar = Bars(self.ts[key:key + 1 or None], self.open[key:key + 1 or None],
+                   self.high[key:key + 1 or None], self.low[key:key + 1 or None],
+                   self.close[key:key + 1 or None], self.volume[key:key + 1 or None])
+        if not len(bar):
+            raise IndexError("bar index out of range")
+        return bar.to_records()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.to_records())
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "Bars(0)"
+        return f"Bars({len(self)}, {self.ts[0]} .. {self.ts[-1]})"
+
+    @property
+    def nbytes(self) -> int:
+        """Get the memory held by the bar columns in bytes"""
+        return sum(getattr(self, field).nbytes for field in ('ts',) + FIELDS[1:])
+
+    def merge(self, newer: 'Bars') -> 'Bars':
+        """
+        Append newer bars, letting them replace cached bars from their first timestamp on
+
+        The last bar of a fetch may still have been forming, so a refresh
+        that starts at it overwrites it instead of duplicating it.
+
+        Args:
+            newer: Bars fetched from some timestamp on
+
+        Returns:
+            New Bars with the older bars of this one followed by ``newer``
+        """
+        if not len(newer):
+            return self
+        keep = int(np.searchsorted(self.ts, newer.ts[0], 'left'))
+        return Bars(*(np.concatenate([getattr(self, field)[:keep], getattr(newer, field)])
+                      for field in ('ts',) + FIELDS[1:]))
+
+    def tail(self, limit: int) -> 'Bars':
+        """Get the newest ``limit`` bars"""
+        return self[max(len(self) - limit, 0):] if limit < len(self) else self
+
+    def timestamps(self) -> List[str]:
+        """Get the bar times as ISO 8601 strings with a UTC offset"""
+        return [t + '+00:00' for t in np.datetime_as_string(self.ts, unit='s').tolist()]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Get the bars as JSON-ready dictionaries
+
+        Built once per Bars with one ``tolist()`` per column rather than
+        one conversion per value; callers must not modify the result.
+        """
+        if self._records is None:
+            columns = [self.timestamps()] + [getattr(self, field).tolist() for field in FIELDS[1:]]
+            self._records = [dict(zip(FIELDS, bar)) for bar in zip(*columns)]
+        return self._records
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Get the bars as a DataFrame indexed by UTC timestamp
+
+        The columns are read-only views of the bar arrays, not copies.
+        Each call returns a new DataFrame, so callers may add columns to
+        it; editing the bar columns in place needs a ``copy()`` first.
+        """
+        index = pd.DatetimeIndex(self.ts, name='timestamp').tz_localize('UTC')
+        return pd.DataFrame({field: getattr(self, field) for field in FIELDS[1:]},
+                            index=index, copy=False)
@@ -11,8 +11,15 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import threading
 import requests
+import numpy as np
 import pandas as pd
 
+from bars import Bars
+from bar_cache import BarCache, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from bar_store import BarStore
+from bar_batch import BarFetchPool, split_by_symbol, lookback_start, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT
+from single_flight import SingleFlight
+
 # Try importing Alpaca, but continue with mock data if not available
 try:
     import alpaca_trade_api as alpaca
@@ -22,8 +29,19 @@ try:
 except ImportError:
     ALPACA_AVAILABLE = False
 
+# Local QuotestreamPY quotes (shared-memory board with an HTTP fallback)
+try:
+    from quotestream_reader import get_quote_reader
+    QUOTESTREAM_AVAILABLE = True
+except ImportError:
+    QUOTESTREAM_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Directory of the on-disk historical bar store; empty disables it
+BAR_STORE_DIR = os.environ.get('BAR_STORE_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bars'))
+
 class MarketDataService:
     """
     Provides real-time and historical market data for the OG Strategy Matcher.
@@ -41,7 +59,12 @@ class MarketDataService:
         
         # Cache for market data
         self.price_cache = {}
-        self.candle_cache = {}
+        self.candle_cache = BarCache(
+            ttl=float(os.environ.get('BAR_CACHE_TTL', DEFAULT_TTL)),
+            max_bytes=int(float(os.environ.get('BAR_CACHE_MB', DEFAULT_MAX_BYTES / 2**20)) * 2**20)
+        )
+        self.bar_pool = BarFetchPool(int(os.environ.get('BAR_FETCH_WORKERS', DEFAULT_MAX_WORKERS)))
+        self.inflight = SingleFlight()  # concurrent misses for the same key share one provider call
         self.last_updated = {}
         self.watchlist = []
         
@@ -104,20 +127,18 @@ class MarketDataService:
             if (datetime.now() - last_update).seconds < 60:  # Cache for 60 seconds
                 return self.price_cache[symbol]
         
-        # If Alpaca API is available, use it
+        # If Alpaca API is available, use it; callers missing the cache at the
+        # same time wait for one latest-trade request
         if self.alpaca_api:
-            try:
-                # Get latest trade
-                latest_trade = self.alpaca_api.get_latest_trade(symbol)
-                price = latest_trade.price
-                
-                # Update cache
-                self.price_cache[symbol] = price
-                self.last_updated[symbol] = datetime.now()
-                
+            price = self.inflight.do(('price', symbol), lambda: self._fetch_latest_price(symbol))
+            if price is not None:
+                return price
+        
+        # Without Alpaca, use the QuotestreamPY quote board: a local shared-memory read
+        if QUOTESTREAM_AVAILABLE:
+            price = get_quote_reader().last_price(symbol)
+            if price is not None:
                 return price
-            except Exception as e:
-                logger.error(f"Error getting current price for {symbol}: {str(e)}")
         
         # Fallback to example prices for common symbols
         fallback_prices = {
@@ -145,7 +166,23 @@ class MarketDataService:
         logger.warning(f"Using simulated price for {symbol}: {simulated_price}")
         return simulated_price
     
-    def get_bars(self, symbol: str, timeframe: str = '1D', limit: int = 100) -> Optional[List[Dict[str, Any]]]:
+    def _fetch_latest_price(self, symbol: str) -> Optional[float]:
+        """Fetch the latest trade price from Alpaca and cache it, returning None on error"""
+        try:
+            # Get latest trade
+            latest_trade = self.alpaca_api.get_latest_trade(symbol)
+            price = latest_trade.price
+            
+            # Update cache
+            self.price_cache[symbol] = price
+            self.last_updated[symbol] = datetime.now()
+            
+            return price
+        except Exception as e:
+            logger.error(f"Error getting current price for {symbol}: {str(e)}")
+            return None
+    
+    def get_bars(self, symbol: str, timeframe: str = '1D', limit: int = 100) -> Optional[Bars]:
         """
         Get price bars/candles for a symbol
         
@@ -155,51 +192,108 @@ class MarketDataService:
             limit: Maximum number of bars to retrieve
             
         Returns:
-            List of bar data dictionaries, or None if unavailable
+            Columnar Bars, or None if unavailable
         """
-        cache_key = f"{symbol}_{timeframe}_{limit}"
-        
-        # Check cache first (if recent)
-        if cache_key in self.candle_cache:
-            last_update = self.last_updated.get(cache_key, datetime.min)
-            if (datetime.now() - last_update).seconds < 300:  # Cache for 5 minutes
-                return self.candle_cache[cache_key]
-        
-        # If Alpaca API is available, use it
+        # If Alpaca API is available, use it through the cache: any limit up to the
+        # longest one fetched is a slice, and expired windows only fetch newer bars.
+        # Concurrent misses for the same bars share one request
         if self.alpaca_api:
-            try:
-                # Get bars from Alpaca
-                bars = self.alpaca_api.get_bars(
-                    symbol,
-                    timeframe,
-                    limit=limit
-                ).df.reset_index()
-                
-                # Convert to list of dictionaries
-                bars_list = []
-                for _, row in bars.iterrows():
-                    bar_dict = {
-                        'timestamp': row['timestamp'].isoformat(),
-                        'open': float(row['open']),
-                        'high': float(row['high']),
-                        'low': float(row['low']),
-                        'close': float(row['close']),
-                        'volume': int(row['volume'])
-                    }
-                    bars_list.append(bar_dict)
-                
-                # Update cache
-                self.candle_cache[cache_key] = bars_list
-                self.last_updated[cache_key] = datetime.now()
-                
-                return bars_list
-            except Exception as e:
-                logger.error(f"Error getting bars for {symbol}: {str(e)}")
+            bars = self.candle_cache.get(
+                symbol, timeframe, limit,
+                lambda count: self.inflight.do(
+                    ('bars', symbol, timeframe, count),
+                    lambda: self._fetch_bars(symbol, timeframe, limit=count)),
+                lambda since: self.inflight.do(
+                    ('bars', symbol, timeframe, str(since)),
+                    lambda: self._fetch_bars(symbol, timeframe,
+                                             start=np.datetime_as_string(since, unit='s') + 'Z'))
+            )
+            if bars is not None:
+                return bars
         
         # If no Alpaca or error occurred, generate simulated data
         logger.warning(f"Using simulated bar data for {symbol}")
         return self._generate_simulated_bars(symbol, limit)
     
+    def get_bars_many(self, symbols: List[str], timeframe: str = '1D', limit: int = 100,
+                      timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Bars]:
+        """
+        Get price bars for several symbols at once
+        
+        Cached symbols are served from the bar cache; the rest are fetched
+        with one multi-symbol Alpaca request. Symbols that request failed
+        for or returned fewer than ``limit`` bars for, and every symbol
+        without Alpaca, go through get_bars() on a bounded thread pool.
+        
+        Args:
+            symbols: The stock symbols
+            timeframe: Time period for each bar
+            limit: Maximum number of bars per symbol
+            timeout: Seconds each per-symbol fetch may take
+            
+        Returns:
+            Mapping of symbol to Bars; symbols that failed or timed out are left out
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        result = {}
+        missing = symbols
+        
+        if self.alpaca_api:
+            missing = []
+            for symbol in symbols:
+                bars = self.candle_cache.lookup(symbol, timeframe, limit)
+                if bars is None:
+                    missing.append(symbol)
+                else:
+                    result[symbol] = bars
+            
+            if missing:
+                try:
+                    # Alpaca's limit counts bars across all the symbols of the request,
+                    # so bound it by start time to give each symbol its own history
+                    fetched = self.inflight.do(
+                        ('bars', tuple(missing), timeframe, limit),
+                        lambda: split_by_symbol(self.alpaca_api.get_bars(
+                            missing,
+                            timeframe,
+                            start=lookback_start(timeframe, limit)
+                        ).df, limit))
+                    short = []
+                    for symbol in missing:
+                        bars = fetched.get(symbol)
+                        if bars is None or len(bars) < limit:
+                            short.append(symbol)
+                            continue
+                        self.candle_cache.put(symbol, timeframe, bars, limit)
+                        result[symbol] = bars
+                    missing = short
+                except Exception as e:
+                    logger.error(f"Error getting bars for {len(missing)} symbols: {str(e)}")
+        
+        if missing:
+            fetched, _ = self.bar_pool.fetch(missing, lambda symbol: self.get_bars(symbol, timeframe, limit),
+                                             timeout)
+            result.update(fetched)
+        
+        return {symbol: result[symbol] for symbol in symbols if symbol in result}
+    
+    def _fetch_bars(self, symbol: str, timeframe: str, **params) -> Optional[Bars]:
+        """Fetch bars from Alpaca, returning None on error"""
+        try:
+            df = self.alpaca_api.get_bars(symbol, timeframe, **params).df
+            return Bars.from_dataframe(df) if not df.empty else Bars.empty()
+        except Exception as e:
+            logger.error(f"Error getting bars for {symbol}: {str(e)}")
+            return None
+    
+    def get_bar_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss and memory counters of the bar cache"""
+        return self.candle_cache.stats()
+    
+    def get_single_flight_stats(self) -> Dict[str, Any]:
+        """Get provider fetches run and lookups coalesced onto them, per kind of lookup"""
+        return self.inflight.stats()
+    
     def get_prev_close(self, symbol: str) -> Optional[float]:
         """
         Get the previous day's closing price for a symbol
@@ -231,7 +325,7 @@ class MarketDataService:
         # Otherwise get bars and use most recent close
         bars = self.get_bars(symbol, timeframe='1D', limit=2)
         if bars and len(bars) > 1:
-            return bars[-2]['close']
+            return float(bars.close[-2])
         
         # Fallback to current price -1%
         current_price = self.get_current_price(symbol)
@@ -298,7 +392,7 @@ class MarketDataService:
             logger.error(f"Error starting Alpaca stream: {str(e)}")
             return False
     
-    def _generate_simulated_bars(self, symbol: str, limit: int = 100) -> List[Dict[str, Any]]:
+    def _generate_simulated_bars(self, symbol: str, limit: int = 100) -> Bars:
         """Generate simulated bar data for demo purposes"""
         import random
         
@@ -342,7 +436,7 @@ class MarketDataService:
             # Set up for next bar
             current_price = close_price
         
-        return bars
+        return Bars.from_records(bars)
     
     def set_watchlist(self, symbols: List[str]):
         """Set the list of symbols to actively monitor"""
@@ -357,8 +451,9 @@ class MarketDataService:
         return self.watchlist
 
 
-# Singleton instance for the application to use
+# Singleton instances for the application to use
 _market_data_service = None
+_bar_store = None
 
 def get_market_data_service() -> MarketDataService:
     """Get the singleton market data service instance"""
@@ -368,38 +463,76 @@ def get_market_data_service() -> MarketDataService:
     return _market_data_service
 
 
+def get_bar_store() -> Optional[BarStore]:
+    """Get the singleton on-disk bar store, or None if BAR_STORE_DIR is empty"""
+    global _bar_store
+    if _bar_store is None and BAR_STORE_DIR:
+        _bar_store = BarStore(BAR_STORE_DIR)
+    return _bar_store
+
+
+def _rfc3339(ts: np.datetime64) -> str:
+    return np.datetime_as_string(ts, unit='s') + 'Z'
+
+
 def get_historical_data(symbol: str, start_date: str, end_date: str, timeframe: str = '1D') -> pd.DataFrame:
     """
     Get historical market data for backtesting
     
+    Bars come from the on-disk bar store; only the parts of the range it
+    has not fetched before are requested from Alpaca, so repeated runs
+    read from disk and work offline.
+    
     Args:
         symbol: The stock symbol
         start_date: Start date in YYYY-MM-DD format
-        end_date: End date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format, inclusive
         timeframe: Data timeframe (1D, 1H, etc.)
         
     Returns:
-        Pandas DataFrame with historical data
+        Pandas DataFrame with open, high, low, close and volume columns
+        indexed by UTC timestamp. Alpaca's trade_count and vwap columns
+        are not kept in the bar store and are not returned, whether the
+        bars come from the store, from Alpaca or from the simulation.
     """
     
     service = get_market_data_service()
+    store = get_bar_store()
+    start = np.datetime64(start_date, 'ns')
+    end = np.datetime64(end_date, 'ns') + np.timedelta64(1, 'D')
     
-    # If Alpaca API is available, use it
-    if service.alpaca_api:
-        try:
-            # Get historical data from Alpaca
-            df = service.alpaca_api.get_bars(
-                symbol,
-                timeframe,
-                start=start_date,
-                end=end_date,
-                adjustment='all'  # Adjust for splits, dividends, etc.
-            ).df
-            
-            if not df.empty:
-                return df
-        except Exception as e:
-            logger.error(f"Error getting historical data for {symbol}: {str(e)}")
+    if store is not None:
+        # Fetch what the store lacks up to now
+        now = np.datetime64(datetime.utcnow(), 'ns')
+        missing = store.gaps(symbol, timeframe, start, min(end, now))
+        if missing and service.alpaca_api:
+            for i, (gap_start, gap_end) in enumerate(missing):
+                bars = service._fetch_bars(symbol, timeframe, start=_rfc3339(gap_start),
+                                           end=_rfc3339(gap_end - np.timedelta64(1, 's')),
+                                           adjustment='all')  # Adjust for splits, dividends, etc.
+                if bars is None:
+                    missing = missing[i:]
+                    break
+                # A range reaching the present stays open from its newest bar,
+                # which may still be forming, so that bar is fetched again next time
+                if gap_end >= now:
+                    gap_end = bars.ts[-1] if len(bars) else gap_start
+                store.ingest(symbol, timeframe, bars, gap_start, gap_end)
+            else:
+                missing = []
+        
+        bars = store.read(symbol, timeframe, start, end)
+        if len(bars):
+            if missing:
+                logger.warning(f"Historical data for {symbol} is missing {len(missing)} range(s) of {start_date} - {end_date}")
+            return bars.to_dataframe()
+    
+    # Without a store, get the range from Alpaca directly
+    elif service.alpaca_api:
+        bars = service._fetch_bars(symbol, timeframe, start=_rfc3339(start),
+                                   end=_rfc3339(end - np.timedelta64(1, 's')), adjustment='all')
+        if bars is not None and len(bars):
+            return bars.to_dataframe()
     
     # Fallback to simulated data
     logger.warning(f"Using simulated historical data for {symbol}")
@@ -425,8 +558,6 @@ def get_historical_data(symbol: str, start_date: str, end_date: str, timeframe:
     bars = service._generate_simulated_bars(symbol, periods)
     
     # Convert to DataFrame
-    df = pd.DataFrame(bars)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.set_index('timestamp')
+    df = bars.to_dataframe()
     
     return df
\ No newline at end of file
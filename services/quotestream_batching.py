@@ -0,0 +1,153 @@
+"""
+Quotestream Batching - Coalesces quote/depth/trade updates into market_batch frames
+Clients that opt in receive one frame per flush holding every change for
+their symbols instead of up to three Socket.IO messages per symbol per tick;
+clients watching the same symbols share the frame
+"""
+import time
+import logging
+import datetime
+from typing import Dict, List, Optional, Any, Iterable, Tuple, Container
+
+logger = logging.getLogger("quotestream")
+
+# DeltaEncoder room of the quote_deltas in market_batch frames
+BATCH_DELTA_ROOM = "market_batch"
+
+
+class BatchCoalescer:
+    """
+    Accumulates market updates between flushes.
+
+    Quotes are conflated to the latest value per symbol and L2 depth deltas
+    are merged level by level; trades are kept in print order so a batch
+    never loses a trade.
+    """
+
+    def __init__(self, flush_interval: float = 0.0, max_trades_per_symbol: int = 50):
+        """
+        Initialize the coalescer
+
+        Args:
+            flush_interval: Minimum seconds between flushes; 0 flushes every tick
+            max_trades_per_symbol: Cap on trades held per symbol between flushes
+        """
+        self.flush_interval = flush_interval
+        self.max_trades_per_symbol = max_trades_per_symbol
+        self.last_flush = 0.0
+        self.frames_sent = 0
+        self._quotes: Dict[str, Tuple[Dict[str, Any], Optional[int]]] = {}
+        # symbol -> merged L2 delta with per-side {price: level} changes
+        self._depth: Dict[str, Dict[str, Any]] = {}
+        self._trades: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add_quote(self, symbol: str, quote: Dict[str, Any], timestamp_ms: Optional[int] = None):
+        """Record the latest quote (and its epoch-ms timestamp) for a symbol"""
+        self._quotes[symbol] = (quote, timestamp_ms)
+
+    def add_depth_delta(self, symbol: str, delta: Dict[str, Any]):
+        """Merge an L2 book delta into the pending changes for a symbol"""
+        pending = self._depth.get(symbol)
+        if pending is None:
+            pending = self._depth[symbol] = {"f": delta["f"], "b": {}, "a": {}}
+        pending["n"] = delta["n"]
+        pending["t"] = delta["t"]
+        for side in ("b", "a"):
+            levels = pending[side]
+            for level in delta[side]:
+                levels[level[0]] = level
+
+    def add_trade(self, symbol: str, trade: Dict[str, Any]):
+        """Record a new trade print for a symbol"""
+        pending = self._trades.setdefault(symbol, [])
+        pending.append(trade)
+        if len(pending) > self.max_trades_per_symbol:
+            del pending[0]
+
+    def pending(self) -> bool:
+        """Check whether any update is waiting to be flushed"""
+        return bool(self._quotes or self._depth or self._trades)
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """Check whether the flush interval has elapsed"""
+        now = time.monotonic() if now is None else now
+        return now - self.last_flush >= self.flush_interval
+
+    def drain(self, now: Optional[float] = None) -> Tuple[Dict, Dict, Dict]:
+        """
+        Take every pending update and reset the buffers
+
+        Returns:
+            Tuple of (quotes, depth deltas, trades) keyed by symbol
+        """
+        drained = (self._quotes, self._depth, self._trades)
+        self._quotes, self._depth, self._trades = {}, {}, {}
+        self.last_flush = time.monotonic() if now is None else now
+        return drained
+
+    def frames(self, clients: Dict[str, Iterable[str]], now: Optional[float] = None,
+               delta_encoder=None, delta_clients: Container[str] = ()) -> List[Tuple[List[str], Dict[str, Any]]]:
+        """
+        Drain pending updates into market_batch frames, one per room
+
+        Clients subscribed to the same symbols in the same format form a
+        room and share one frame, so the frame is built once however many
+        clients receive it.
+
+        Args:
+            clients: Mapping of Socket.IO session id to subscribed symbols
+            delta_encoder: Optional DeltaEncoder for clients in delta mode
+            delta_clients: Session ids whose quotes are delta-encoded; their
+                frames carry "quote_deltas" instead of "quotes", keyed by
+                symbol, with the tick time hoisted to a frame-level "t"
+
+        Returns:
+            List of (sids, frame) pairs; rooms with nothing new are skipped
+        """
+        quotes, depth, trades = self.drain(now)
+        timestamp = datetime.datetime.now().isoformat()
+        frame_ms = max((ts for _, ts in quotes.values() if ts is not None), default=None)
+        frames = []
+        
+        # Merged deltas span seqs f..n, newest size per level
+        depth = {s: {"f": d["f"], "n": d["n"], "t": d["t"], "b": list(d["b"].values()), "a": list(d["a"].values())}
+                 for s, d in depth.items()}
+
+        rooms: Dict[Tuple[frozenset, bool], List[str]] = {}
+        for sid, symbols in clients.items():
+            in_delta = delta_encoder is not None and sid in delta_clients
+            rooms.setdefault((frozenset(symbols), in_delta), []).append(sid)
+
+        # Delta clients share one delta room, so each symbol is encoded once
+        deltas = {}
+        delta_symbols = set().union(*(symbols for symbols, in_delta in rooms if in_delta))
+        for s in delta_symbols & quotes.keys():
+            quote, ts = quotes[s]
+            delta = delta_encoder.encode(BATCH_DELTA_ROOM, s, quote, ts)
+            if delta is not None:
+                # The symbol is the key and most quotes share the tick time
+                del delta["s"]
+                if delta["t"] == frame_ms:
+                    del delta["t"]
+                deltas[s] = delta
+
+        for (symbols, in_delta), sids in rooms.items():
+            frame_depth = {s: depth[s] for s in symbols if s in depth}
+            # Newest trade first, matching /api/trades and trade_update order
+            frame_trades = {s: trades[s][::-1] for s in symbols if s in trades}
+            frame = {"depth_deltas": frame_depth, "trades": frame_trades, "timestamp": timestamp}
+
+            if in_delta:
+                frame_quotes = {s: deltas[s] for s in symbols if s in deltas}
+                frame["quote_deltas"] = frame_quotes
+                frame["t"] = frame_ms
+            else:
+                frame_quotes = {s: quotes[s][0] for s in symbols if s in quotes}
+                frame["quotes"] = frame_quotes
+
+            if not (frame_quotes or frame_depth or frame_trades):
+                continue
+            frames.append((sids, frame))
+
+        self.frames_sent += len(frames)
+        return frames
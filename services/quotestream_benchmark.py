@@ -0,0 +1,655 @@
+"""
+QuotestreamPY Benchmarks - Measures the simulation hot paths offline
+Run with: python quotestream_benchmark.py [--symbols N] [--hz H] [--seconds S]
+"""
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import logging
+import multiprocessing
+
+import numpy as np
+
+from quotestream_simulator import MarketSimulator, PROCESSES
+from quotestream_engine import (TickEngine, F_LAST, F_BID, F_ASK, F_TS,
+                                I_BID_SIZE, I_ASK_SIZE, I_VOLUME)
+from quotestream_options import build_option_chain, simulated_market_chain, strike_grid
+from quotestream_volsurface import SurfaceCache, implied_volatility
+from quotestream_delta import DeltaEncoder, pack, MSGPACK_AVAILABLE
+from quotestream_book import OrderBook
+from quotestream_recorder import TickRecorder
+from quotestream_replay import TickReplayer
+from quotestream_scheduler import TickScheduler
+from quotestream_search import SymbolIndex
+from quotestream_profile import VolumeProfile
+from quotestream_board import QuoteBoard
+from quotestream_shard import ShardWorker
+from quotestream_reader import QuoteReader
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger("quotestream.benchmark")
+
+
+def _symbols(count):
+    """Build a synthetic universe of ``count`` symbols"""
+    return [f"S{i:05d}" for i in range(count)]
+
+
+def bench_ticks(num_symbols=5000, hz=5.0, seconds=5.0):
+    """
+    Measure vectorized tick generation for a whole universe
+
+    Args:
+        num_symbols: Number of symbols to simulate
+        hz: Target update frequency
+        seconds: Simulated duration of the run
+
+    Returns:
+        Dictionary with timing results
+    """
+    engine = TickEngine(seed=42)
+    rows = engine.rows(_symbols(num_symbols))
+    ticks = max(1, int(hz * seconds))
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        engine.step(rows)
+    step_time = (time.perf_counter() - start) / ticks
+
+    # Building every quote dict is the worst case for a tick
+    start = time.perf_counter()
+    for symbol in engine.symbols:
+        engine.quotes[symbol]
+    build_time = time.perf_counter() - start
+
+    budget = 1.0 / hz
+    result = {
+        "symbols": num_symbols,
+        "target_hz": hz,
+        "step_ms": step_time * 1000,
+        "build_all_ms": build_time * 1000,
+        "budget_used_pct": (step_time / budget) * 100,
+        "max_hz": 1.0 / step_time if step_time > 0 else float("inf")
+    }
+    logger.info(
+        f"ticks: {num_symbols} symbols, step {result['step_ms']:.3f} ms "
+        f"({result['budget_used_pct']:.2f}% of {budget * 1000:.0f} ms budget, "
+        f"max {result['max_hz']:.0f} Hz), all quote dicts {result['build_all_ms']:.1f} ms"
+    )
+    return result
+
+
+def bench_simulator(num_symbols=1000, steps=1000, dt=60.0, seed=3):
+    """
+    Measure offline path generation for every price process and check it is reproducible
+
+    Args:
+        num_symbols: Number of symbols per path set
+        steps: Number of steps per path
+        dt: Simulated seconds per step
+        seed: Simulator seed
+
+    Returns:
+        Dictionary with timing and path statistics per process
+    """
+    result = {}
+    for name in PROCESSES:
+        paths = []
+        for _ in range(2):
+            simulator = MarketSimulator(seed=seed, process=name)
+            rows = np.array([simulator.add_symbol(f"sector{i % 10}") for i in range(num_symbols)])
+            start = time.perf_counter()
+            paths.append(simulator.paths(rows, np.full(num_symbols, 100.0), steps, dt))
+            elapsed = time.perf_counter() - start
+
+        # Average pairwise correlation of log returns comes from the factors
+        log_returns = np.diff(np.log(paths[0]), axis=0)
+        corr = np.corrcoef(log_returns, rowvar=False)
+        result[name] = {
+            "step_ms": elapsed / steps * 1000,
+            "reproducible": bool(np.array_equal(paths[0], paths[1])),
+            "mean_correlation": float((corr.sum() - num_symbols) / (num_symbols * (num_symbols - 1)))
+        }
+        logger.info(f"simulator {name}: {num_symbols} symbols x {steps} steps, "
+                    f"{result[name]['step_ms']:.3f} ms per step, mean correlation "
+                    f"{result[name]['mean_correlation']:.2f}, reproducible {result[name]['reproducible']}")
+    return result
+
+
+def bench_scheduler(hz=20.0, work_ms=5.0, seconds=2.0):
+    """
+    Compare the achieved rate of a fixed-deadline task with a work-then-sleep loop
+
+    Args:
+        hz: Target task frequency
+        work_ms: Busy time per run
+        seconds: Duration of each run
+
+    Returns:
+        Dictionary with achieved rates and scheduler lag
+    """
+    def work(task=None):
+        end = time.perf_counter() + work_ms / 1000.0
+        while time.perf_counter() < end:
+            pass
+
+    runs = 0
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        work()
+        time.sleep(1.0 / hz)
+        runs += 1
+    sleep_hz = runs / (time.monotonic() - start)
+
+    scheduler = TickScheduler()
+    task = scheduler.add("work", hz, work)
+    while time.monotonic() - scheduler.start < seconds:
+        scheduler.run_pending()
+    scheduled_hz = task.runs / (time.monotonic() - scheduler.start)
+
+    result = {"target_hz": hz, "sleep_loop_hz": sleep_hz, "scheduler_hz": scheduled_hz,
+              "avg_lag_ms": task.avg_lag * 1000, "max_lag_ms": task.max_lag * 1000}
+    logger.info(f"scheduler: target {hz:g} Hz with {work_ms:g} ms work, sleep loop {sleep_hz:.1f} Hz, "
+                f"scheduler {scheduled_hz:.1f} Hz (lag avg {result['avg_lag_ms']:.2f} ms, "
+                f"max {result['max_lag_ms']:.2f} ms)")
+    return result
+
+
+def bench_option_chains(iterations=200):
+    """
+    Measure full option chain rebuilds
+
+    Args:
+        iterations: Number of chains to build
+
+    Returns:
+        Dictionary with timing results
+    """
+    build_option_chain("AAPL", 180.0)
+    start = time.perf_counter()
+    for i in range(iterations):
+        build_option_chain("AAPL", 180.0 + (i % 10) * 0.1)
+    chain_time = (time.perf_counter() - start) / iterations
+
+    result = {"iterations": iterations, "chain_ms": chain_time * 1000}
+    logger.info(f"option chains: {result['chain_ms']:.3f} ms per 7x25 chain")
+    return result
+
+
+def bench_vol_surface(moves=200, seed=21):
+    """
+    Compare solving and fitting the volatility surface on every chain
+    rebuild with pricing chains off the cached surface
+
+    Args:
+        moves: Number of chain rebuilds along a random underlying path
+        seed: Seed for the underlying path
+
+    Returns:
+        Dictionary with solver, fit and per-rebuild timings
+    """
+    chain = simulated_market_chain("AAPL", 180.0, 0.3)
+    n = len(chain)
+    start = time.perf_counter()
+    implied_volatility(chain.columns["last"], 180.0, chain.columns["strike"],
+                       chain.columns["days_to_expiration"] / 365.0, np.arange(n) < n // 2)
+    solve_time = time.perf_counter() - start
+
+    path = 180.0 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0.0, 0.002, moves)))
+
+    def rebuild(cache, price):
+        surface = cache.get("AAPL", price)
+        if surface is None:
+            surface = cache.fit(simulated_market_chain("AAPL", price, 0.3))
+        return build_option_chain("AAPL", price, surface=surface)
+
+    timings = {}
+    for name, threshold in (("refit_every_ms", -1.0), ("cached_ms", 0.02)):
+        cache = SurfaceCache(threshold)
+        start = time.perf_counter()
+        for price in path:
+            rebuild(cache, float(price))
+        timings[name] = (time.perf_counter() - start) / moves * 1000
+    timings["refits"] = cache.refits
+
+    result = {"contracts": n, "solve_ms": solve_time * 1000, **timings}
+    logger.info(f"vol surface: {n} IVs solved in {result['solve_ms']:.2f} ms, chain rebuild "
+                f"{result['refit_every_ms']:.2f} ms refitting every time vs {result['cached_ms']:.2f} ms "
+                f"cached ({cache.refits} refits over {moves} moves)")
+    return result
+
+
+def bench_option_queries(strikes=401, iterations=200):
+    """
+    Compare serving a whole large chain with a filtered, column-limited query
+
+    Args:
+        strikes: Number of strikes per expiration
+        iterations: Number of queries to time
+
+    Returns:
+        Dictionary with timing and response size results
+    """
+    grid = strike_grid(510.0, width=0.5, step_pct=1.0 / (strikes - 1))
+    chain = build_option_chain("SPY", 510.0, strikes=grid)
+    expiration = chain.expirations[2]
+
+    start = time.perf_counter()
+    full = json.dumps(chain.query())
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        filtered = json.dumps(chain.query(fields=["symbol", "strike", "bid", "ask", "delta"], columnar=True,
+                                          expirations=[expiration], option_type="call",
+                                          delta_min=0.2, delta_max=0.8))
+    query_time = (time.perf_counter() - start) / iterations
+
+    result = {"contracts": len(chain), "full_ms": full_time * 1000, "full_bytes": len(full),
+              "query_ms": query_time * 1000, "query_bytes": len(filtered)}
+    logger.info(f"option queries: {len(chain)} contracts, whole chain {result['full_ms']:.1f} ms / "
+                f"{len(full)} bytes, one expiration delta 0.2-0.8 calls {result['query_ms']:.3f} ms / "
+                f"{len(filtered)} bytes")
+    return result
+
+
+def bench_search(num_symbols=12000, seed=9):
+    """
+    Measure autocomplete lookups, one per keystroke, over a synthetic universe
+
+    Args:
+        num_symbols: Number of symbols in the universe
+        seed: Seed for the generated symbols and names
+
+    Returns:
+        Dictionary with build time and per-keystroke latencies
+    """
+    rng = np.random.default_rng(seed)
+    words = ["American", "Global", "Pacific", "Energy", "Capital", "Systems", "Health", "Bio",
+             "Micro", "Devices", "Holdings", "Financial", "Networks", "Motors", "Pharma", "Digital",
+             "Semiconductor", "Resources", "Industries", "Technologies", "Brands", "Realty"]
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    universe = {}
+    while len(universe) < num_symbols:
+        symbol = "".join(rng.choice(letters, rng.integers(1, 6)))
+        name = " ".join(rng.choice(words, rng.integers(2, 4))) + rng.choice([" Inc.", " Corp.", " Ltd.", ""])
+        universe[symbol] = {"name": name, "sector": "Synthetic"}
+    universe["AAPL"] = {"name": "Apple Inc.", "sector": "Technology"}
+
+    start = time.perf_counter()
+    index = SymbolIndex(universe)
+    build_time = time.perf_counter() - start
+
+    # Every prefix of each query, as typed into the dashboard
+    queries = ["AAPL", "apple", "semicondutor hold", "pacific energ", "MSFT", "capitl"]
+    keystrokes = [q[:i] for q in queries for i in range(1, len(q) + 1)]
+    timings = []
+    for keystroke in keystrokes:
+        start = time.perf_counter()
+        index.search(keystroke)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+
+    result = {"symbols": len(index), "build_ms": build_time * 1000, "keystrokes": len(keystrokes),
+              "avg_ms": float(timings.mean()), "max_ms": float(timings.max())}
+    logger.info(f"search: {len(index)} symbols indexed in {result['build_ms']:.0f} ms, "
+                f"{len(keystrokes)} keystrokes avg {result['avg_ms']:.3f} ms, max {result['max_ms']:.3f} ms")
+    return result
+
+
+def bench_volume_profile(trades=200000, seed=13):
+    """
+    Measure per-trade volume profile updates and a full analysis read
+
+    Args:
+        trades: Number of trades to print
+        seed: Seed for the simulated trade prices
+
+    Returns:
+        Dictionary with timing results
+    """
+    rng = np.random.default_rng(seed)
+    prices = (180.0 * np.exp(np.cumsum(rng.normal(0, 0.0005, trades)))).tolist()
+    sizes = rng.choice([100, 200, 300, 500, 1000, 2000], trades).tolist()
+
+    profile = VolumeProfile("AAPL")
+    start = time.perf_counter()
+    for price, size in zip(prices, sizes):
+        profile.add(price, size)
+    add_time = (time.perf_counter() - start) / trades
+
+    analysis = profile.analysis(prices[-1])
+    start = time.perf_counter()
+    for _ in range(100):
+        profile.analysis(prices[-1])
+    analysis_time = (time.perf_counter() - start) / 100
+
+    bins = len(profile.histogram()[1])
+    result = {"trades": trades, "bins": bins, "add_us": add_time * 1e6, "analysis_ms": analysis_time * 1000}
+    logger.info(f"volume profile: {result['add_us']:.2f} us per trade, analysis of {bins} bins "
+                f"{result['analysis_ms']:.3f} ms (POC {analysis['poc']})")
+    return result
+
+
+def bench_order_books(levels=(10, 50, 200), ticks=2000):
+    """
+    Measure incremental L2 book updates at several book depths
+
+    Args:
+        levels: Book depths (levels per side) to compare
+        ticks: Number of simulated ticks per depth
+
+    Returns:
+        Dictionary with per-tick update times keyed by depth
+    """
+    engine = TickEngine(seed=11)
+    row = engine.rows(["AAPL"])
+    result = {}
+    for depth in levels:
+        book = OrderBook("AAPL", levels=depth)
+        book.simulate(engine.last_price("AAPL"), engine.rng)
+        book.drain_changes()
+        elapsed = 0.0
+        for _ in range(ticks):
+            engine.step(row)
+            start = time.perf_counter()
+            book.simulate(engine.last_price("AAPL"), engine.rng)
+            book.drain_changes()
+            elapsed += time.perf_counter() - start
+        result[depth] = elapsed / ticks * 1000
+    logger.info("order books: " + ", ".join(f"{depth} levels {ms:.3f} ms" for depth, ms in result.items()) +
+                " per tick")
+    return result
+
+
+def bench_recorder(num_symbols=1000, hz=5.0, ticks=200):
+    """
+    Measure the cost of recording every quote and one trade per symbol per tick
+
+    Args:
+        num_symbols: Number of symbols recorded each tick
+        hz: Tick frequency the overhead is measured against
+        ticks: Number of ticks to record
+
+    Returns:
+        Dictionary with timing results
+    """
+    engine = TickEngine(seed=5)
+    symbols = _symbols(num_symbols)
+    rows = engine.rows(symbols)
+    directory = tempfile.mkdtemp(prefix="quotestream-bench-")
+    try:
+        recorder = TickRecorder(directory, segment_records=2 * num_symbols * ticks)
+        recorder.sync_symbols(engine.symbols)
+        elapsed = 0.0
+        for _ in range(ticks):
+            engine.step(rows)
+            now = time.time()
+            trades = [(row, int(now * 1e9), 100.0, 100, 1, 0) for row in rows.tolist()]
+            start = time.perf_counter()
+            floats = engine.floats[rows]
+            ints = engine.ints[rows]
+            recorder.record_quotes(rows, (floats[:, F_TS] * 1e9).astype(np.int64),
+                                   floats[:, F_LAST], floats[:, F_BID], floats[:, F_ASK],
+                                   ints[:, I_BID_SIZE], ints[:, I_ASK_SIZE], ints[:, I_VOLUME])
+            recorder.record_trades(trades)
+            elapsed += time.perf_counter() - start
+        recorder.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    record_time = elapsed / ticks
+    result = {
+        "num_symbols": num_symbols,
+        "record_ms": record_time * 1000,
+        "overhead_pct": record_time * hz * 100
+    }
+    logger.info(f"recorder: {num_symbols} symbols, {result['record_ms']:.3f} ms per tick "
+                f"({result['overhead_pct']:.2f}% overhead at {hz:.0f} Hz)")
+    return result
+
+
+def check_recorder_reopen(sessions=(("AAPL", "MSFT"), ("TSLA", "NVDA", "AAPL")), ticks=5):
+    """
+    Record several sessions into one directory, each with its own symbol
+    order, and check that a replay labels every quote with its symbol
+
+    Args:
+        sessions: Symbols of each session, in tick engine order
+        ticks: Ticks recorded per session
+
+    Returns:
+        Dictionary with the number of quotes replayed
+
+    Raises:
+        RuntimeError: If a replayed quote comes back under another symbol
+    """
+    # Each symbol gets its own fixed price, so a mislabelled quote shows up
+    prices = {symbol: 100.0 + 10 * i for i, symbol in
+              enumerate(dict.fromkeys(symbol for session in sessions for symbol in session))}
+    directory = tempfile.mkdtemp(prefix="quotestream-bench-")
+    try:
+        ts_ns = time.time_ns()
+        for session in sessions:
+            recorder = TickRecorder(directory, segment_records=64)
+            recorder.sync_symbols(session)
+            rows = np.arange(len(session))
+            last = np.array([prices[symbol] for symbol in session])
+            for _ in range(ticks):
+                ts_ns += 1000
+                recorder.record_quotes(rows, np.full(len(rows), ts_ns), last, last, last,
+                                       np.ones(len(rows)), np.ones(len(rows)), np.ones(len(rows)))
+                recorder.record_trades([(row, ts_ns, last[row], 1, 0, 0) for row in rows.tolist()])
+            recorder.close()
+
+        replayed = 0
+        replayer = TickReplayer(directory, speed=None)
+        for quotes, trades in replayer.ticks():
+            for records in (quotes, trades):
+                for symbol_id, price in zip(records["symbol_id"].tolist(), records["price"].tolist()):
+                    symbol = replayer.symbol(symbol_id)
+                    if price != prices[symbol]:
+                        raise RuntimeError(f"Replayed {symbol} at {price}, recorded at {prices[symbol]}")
+            replayed += len(quotes)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    expected = sum(len(session) for session in sessions) * ticks
+    if replayed != expected:
+        raise RuntimeError(f"Replayed {replayed} quotes, recorded {expected}")
+    logger.info(f"recorder reopen: {len(sessions)} sessions, {replayed} quotes replayed with their symbols")
+    return {"sessions": len(sessions), "quotes": replayed}
+
+
+def bench_delta_bandwidth(num_symbols=50, ticks=100):
+    """
+    Compare bytes on the wire for full quotes vs delta-encoded quotes
+
+    Measures both per-symbol room messages and one market_batch frame per
+    tick holding every symbol.
+
+    Args:
+        num_symbols: Number of symbols a dashboard watches
+        ticks: Number of ticks to stream
+
+    Returns:
+        Dictionary with byte counts and reduction ratios
+    """
+    engine = TickEngine(seed=7)
+    symbols = _symbols(num_symbols)
+    rows = engine.rows(symbols)
+    room_encoder = DeltaEncoder()
+    batch_encoder = DeltaEncoder()
+    sizes = dict.fromkeys(("room_full", "room_delta", "batch_full", "batch_delta", "batch_msgpack"), 0)
+
+    def size(payload):
+        return len(json.dumps(payload, separators=(",", ":")))
+
+    for _ in range(ticks):
+        engine.step(rows)
+        quotes = {s: engine.quotes[s] for s in symbols}
+        deltas = {}
+        for symbol, quote in quotes.items():
+            ts = engine.timestamp_ms(symbol)
+            sizes["room_full"] += size(["quote_update", {"symbol": symbol, "quote": quote}])
+            delta = room_encoder.encode("room", symbol, quote, ts)
+            if delta is not None:
+                sizes["room_delta"] += size(["quote_delta", delta])
+            delta = batch_encoder.encode("batch", symbol, quote, ts)
+            if delta is not None:
+                # Same compaction as BatchCoalescer.frames()
+                del delta["s"]
+                del delta["t"]
+                deltas[symbol] = delta
+
+        sizes["batch_full"] += size(["market_batch", {"quotes": quotes}])
+        sizes["batch_delta"] += size(["market_batch", {"quote_deltas": deltas, "t": ts}])
+        if MSGPACK_AVAILABLE:
+            # Binary Socket.IO events add a small JSON header packet
+            sizes["batch_msgpack"] += len(pack({"quote_deltas": deltas, "t": ts}, "msgpack")) + \
+                size(["market_batch", {"_placeholder": True, "num": 0}])
+
+    result = dict(sizes)
+    result["room_ratio"] = sizes["room_full"] / sizes["room_delta"]
+    result["batch_ratio"] = sizes["batch_full"] / sizes["batch_delta"]
+    message = (f"delta quotes ({num_symbols} symbols): room messages {result['room_ratio']:.1f}x smaller, "
+               f"batch frames {result['batch_ratio']:.1f}x smaller")
+    if MSGPACK_AVAILABLE:
+        result["batch_msgpack_ratio"] = sizes["batch_full"] / sizes["batch_msgpack"]
+        message += f", batch frames as MessagePack {result['batch_msgpack_ratio']:.1f}x smaller"
+    logger.info(message)
+    return result
+
+
+def _run_shard(board_name, shard, seconds):
+    """Step every symbol of one shard back to back for ``seconds`` (benchmark worker)"""
+    board = QuoteBoard.attach(board_name)
+    worker = ShardWorker(board, shard, seed=shard)
+    worker.sync()
+    end = time.perf_counter() + seconds
+    clock = 0.0
+    while time.perf_counter() < end:
+        clock += 1.0
+        worker.step(worker.default_hz, clock)
+    del worker
+    board.close()
+
+
+def bench_shards(num_symbols=20000, shard_counts=(1, 2, 4), seconds=2.0):
+    """
+    Measure quote throughput of shard worker processes writing one quote board
+
+    Args:
+        num_symbols: Number of symbols on the board
+        shard_counts: Worker process counts to compare
+        seconds: Run time per shard count
+
+    Returns:
+        Dictionary with symbol updates per second per shard count and the
+        front process cost of reading every row
+    """
+    engine = TickEngine(seed=5)
+    engine.rows(_symbols(num_symbols))
+    result = {"symbols": num_symbols, "cpus": multiprocessing.cpu_count(), "updates_per_sec": {}}
+
+    for shards in shard_counts:
+        board = QuoteBoard.create(f"quotestream_bench_{shards}", num_symbols, shards)
+        for row, symbol in enumerate(engine.symbols):
+            board.register(symbol, engine.floats[row], engine.ints[row])
+        workers = [multiprocessing.Process(target=_run_shard, args=(board.name, shard, seconds))
+                   for shard in range(shards)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stats = board.stats()["shards"]
+        updates = sum(shard["symbols"] * shard["ticks"] for shard in stats)
+        result["updates_per_sec"][shards] = updates / seconds
+
+        # What the front process pays per board task run when every row changed
+        seen = np.zeros(board.capacity, dtype=np.uint64)
+        start = time.perf_counter()
+        changed = board.changed(seen)
+        _, floats, ints, valid = board.read(changed)
+        engine.set_state(changed[valid], floats[valid], ints[valid])
+        result["read_all_ms"] = (time.perf_counter() - start) * 1000
+        del changed, floats, ints, valid
+        board.close()
+
+    base = result["updates_per_sec"][shard_counts[0]]
+    scaling = ", ".join(f"{shards}: {rate / 1e6:.2f}M/s ({rate / base:.2f}x)"
+                        for shards, rate in result["updates_per_sec"].items())
+    logger.info(f"shards ({num_symbols} symbols, {result['cpus']} CPUs): {scaling}; "
+                f"front reads all rows in {result['read_all_ms']:.2f} ms")
+    return result
+
+
+def bench_quote_reader(num_symbols=5000, lookups=20000, seed=17):
+    """
+    Measure quote lookups from the shared-memory quote board
+
+    Args:
+        num_symbols: Number of symbols on the board
+        lookups: Number of lookups to time
+        seed: Seed for the symbols looked up
+
+    Returns:
+        Dictionary with microseconds per last-price and per quote lookup
+    """
+    engine = TickEngine(seed=seed)
+    engine.rows(_symbols(num_symbols))
+    board = QuoteBoard.create("quotestream_bench_reader", num_symbols, 0)
+    for row, symbol in enumerate(engine.symbols):
+        board.register(symbol, engine.floats[row], engine.ints[row])
+    reader = QuoteReader(board.name, api_base="http://localhost:9")
+    picks = [engine.symbols[i] for i in np.random.default_rng(seed).integers(0, num_symbols, lookups)]
+
+    start = time.perf_counter()
+    for symbol in picks:
+        reader.last_price(symbol)
+    price_us = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    for symbol in picks:
+        reader.quote(symbol)
+    quote_us = (time.perf_counter() - start) / lookups * 1e6
+
+    reader._detach()
+    board.close()
+    result = {"symbols": num_symbols, "last_price_us": price_us, "quote_us": quote_us,
+              "http_reads": reader.http_reads}
+    logger.info(f"quote reader ({num_symbols} symbols): last price {price_us:.1f} us, "
+                f"quote dict {quote_us:.1f} us per lookup")
+    return result
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="QuotestreamPY benchmarks")
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--hz", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    result = bench_ticks(args.symbols, args.hz, args.seconds)
+    bench_simulator()
+    bench_scheduler()
+    bench_option_chains()
+    bench_vol_surface()
+    bench_option_queries()
+    bench_order_books()
+    bench_search()
+    bench_volume_profile()
+    bench_recorder(hz=args.hz)
+    check_recorder_reopen()
+    bench_delta_bandwidth()
+    bench_shards()
+    bench_quote_reader()
+    return 0 if result["step_ms"] < 1000.0 / args.hz else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
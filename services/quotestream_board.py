@@ -0,0 +1,333 @@
+"""
+Quotestream Board - Shared-memory quote board for QuotestreamPY
+One fixed-width row per symbol id in a named multiprocessing.shared_memory
+segment holding the latest tick engine state. The service (or, when sharded,
+the shard worker owning the symbol) writes each row; the service and other
+local processes such as the main app read rows without a pipe or HTTP call.
+Each row carries a sequence counter (a seqlock) so readers never use a row
+that was half written
+"""
+import os
+import time
+import zlib
+import logging
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, Optional, Any, Tuple
+
+from quotestream_engine import NUM_FLOAT_FIELDS, NUM_INT_FIELDS
+
+logger = logging.getLogger("quotestream")
+
+DEFAULT_BOARD_NAME = "quotestream_board"
+DEFAULT_CAPACITY = 4096
+MAX_SHARDS = 64
+
+BOARD_MAGIC = 0x5153424F41524431  # "QSBOARD1"
+
+# Header: int64 fields, then per-shard heartbeat times and tick counts
+H_MAGIC, H_CAPACITY, H_COUNT, H_OWNER_PID, H_SHARDS = range(5)
+HEADER_FIELDS = 8
+HEADER_BYTES = HEADER_FIELDS * 8 + MAX_SHARDS * 8 * 2
+
+# Writers make ``seq`` odd while a row is being written and even once it is done
+ROW_DTYPE = np.dtype([
+    ("seq", "<u8"),
+    ("shard", "<i8"),
+    ("floats", "<f8", (NUM_FLOAT_FIELDS,)),
+    ("ints", "<i8", (NUM_INT_FIELDS,)),
+    ("symbol", "S16"),
+    ("name", "S64"),
+    ("sector", "S32"),
+])
+
+# Attempts to re-read rows that were being written during a read
+READ_RETRIES = 8
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    """
+    Get the shard that owns a symbol
+
+    Uses CRC32 rather than ``hash()`` so every process agrees on it.
+
+    Args:
+        symbol: The stock symbol
+        shards: Number of shards
+
+    Returns:
+        Shard number from 0 to ``shards - 1``
+    """
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment without letting this process's resource tracker unlink it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        segment = shared_memory.SharedMemory(name=name)
+        # The creating process and children started by multiprocessing share one
+        # tracker, which unlinks the segment once when the creator does
+        owner_pid = int(np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=segment.buf)[H_OWNER_PID])
+        if owner_pid != os.getpid() and multiprocessing.parent_process() is None:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+class QuoteBoard:
+    """
+    Named shared-memory table of the latest quote state per symbol.
+
+    The service process creates the board and is the only one to register
+    symbols: it appends the symbol with its starting state and bumps the
+    count. Board ids are assigned in registration order. On a board with
+    shards, workers attach by name, pick up the new rows of their shard
+    and from then on are the only writers of those rows; on a board with
+    no shards the service writes every row itself.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, owner: bool):
+        self.segment = segment
+        self.owner = owner
+        self.name = segment.name
+        buf = segment.buf
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self.heartbeats = np.ndarray((MAX_SHARDS,), dtype=np.float64, buffer=buf, offset=HEADER_FIELDS * 8)
+        self.ticks = np.ndarray((MAX_SHARDS,), dtype=np.int64, buffer=buf,
+                                offset=HEADER_FIELDS * 8 + MAX_SHARDS * 8)
+        self.capacity = int(self.header[H_CAPACITY])
+        self.rows = np.ndarray((self.capacity,), dtype=ROW_DTYPE, buffer=buf, offset=HEADER_BYTES)
+        self.seqs = self.rows["seq"]
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_BOARD_NAME, capacity: int = DEFAULT_CAPACITY,
+               shards: int = 1) -> "QuoteBoard":
+        """
+        Create the board, replacing a segment left behind by an earlier run
+
+        Args:
+            name: Segment name shared with the workers
+            capacity: Maximum number of symbols
+            shards: Number of shard workers that will attach; 0 if the
+                creating process writes every row
+
+        Returns:
+            The board, owned by this process
+        """
+        if not 0 <= shards <= MAX_SHARDS:
+            raise ValueError(f"Shard count must be between 0 and {MAX_SHARDS}")
+        size = HEADER_BYTES + capacity * ROW_DTYPE.itemsize
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            logger.warning(f"Replacing stale quote board {name}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=segment.buf)
+        header[:] = 0
+        header[H_CAPACITY] = capacity
+        header[H_OWNER_PID] = os.getpid()
+        header[H_SHARDS] = shards
+        header[H_MAGIC] = BOARD_MAGIC  # last, so workers never see a half-built header
+        return cls(segment, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_BOARD_NAME) -> "QuoteBoard":
+        """
+        Attach to a board created by another process
+
+        Raises:
+            FileNotFoundError: If no board of that name exists yet
+            ValueError: If the segment is not a quote board
+        """
+        segment = _attach_segment(name)
+        magic = int(np.ndarray((1,), dtype=np.int64, buffer=segment.buf)[0])
+        if magic != BOARD_MAGIC:
+            segment.close()
+            raise ValueError(f"Shared memory segment {name} is not a quote board")
+        return cls(segment, owner=False)
+
+    def __len__(self) -> int:
+        return int(self.header[H_COUNT])
+
+    @property
+    def shards(self) -> int:
+        return int(self.header[H_SHARDS])
+
+    @property
+    def owner_pid(self) -> int:
+        return int(self.header[H_OWNER_PID])
+
+    def owner_alive(self) -> bool:
+        """Check whether the process that created the board is still running"""
+        try:
+            os.kill(self.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def register(self, symbol: str, floats: np.ndarray, ints: np.ndarray,
+                 name: str = "", sector: str = "") -> int:
+        """
+        Append a symbol with its starting state (owner only)
+
+        Args:
+            symbol: The stock symbol
+            floats: Tick engine float row
+            ints: Tick engine int row
+            name: Company name shown in quotes
+            sector: Sector name, which also picks the symbol's simulator factor
+
+        Returns:
+            Board id of the symbol
+        """
+        board_id = len(self)
+        if board_id >= self.capacity:
+            raise OverflowError(f"Quote board {self.name} is full ({self.capacity} symbols)")
+        row = self.rows[board_id:board_id + 1]
+        row["shard"] = shard_of(symbol, self.shards) if self.shards else -1
+        row["floats"] = floats
+        row["ints"] = ints
+        row["symbol"] = symbol.encode()
+        row["name"] = name.encode()[:64]
+        row["sector"] = sector.encode()[:32]
+        row["seq"] = 2
+        self.header[H_COUNT] = board_id + 1  # publish the row after it is complete
+        return board_id
+
+    def symbol(self, board_id: int) -> str:
+        return self.rows["symbol"][board_id].decode()
+
+    def name_of(self, board_id: int) -> str:
+        return self.rows["name"][board_id].decode(errors="ignore")
+
+    def sector(self, board_id: int) -> str:
+        return self.rows["sector"][board_id].decode(errors="ignore")
+
+    def symbol_ids(self, start: int = 0) -> Dict[str, int]:
+        """Get the board id of every symbol registered from ``start`` on"""
+        symbols = self.rows["symbol"][start:len(self)].tolist()
+        return {symbol.decode(): start + i for i, symbol in enumerate(symbols)}
+
+    def shard_ids(self, shard: int, start: int = 0) -> np.ndarray:
+        """Get the board ids from ``start`` on that belong to a shard"""
+        return start + np.flatnonzero(self.rows["shard"][start:len(self)] == shard)
+
+    def write(self, ids: np.ndarray, floats: np.ndarray, ints: np.ndarray):
+        """
+        Write new state for some rows (the shard that owns them only)
+
+        Args:
+            ids: Board ids
+            floats: Tick engine float rows, one per id
+            ints: Tick engine int rows, one per id
+        """
+        seqs = self.seqs
+        seqs[ids] += 1
+        self.rows["floats"][ids] = floats
+        self.rows["ints"][ids] = ints
+        seqs[ids] += 1
+
+    def read(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Read a consistent copy of some rows
+
+        Rows a writer was in the middle of are read again; a row still
+        being written after READ_RETRIES attempts is marked invalid.
+
+        Args:
+            ids: Board ids
+
+        Returns:
+            (sequence numbers, float rows, int rows, valid mask)
+        """
+        rows = self.rows
+        seqs = self.seqs
+        before = seqs[ids]
+        floats = rows["floats"][ids]
+        ints = rows["ints"][ids]
+        valid = (before == seqs[ids]) & (before % 2 == 0)
+        for _ in range(READ_RETRIES):
+            if valid.all():
+                break
+            retry = np.flatnonzero(~valid)
+            again = ids[retry]
+            before[retry] = seqs[again]
+            floats[retry] = rows["floats"][again]
+            ints[retry] = rows["ints"][again]
+            valid[retry] = (before[retry] == seqs[again]) & (before[retry] % 2 == 0)
+        return before, floats, ints, valid
+
+    def read_row(self, board_id: int) -> Optional[Tuple[List[float], List[int]]]:
+        """
+        Read a consistent copy of one row
+
+        Args:
+            board_id: Board id
+
+        Returns:
+            (float row, int row) as lists, or None if the row kept changing
+        """
+        seqs = self.seqs
+        row = self.rows[board_id]
+        for _ in range(READ_RETRIES):
+            before = seqs[board_id]
+            floats = row["floats"].tolist()
+            ints = row["ints"].tolist()
+            if not before & 1 and seqs[board_id] == before:
+                return floats, ints
+        return None
+
+    def changed(self, seen: np.ndarray) -> np.ndarray:
+        """
+        Find rows written since they were last read
+
+        Args:
+            seen: Sequence number per board id as of the last read
+
+        Returns:
+            Board ids whose sequence number moved on
+        """
+        count = min(len(self), len(seen))
+        return np.flatnonzero(self.seqs[:count] != seen[:count])
+
+    def heartbeat(self, shard: int, ticks: int = 1):
+        """Record that a shard is alive and wrote ``ticks`` more times"""
+        self.heartbeats[shard] = time.time()
+        self.ticks[shard] += ticks
+
+    def stats(self) -> Dict[str, Any]:
+        """Get board and per-shard counters for status endpoints"""
+        now = time.time()
+        shards = []
+        for shard in range(self.shards):
+            beat = float(self.heartbeats[shard])
+            shards.append({
+                "shard": shard,
+                "symbols": int(np.count_nonzero(self.rows["shard"][:len(self)] == shard)),
+                "ticks": int(self.ticks[shard]),
+                "heartbeat_age": round(now - beat, 3) if beat else None
+            })
+        return {
+            "name": self.name,
+            "capacity": self.capacity,
+            "symbols": len(self),
+            "shards": shards
+        }
+
+    def close(self):
+        """Detach from the board, removing it if this process created it"""
+        if self.owner:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+        self.header = self.heartbeats = self.ticks = self.rows = self.seqs = None
+        self.segment.close()
@@ -0,0 +1,302 @@
+"""
+Quotestream Order Book - Incremental L2 books for QuotestreamPY
+Each symbol keeps a persistent book of price-indexed size arrays that is
+changed by add/modify/delete level events, so a tick only touches the
+levels that moved instead of rebuilding and re-sorting the whole depth
+
+L2 delta format (depth_delta messages and batch "depth_deltas"):
+    {"s": symbol, "f": first_seq, "n": seq, "t": epoch_ms,
+     "b": [[price, size, exchange], ...], "a": [[price, size, exchange], ...]}
+
+``size`` is the new absolute size at ``price``; 0 removes the level. Because
+sizes are absolute, replaying a change twice is harmless: a client holding
+a snapshot at ``seq`` can apply any delta with ``f <= seq + 1`` and must
+resync when ``f`` is beyond that.
+"""
+import time
+import logging
+import datetime
+import threading
+import numpy as np
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger("quotestream")
+
+EXCHANGES = ("NSDQ", "NYSE", "ARCA", "BATS")
+
+BID = "b"
+ASK = "a"
+
+DEFAULT_LEVELS = 50
+DEFAULT_TICK_SIZE = 0.01
+DEFAULT_SPAN = 1024  # price slots held per side of the index
+
+
+class OrderBook:
+    """
+    Level-2 book for one symbol.
+
+    Sizes, exchanges and update times live in arrays indexed by price tick
+    relative to ``origin``, so finding, changing or removing a level is a
+    single array write. The array window is re-centred when the market
+    drifts towards its edge.
+    """
+
+    def __init__(self, symbol: str, levels: int = DEFAULT_LEVELS,
+                 tick_size: float = DEFAULT_TICK_SIZE, span: int = DEFAULT_SPAN):
+        """
+        Initialize an empty book
+
+        Args:
+            symbol: The stock symbol
+            levels: Number of price levels kept on each side
+            tick_size: Minimum price increment
+            span: Number of price slots in the index window
+        """
+        self.symbol = symbol
+        self.levels = levels
+        self.tick_size = tick_size
+        self.span = span
+        self.origin: Optional[int] = None  # price tick of slot 0
+        self.seq = 0
+        self.version = 0
+        self._lock = threading.Lock()
+        self._sizes = {BID: np.zeros(span, dtype=np.int64), ASK: np.zeros(span, dtype=np.int64)}
+        self._exchanges = {BID: np.zeros(span, dtype=np.uint8), ASK: np.zeros(span, dtype=np.uint8)}
+        self._times = {BID: np.zeros(span), ASK: np.zeros(span)}
+        self._counts = {BID: 0, ASK: 0}
+        # (side, price tick) -> new size, since the last drain
+        self._changes: Dict[tuple, int] = {}
+        self._first_seq = 1
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_version = -1
+        self._updated = 0.0
+
+    # Level events
+
+    def add(self, side: str, price: float, size: int, exchange: str = "NSDQ", now: Optional[float] = None):
+        """Add a price level (or replace the size of an existing one)"""
+        with self._lock:
+            self._set(side, self._tick(price), size, EXCHANGES.index(exchange), now)
+
+    def modify(self, side: str, price: float, size: int, now: Optional[float] = None):
+        """Change the size of an existing price level"""
+        with self._lock:
+            tick = self._tick(price)
+            slot = self._slot(tick)
+            if slot is None or not self._sizes[side][slot]:
+                return
+            self._set(side, tick, size, int(self._exchanges[side][slot]), now)
+
+    def delete(self, side: str, price: float, now: Optional[float] = None):
+        """Remove a price level"""
+        with self._lock:
+            self._set(side, self._tick(price), 0, 0, now)
+
+    def _tick(self, price: float) -> int:
+        return int(round(price / self.tick_size))
+
+    def _slot(self, tick: int) -> Optional[int]:
+        if self.origin is None:
+            return None
+        slot = tick - self.origin
+        return slot if 0 <= slot < self.span else None
+
+    def _set(self, side: str, tick: int, size: int, exchange: int, now: Optional[float]):
+        """Write one level; the caller holds the lock"""
+        if self.origin is None:
+            self.origin = tick - self.span // 2
+        slot = self._slot(tick)
+        if slot is None:
+            self._recenter(tick)
+            slot = tick - self.origin
+        sizes = self._sizes[side]
+        old = int(sizes[slot])
+        if old == size:
+            return
+        sizes[slot] = size
+        self._exchanges[side][slot] = exchange
+        self._times[side][slot] = now = time.time() if now is None else now
+        self._counts[side] += (size > 0) - (old > 0)
+        self._changes[(side, tick)] = size
+        self._updated = now
+        self.version += 1
+
+    def _recenter(self, tick: int):
+        """Slide the index window so ``tick`` sits in its middle"""
+        shift = (tick - self.span // 2) - self.origin
+        # Levels that fall out of the window are deleted like any other level
+        for side, sizes in self._sizes.items():
+            if abs(shift) >= self.span:
+                dropped = np.flatnonzero(sizes)
+            elif shift > 0:
+                dropped = np.flatnonzero(sizes[:shift])
+            else:
+                dropped = np.flatnonzero(sizes[self.span + shift:]) + self.span + shift
+            for slot in dropped.tolist():
+                self._changes[(side, self.origin + slot)] = 0
+        for arrays in (self._sizes, self._exchanges, self._times):
+            for side, values in arrays.items():
+                moved = np.zeros_like(values)
+                if abs(shift) < self.span:
+                    if shift > 0:
+                        moved[:self.span - shift] = values[shift:]
+                    else:
+                        moved[-shift:] = values[:self.span + shift]
+                arrays[side] = moved
+        self.origin += shift
+        for side in (BID, ASK):
+            self._counts[side] = int(np.count_nonzero(self._sizes[side]))
+
+    # Reads
+
+    def _occupied(self, side: str) -> np.ndarray:
+        """Occupied slots for a side, best level first"""
+        slots = np.flatnonzero(self._sizes[side])
+        return slots[::-1] if side == BID else slots
+
+    def best(self, side: str) -> Optional[float]:
+        """Get the best bid or ask price"""
+        with self._lock:
+            slots = self._occupied(side)
+            if not len(slots):
+                return None
+            return round((self.origin + int(slots[0])) * self.tick_size, 2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the book as a market depth dictionary
+
+        The result is cached until the next level event, so repeated
+        /api/depth reads between ticks cost nothing and take no lock.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and self._snapshot_version == self.version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and self._snapshot_version == self.version:
+                return self._snapshot
+            sides = {}
+            for side in (BID, ASK):
+                slots = self._occupied(side)[:self.levels]
+                prices = np.round((self.origin + slots) * self.tick_size, 2).tolist() if len(slots) else []
+                sizes = self._sizes[side][slots].tolist()
+                exchanges = self._exchanges[side][slots].tolist()
+                times = self._times[side][slots].tolist()
+                sides[side] = [{
+                    "price": prices[i],
+                    "size": sizes[i],
+                    "exchange": EXCHANGES[exchanges[i]],
+                    "timestamp": _isoformat(times[i])
+                } for i in range(len(slots))]
+            self._snapshot = {
+                "symbol": self.symbol,
+                "bids": sides[BID],
+                "asks": sides[ASK],
+                "seq": self.seq,
+                "timestamp": _isoformat(self._updated or time.time())
+            }
+            self._snapshot_version = self.version
+            return self._snapshot
+
+    def drain_changes(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the level changes made since the last call as one L2 delta
+
+        Returns:
+            Delta message, or None if no level changed
+        """
+        with self._lock:
+            if not self._changes:
+                return None
+            self.seq += 1
+            delta = {"s": self.symbol, "f": self._first_seq, "n": self.seq,
+                     "t": int(self._updated * 1000), BID: [], ASK: []}
+            for (side, tick), size in self._changes.items():
+                slot = self._slot(tick)
+                exchange = int(self._exchanges[side][slot]) if size and slot is not None else 0
+                delta[side].append([round(tick * self.tick_size, 2), size, EXCHANGES[exchange]])
+            self._changes = {}
+            self._first_seq = self.seq + 1
+            # The cached snapshot must carry the new sequence number
+            self.version += 1
+            return delta
+
+    # Simulation
+
+    def simulate(self, last_price: float, rng: np.random.Generator, now: Optional[float] = None):
+        """
+        Apply one tick of random level events around ``last_price``
+
+        Levels the price has moved through are deleted, a few sizes change,
+        and the book is topped back up to ``levels`` on each side.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            mid = self._tick(last_price)
+            if self.origin is None:
+                self.origin = mid - self.span // 2
+            elif not self.span // 4 <= mid - self.origin < 3 * self.span // 4:
+                self._recenter(mid)
+            m = mid - self.origin
+
+            # One draw per tick; geometric picks favour levels near the top
+            uniforms = rng.random(8)
+            picks = (np.log(uniforms[:6]) / np.log(0.7)).astype(np.intp)
+
+            for s, (side, direction) in enumerate(((BID, -1), (ASK, 1))):
+                slots = self._occupied(side)
+                draws = uniforms[s * 3:s * 3 + 3].tolist() + [uniforms[6 + s]]
+
+                # Remove levels that would cross the last price
+                crossed = slots >= m if side == BID else slots <= m
+                if crossed.any():
+                    for slot in slots[crossed].tolist():
+                        self._set(side, self.origin + slot, 0, 0, now)
+                    slots = slots[~crossed]
+
+                # Resize or pull a few resting levels, mostly near the top
+                if len(slots):
+                    sizes = self._sizes[side]
+                    chosen = slots[np.minimum(picks[s * 3:s * 3 + 3], len(slots) - 1)]
+                    for i, slot in enumerate(set(chosen.tolist())):
+                        size = 0 if draws[i] < 0.1 else max(100, int(sizes[slot] * (0.7 + 0.6 * draws[i])))
+                        self._set(side, self.origin + slot, size, int(self._exchanges[side][slot]), now)
+
+                # Keep the inside close to the last price
+                if not len(slots) or abs(int(slots[0]) - m) > 5:
+                    inside = m + direction * (1 + int(draws[3] * 5))
+                    self._set(side, self.origin + inside, int(100 + draws[3] * 4900),
+                              int(draws[3] * len(EXCHANGES)), now)
+
+                need = self.levels - self._counts[side]
+                if need > 0:
+                    # Refill the emptiest-first gaps of a fresh 1-5 tick ladder out from the inside
+                    gaps, sizes, exchanges = rng.random((3, self.levels))
+                    ladder = m + direction * np.cumsum(1 + (gaps * 5).astype(np.intp))
+                    keep = (ladder >= 0) & (ladder < self.span)
+                    keep[keep] = self._sizes[side][ladder[keep]] == 0
+                    keep &= np.cumsum(keep) <= need
+                    self._fill(side, ladder[keep], (100 + sizes[keep] * 4900).astype(np.int64),
+                               (exchanges[keep] * len(EXCHANGES)).astype(np.uint8), now)
+                elif need < 0:
+                    # Trim levels beyond the configured depth
+                    for slot in self._occupied(side)[need:].tolist():
+                        self._set(side, self.origin + slot, 0, 0, now)
+
+    def _fill(self, side: str, slots: np.ndarray, sizes: np.ndarray, exchanges: np.ndarray, now: float):
+        """Add levels at distinct empty slots; the caller holds the lock"""
+        if not len(slots):
+            return
+        self._sizes[side][slots] = sizes
+        self._exchanges[side][slots] = exchanges
+        self._times[side][slots] = now
+        self._counts[side] += len(slots)
+        for slot, size in zip(slots.tolist(), sizes.tolist()):
+            self._changes[(side, self.origin + slot)] = size
+        self._updated = now
+        self.version += 1
+
+
+def _isoformat(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts).isoformat()
@@ -0,0 +1,157 @@
+"""
+Quotestream Delta Encoding - Compact quote updates for QuotestreamPY
+Tracks the last quote sent to each room and emits only the fields that
+changed, keyed by short field codes with integer epoch-ms timestamps
+
+Wire format (JSON or MessagePack):
+    quote_snapshot / quote_delta: {"s": symbol, "n": seq, "t": epoch_ms, "d": {code: value}}
+
+A snapshot carries every field; a delta only the changed ones. Prices are
+integer cents, which keeps them to a few bytes in MessagePack, and bid/ask
+are sent as cent offsets below/above ``last``. ``n`` grows by
+one per message for a (room, symbol), so a client that sees a gap sends
+``resync`` and waits for a fresh snapshot. ``change`` and ``change_percent``
+are never sent because clients derive them from ``last`` and ``prev_close``.
+"""
+import logging
+import threading
+from typing import Dict, Optional, Any, Tuple, Iterable
+
+# MessagePack is optional; without it clients fall back to JSON payloads
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger("quotestream")
+
+# Quote field -> wire code
+FIELD_CODES = {
+    "last": "l",
+    "bid": "b",
+    "ask": "a",
+    "bid_size": "bs",
+    "ask_size": "as",
+    "volume": "v",
+    "open": "o",
+    "high": "h",
+    "low": "lo",
+    "prev_close": "pc",
+    "vwap": "vw",
+    "description": "ds",
+    "sector": "sc"
+}
+
+# Fields sent as integer cents (bid/ask as offsets from last)
+PRICE_CODES = frozenset(("l", "b", "a", "o", "h", "lo", "pc", "vw"))
+
+# Fields the client computes itself from the transmitted ones
+DERIVED_FIELDS = ("change", "change_percent")
+
+
+def pack(payload: Dict[str, Any], encoding: str = "json"):
+    """
+    Serialize a payload for the requested client encoding
+
+    Returns the payload unchanged for JSON (Socket.IO encodes it) and
+    MessagePack bytes when msgpack is requested and installed.
+    """
+    if encoding == "msgpack" and MSGPACK_AVAILABLE:
+        return msgpack.packb(payload, use_bin_type=True)
+    return payload
+
+
+class DeltaEncoder:
+    """
+    Per-room, per-symbol record of the last quote fields sent.
+
+    Rooms are opaque keys: a shared symbol room (every member sees the same
+    stream) or the room of the quote deltas in market_batch frames.
+    """
+
+    def __init__(self):
+        """Initialize empty encoder state"""
+        self._lock = threading.Lock()
+        # room -> symbol -> (seq, {code: value})
+        self._state: Dict[str, Dict[str, Tuple[int, Dict[str, Any]]]] = {}
+
+    @staticmethod
+    def _fields(quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a quote dict to its wire codes, with prices in integer cents"""
+        fields = {}
+        for field, code in FIELD_CODES.items():
+            if field in quote:
+                value = quote[field]
+                fields[code] = int(round(value * 100)) if code in PRICE_CODES else value
+        if "l" in fields:
+            if "b" in fields:
+                fields["b"] = fields["l"] - fields["b"]
+            if "a" in fields:
+                fields["a"] = fields["a"] - fields["l"]
+        return fields
+
+    def encode(self, room: str, symbol: str, quote: Dict[str, Any],
+               timestamp_ms: int) -> Optional[Dict[str, Any]]:
+        """
+        Encode a quote against the room's last-sent state
+
+        Args:
+            room: Room or session the message is sent to
+            symbol: The stock symbol
+            quote: Current quote dictionary
+            timestamp_ms: Quote timestamp in epoch milliseconds
+
+        Returns:
+            Delta message, a full message if the room had no state yet, or
+            None if nothing changed
+        """
+        fields = self._fields(quote)
+        with self._lock:
+            symbols = self._state.setdefault(room, {})
+            previous = symbols.get(symbol)
+            if previous is None:
+                symbols[symbol] = (0, fields)
+                return {"s": symbol, "n": 0, "t": timestamp_ms, "d": fields}
+
+            seq, sent = previous
+            changed = {code: value for code, value in fields.items() if sent.get(code) != value}
+            if not changed:
+                return None
+            seq += 1
+            symbols[symbol] = (seq, fields)
+        return {"s": symbol, "n": seq, "t": timestamp_ms, "d": changed}
+
+    def snapshot(self, room: str, symbol: str, quote: Dict[str, Any],
+                 timestamp_ms: int) -> Dict[str, Any]:
+        """
+        Full-state message consistent with the room's delta stream
+
+        For a room that already has state this returns the last-sent fields
+        (not the live quote) so later deltas apply cleanly for every member.
+        """
+        with self._lock:
+            symbols = self._state.setdefault(room, {})
+            previous = symbols.get(symbol)
+            if previous is None:
+                previous = symbols[symbol] = (0, self._fields(quote))
+            seq, sent = previous
+        return {"s": symbol, "n": seq, "t": timestamp_ms, "d": dict(sent)}
+
+    def forget(self, room: str, symbols: Optional[Iterable[str]] = None):
+        """Drop the state for a room, or for some of its symbols"""
+        with self._lock:
+            if symbols is None:
+                self._state.pop(room, None)
+                return
+            state = self._state.get(room)
+            if state is None:
+                return
+            for symbol in symbols:
+                state.pop(symbol, None)
+            if not state:
+                del self._state[room]
+
+    def rooms(self) -> int:
+        """Get the number of rooms with delta state"""
+        return len(self._state)
@@ -0,0 +1,442 @@
+"""
+Quotestream Tick Engine - Vectorized quote simulation for QuotestreamPY
+Keeps per-symbol price, spread and volume state in NumPy arrays and advances
+the whole watchlist in a single step instead of one Python call per symbol;
+prices follow the seeded processes of a MarketSimulator
+"""
+import time
+import logging
+import datetime
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Any, Iterable
+
+from quotestream_simulator import MarketSimulator, ProcessParams
+
+logger = logging.getLogger("quotestream")
+
+# Column layout of the float state array
+(F_BASE, F_LAST, F_BID, F_ASK, F_OPEN, F_HIGH, F_LOW, F_PREV_CLOSE,
+ F_CHANGE, F_CHANGE_PCT, F_VWAP, F_PV, F_TS) = range(13)
+NUM_FLOAT_FIELDS = 13
+
+# Column layout of the integer state array
+I_BID_SIZE, I_ASK_SIZE, I_VOLUME = range(3)
+NUM_INT_FIELDS = 3
+
+
+class TickEngine:
+    """
+    Batch quote generator for the whole watchlist.
+
+    Every registered symbol owns one row in the float and int state arrays
+    (and the same row in the simulator). ``step()`` advances any subset of
+    rows with a handful of vectorized operations; quote dictionaries are
+    only built when ``quote()`` is called.
+    """
+
+    def __init__(self, stock_info: Optional[Dict[str, Dict[str, str]]] = None,
+                 base_prices: Optional[Dict[str, float]] = None,
+                 seed: Optional[int] = None, capacity: int = 64, process: str = "jump",
+                 params: Optional[Dict[str, ProcessParams]] = None):
+        """
+        Initialize the tick engine
+
+        Args:
+            stock_info: Optional mapping of symbol to {"name", "sector"} metadata
+            base_prices: Optional mapping of symbol to starting price
+            seed: Optional seed; the same seed replays the same prices
+            capacity: Initial number of rows to allocate
+            process: Default price process ("gbm", "jump" or "regime")
+            params: Optional mapping of symbol to its price process parameters
+        """
+        self.stock_info = stock_info or {}
+        self.base_prices = base_prices or {}
+        self.params = params or {}
+        # Independent streams for quote noise and for prices
+        quote_seed, price_seed = np.random.SeedSequence(seed).spawn(2)
+        self.rng = np.random.default_rng(quote_seed)
+        self.simulator = MarketSimulator(process=process, capacity=capacity,
+                                         rng=np.random.default_rng(price_seed))
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.floats = np.zeros((capacity, NUM_FLOAT_FIELDS), dtype=np.float64)
+        self.ints = np.zeros((capacity, NUM_INT_FIELDS), dtype=np.int64)
+        self.version = 0
+        self.quotes = QuoteView(self)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def _grow(self, needed: int):
+        """Double the state arrays until they can hold ``needed`` rows"""
+        capacity = len(self.floats)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == len(self.floats):
+            return
+        floats = np.zeros((capacity, NUM_FLOAT_FIELDS), dtype=np.float64)
+        ints = np.zeros((capacity, NUM_INT_FIELDS), dtype=np.int64)
+        floats[:len(self.floats)] = self.floats
+        ints[:len(self.ints)] = self.ints
+        self.floats = floats
+        self.ints = ints
+
+    def add_symbol(self, symbol: str, base_price: Optional[float] = None) -> int:
+        """
+        Register a symbol and seed its session state
+
+        Args:
+            symbol: The stock symbol
+            base_price: Starting price; falls back to ``base_prices`` and then
+                a random price
+
+        Returns:
+            Row index of the symbol
+        """
+        if symbol in self.index:
+            return self.index[symbol]
+
+        row = len(self.symbols)
+        self._grow(row + 1)
+
+        rng = self.rng
+        if base_price is None:
+            base_price = self.base_prices.get(symbol)
+        if base_price is None:
+            base_price = rng.uniform(10, 500)
+        prev_close = base_price * (1.0 + rng.uniform(-0.02, 0.02))
+        spread = base_price * rng.uniform(0.0005, 0.002)
+        volume = int(rng.uniform(10000, 10000000))
+
+        f = self.floats[row]
+        f[F_BASE] = base_price
+        f[F_LAST] = base_price
+        f[F_BID] = base_price - spread / 2
+        f[F_ASK] = base_price + spread / 2
+        f[F_OPEN] = prev_close * (1.0 + rng.uniform(-0.01, 0.01))
+        f[F_HIGH] = max(base_price, f[F_OPEN]) * (1.0 + rng.uniform(0.001, 0.02))
+        f[F_LOW] = min(base_price, f[F_OPEN]) * (1.0 - rng.uniform(0.001, 0.02))
+        f[F_PREV_CLOSE] = prev_close
+        f[F_CHANGE] = base_price - prev_close
+        f[F_CHANGE_PCT] = (base_price - prev_close) / prev_close * 100.0
+        f[F_VWAP] = base_price * (1.0 + rng.uniform(-0.005, 0.005))
+        f[F_PV] = f[F_VWAP] * volume
+        f[F_TS] = time.time()
+
+        i = self.ints[row]
+        i[I_BID_SIZE] = rng.integers(100, 2000)
+        i[I_ASK_SIZE] = rng.integers(100, 2000)
+        i[I_VOLUME] = volume
+
+        sector = self.stock_info.get(symbol, {}).get("sector", "")
+        self.simulator.add_symbol(sector, self.params.get(symbol))
+
+        self.symbols.append(symbol)
+        self.index[symbol] = row
+        self.version += 1
+        return row
+
+    def rows(self, symbols: Iterable[str]) -> np.ndarray:
+        """
+        Map symbols to row indices, registering unknown symbols
+
+        Args:
+            symbols: Symbols to look up
+
+        Returns:
+            Integer array of row indices
+        """
+        index = self.index
+        rows = [index[s] if s in index else self.add_symbol(s) for s in symbols]
+        return np.fromiter(rows, dtype=np.intp, count=len(rows))
+
+    @property
+    def market_trend(self) -> float:
+        """Get the simulated market trend from -1.0 (bearish) to 1.0 (bullish)"""
+        return self.simulator.market_trend
+
+    def step(self, rows: Optional[np.ndarray] = None, dt: float = 1.0,
+             now: Optional[float] = None):
+        """
+        Advance the simulation one tick for the given rows
+
+        Args:
+            rows: Row indices to advance; all symbols if omitted
+            dt: Simulated seconds since the previous tick. Rows left out of
+                earlier ticks catch up over the whole time they missed
+            now: Tick timestamp in epoch seconds; defaults to the current time
+        """
+        self.simulator.advance(dt)
+        n_total = len(self.symbols)
+        if n_total == 0:
+            return
+        if rows is None:
+            rows = slice(0, n_total)
+            n = n_total
+        else:
+            n = len(rows)
+            if n == 0:
+                return
+
+        rng = self.rng
+        f = self.floats[rows]
+        i = self.ints[rows]
+
+        log_return = self.simulator.returns(np.arange(n) if isinstance(rows, slice) else rows)
+        new_price = f[:, F_LAST] * np.exp(log_return)
+
+        spread = new_price * rng.uniform(0.0005, 0.002, n)
+        f[:, F_LAST] = new_price
+        f[:, F_BID] = new_price - spread / 2
+        f[:, F_ASK] = new_price + spread / 2
+        np.maximum(f[:, F_HIGH], new_price, out=f[:, F_HIGH])
+        np.minimum(f[:, F_LOW], new_price, out=f[:, F_LOW])
+
+        prev_close = f[:, F_PREV_CLOSE]
+        f[:, F_CHANGE] = new_price - prev_close
+        f[:, F_CHANGE_PCT] = f[:, F_CHANGE] / prev_close * 100.0
+
+        # Session volume and VWAP accumulate the volume printed this tick
+        tick_volume = rng.integers(100, 5000, n)
+        i[:, I_BID_SIZE] = rng.integers(100, 2000, n)
+        i[:, I_ASK_SIZE] = rng.integers(100, 2000, n)
+        i[:, I_VOLUME] += tick_volume
+        f[:, F_PV] += new_price * tick_volume
+        f[:, F_VWAP] = f[:, F_PV] / i[:, I_VOLUME]
+
+        f[:, F_TS] = time.time() if now is None else now
+
+        # Fancy indexing returns copies, so write them back
+        if not isinstance(rows, slice):
+            self.floats[rows] = f
+            self.ints[rows] = i
+        self.version += 1
+
+    def apply(self, rows: np.ndarray, last: np.ndarray, bid: np.ndarray, ask: np.ndarray,
+              bid_size: np.ndarray, ask_size: np.ndarray, volume: np.ndarray, ts: np.ndarray):
+        """
+        Set externally supplied quote state (e.g. a replay) for the given rows
+
+        High, low, change and VWAP are derived the same way ``step()``
+        derives them; VWAP accumulates the volume added since the last update.
+
+        Args:
+            rows: Row indices to update
+            last, bid, ask: Prices per row
+            bid_size, ask_size: Sizes per row
+            volume: Cumulative session volume per row
+            ts: Timestamps in epoch seconds per row
+        """
+        if len(rows) == 0:
+            return
+        f = self.floats[rows]
+        i = self.ints[rows]
+
+        f[:, F_BASE] = last
+        f[:, F_LAST] = last
+        f[:, F_BID] = bid
+        f[:, F_ASK] = ask
+        np.maximum(f[:, F_HIGH], last, out=f[:, F_HIGH])
+        np.minimum(f[:, F_LOW], last, out=f[:, F_LOW])
+
+        prev_close = f[:, F_PREV_CLOSE]
+        f[:, F_CHANGE] = last - prev_close
+        f[:, F_CHANGE_PCT] = f[:, F_CHANGE] / prev_close * 100.0
+
+        tick_volume = np.maximum(volume - i[:, I_VOLUME], 0)
+        i[:, I_BID_SIZE] = bid_size
+        i[:, I_ASK_SIZE] = ask_size
+        i[:, I_VOLUME] = volume
+        f[:, F_PV] += last * tick_volume
+        f[:, F_VWAP] = np.where(volume > 0, f[:, F_PV] / np.maximum(volume, 1), last)
+        f[:, F_TS] = ts
+
+        self.floats[rows] = f
+        self.ints[rows] = i
+        self.version += 1
+
+    def set_state(self, rows: np.ndarray, floats: np.ndarray, ints: np.ndarray):
+        """
+        Overwrite whole state rows with state simulated elsewhere (e.g. a shard worker)
+
+        Args:
+            rows: Row indices to update
+            floats: Float state rows, one per row index
+            ints: Int state rows, one per row index
+        """
+        if len(rows) == 0:
+            return
+        self.floats[rows] = floats
+        self.ints[rows] = ints
+        self.version += 1
+
+    def last_price(self, symbol: str) -> float:
+        """Get the last simulated price for a symbol, registering it if needed"""
+        row = self.index.get(symbol)
+        if row is None:
+            row = self.add_symbol(symbol)
+        return float(self.floats[row, F_LAST])
+
+    def volatility(self, symbol: str) -> float:
+        """Get the annualized volatility of a symbol's simulated price process, registering it if needed"""
+        row = self.index.get(symbol)
+        if row is None:
+            row = self.add_symbol(symbol)
+        return self.simulator.volatility(row)
+
+    def timestamp_ms(self, symbol: str) -> int:
+        """Get the epoch-millisecond timestamp of a symbol's latest tick"""
+        return int(self.floats[self.index[symbol], F_TS] * 1000)
+
+    def quote(self, symbol: str) -> Dict[str, Any]:
+        """
+        Build the quote dictionary for a symbol
+
+        Args:
+            symbol: The stock symbol
+
+        Returns:
+            Quote dictionary in the QuotestreamPY wire format
+        """
+        row = self.index.get(symbol)
+        if row is None:
+            row = self.add_symbol(symbol)
+        return build_quote(symbol, self.stock_info.get(symbol, {}),
+                           self.floats[row].tolist(), self.ints[row].tolist())
+
+    def frame(self) -> 'QuoteFrame':
+        """Get a frozen copy of every symbol's state whose quote dicts are built on first read"""
+        n = len(self.symbols)
+        return QuoteFrame(self.index, n, self.stock_info, self.floats[:n].copy(), self.ints[:n].copy())
+
+
+def build_quote(symbol: str, info: Dict[str, str], floats: List[float], ints: List[int]) -> Dict[str, Any]:
+    """
+    Build a quote dictionary from one row of tick engine state
+
+    Args:
+        symbol: The stock symbol
+        info: Symbol metadata with optional "name" and "sector"
+        floats: Float state row as a list
+        ints: Int state row as a list
+
+    Returns:
+        Quote dictionary in the QuotestreamPY wire format
+    """
+    (_, last, bid, ask, open_, high, low, prev_close, change,
+     change_pct, vwap, _, ts) = floats
+    bid_size, ask_size, volume = ints
+
+    return {
+        "symbol": symbol,
+        "description": info.get("name", f"{symbol} Stock"),
+        "last": round(last, 2),
+        "bid": round(bid, 2),
+        "ask": round(ask, 2),
+        "bid_size": bid_size,
+        "ask_size": ask_size,
+        "volume": volume,
+        "open": round(open_, 2),
+        "high": round(high, 2),
+        "low": round(low, 2),
+        "prev_close": round(prev_close, 2),
+        "change": round(change, 2),
+        "change_percent": round(change_pct, 2),
+        "sector": info.get("sector", "Unknown"),
+        "vwap": round(vwap, 2),
+        "timestamp": _isoformat(ts)
+    }
+
+
+class QuoteView(Mapping):
+    """
+    Read-only mapping of symbol to quote dict backed by a TickEngine.
+
+    Quote dicts are built on first access and reused until the engine
+    advances, so repeated reads within one tick cost a dict lookup.
+    """
+
+    def __init__(self, engine: TickEngine):
+        self.engine = engine
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._cache_version = -1
+
+    def __getitem__(self, symbol: str) -> Dict[str, Any]:
+        engine = self.engine
+        if symbol not in engine.index:
+            raise KeyError(symbol)
+        if self._cache_version != engine.version:
+            self._cache = {}
+            self._cache_version = engine.version
+        quote = self._cache.get(symbol)
+        if quote is None:
+            quote = self._cache[symbol] = engine.quote(symbol)
+        return quote
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.engine.index
+
+    def __iter__(self):
+        return iter(list(self.engine.symbols))
+
+    def __len__(self) -> int:
+        return len(self.engine.symbols)
+
+
+class QuoteFrame(Mapping):
+    """
+    Read-only mapping of symbol to quote dict over a copy of TickEngine state.
+
+    Taking one copies the engine's state arrays, which costs far less than
+    building a quote dict per symbol; dicts are built on first access and
+    then kept, so a published snapshot only pays for the quotes read from it.
+    """
+
+    def __init__(self, index: Dict[str, int], size: int, stock_info: Dict[str, Dict[str, str]],
+                 floats: np.ndarray, ints: np.ndarray):
+        # The engine's index only grows, so rows below ``size`` keep their symbols
+        self._index = index
+        self._size = size
+        self._stock_info = stock_info
+        self._floats = floats
+        self._ints = ints
+        self._cache: Dict[str, Dict[str, Any]] = {}
+
+    def _row(self, symbol) -> Optional[int]:
+        row = self._index.get(symbol)
+        return row if row is not None and row < self._size else None
+
+    def __getitem__(self, symbol: str) -> Dict[str, Any]:
+        quote = self._cache.get(symbol)
+        if quote is None:
+            row = self._row(symbol)
+            if row is None:
+                raise KeyError(symbol)
+            quote = self._cache[symbol] = build_quote(symbol, self._stock_info.get(symbol, {}),
+                                                      self._floats[row].tolist(), self._ints[row].tolist())
+        return quote
+
+    def __contains__(self, symbol) -> bool:
+        return self._row(symbol) is not None
+
+    def __iter__(self):
+        return iter([symbol for symbol, row in list(self._index.items()) if row < self._size])
+
+    def __len__(self) -> int:
+        return self._size
+
+
+_iso_cache = {}
+
+def _isoformat(ts: float) -> str:
+    """Format an epoch timestamp as ISO-8601, memoizing the most recent tick"""
+    iso = _iso_cache.get(ts)
+    if iso is None:
+        if len(_iso_cache) > 256:
+            _iso_cache.clear()
+        iso = _iso_cache[ts] = datetime.datetime.fromtimestamp(ts).isoformat()
+    return iso
@@ -0,0 +1,433 @@
+"""
+Quotestream Option Chains - Vectorized Black-Scholes chain builder for QuotestreamPY
+Prices the whole expiration x strike grid in one NumPy pass and derives
+delta, gamma, theta and vega from the same d1/d2 terms as the prices
+"""
+import math
+import logging
+import datetime
+import functools
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger("quotestream")
+
+DEFAULT_VOLATILITY = 0.3
+DEFAULT_RISK_FREE_RATE = 0.02
+
+# Floor on time to expiry so same-day contracts keep finite greeks
+MIN_TIME_TO_EXPIRY = 1.0 / 365.0
+
+# Shape of the simulated market's smile: ATM vol of the nearest expirations
+# is raised by TERM_PREMIUM and decays to the process vol over TERM_DECAY
+# years; SKEW and CURVATURE apply per unit of log moneyness over sqrt(time)
+TERM_PREMIUM = 0.15
+TERM_DECAY = 0.25
+SKEW = -0.12
+CURVATURE = 0.03
+MAX_SMILE_MONEYNESS = 3.0
+
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal probability density"""
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """
+    Standard normal cumulative distribution
+
+    Uses the Abramowitz & Stegun 7.1.26 erf approximation (|error| < 1.5e-7),
+    which keeps the pricer vectorized without pulling in SciPy.
+    """
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741
+                + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.copysign(erf, x))
+
+
+def black_scholes(spot: float, strikes: np.ndarray, times: np.ndarray,
+                  volatility, rate: float = DEFAULT_RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """
+    Price calls and puts and compute their greeks over a grid
+
+    Args:
+        spot: Underlying price
+        strikes: Strike prices, broadcastable against ``times``
+        times: Years to expiration, broadcastable against ``strikes``
+        volatility: Annualized volatility (scalar or broadcastable array)
+        rate: Annualized risk-free rate
+
+    Returns:
+        Dictionary of arrays: call/put price, delta and theta (per day),
+        plus the shared gamma and vega (per 1 vol point)
+    """
+    times = np.maximum(times, MIN_TIME_TO_EXPIRY)
+    sqrt_t = np.sqrt(times)
+    vol_sqrt_t = volatility * sqrt_t
+
+    d1 = (np.log(spot / strikes) + (rate + 0.5 * volatility * volatility) * times) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+
+    nd1 = norm_cdf(d1)
+    nd2 = norm_cdf(d2)
+    pdf_d1 = norm_pdf(d1)
+    discounted_strike = strikes * np.exp(-rate * times)
+
+    call_price = spot * nd1 - discounted_strike * nd2
+    put_price = call_price - spot + discounted_strike  # put-call parity
+
+    decay = -spot * pdf_d1 * volatility / (2.0 * sqrt_t)
+    carry = rate * discounted_strike
+
+    return {
+        "call_price": call_price,
+        "put_price": put_price,
+        "call_delta": nd1,
+        "put_delta": nd1 - 1.0,
+        "gamma": pdf_d1 / (spot * vol_sqrt_t),
+        "vega": spot * pdf_d1 * sqrt_t / 100.0,
+        "call_theta": (decay - carry * nd2) / 365.0,
+        "put_theta": (decay + carry * (1.0 - nd2)) / 365.0,
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def expiration_dates(today: datetime.date) -> Tuple[datetime.date, ...]:
+    """
+    Get the listed expirations for a trading day
+
+    The next 4 weekly Fridays followed by the 3rd Friday of each of the next
+    3 months, without duplicates.
+    """
+    dates = []
+
+    days_until_friday = (4 - today.weekday()) % 7  # 4 = Friday
+    for i in range(4):
+        dates.append(today + datetime.timedelta(days=days_until_friday + i * 7))
+
+    for i in range(1, 4):
+        year = today.year + (today.month + i - 1) // 12
+        month = (today.month + i - 1) % 12 + 1
+        first_day = datetime.date(year, month, 1)
+        days_until_friday = (4 - first_day.weekday()) % 7
+        dates.append(first_day + datetime.timedelta(days=days_until_friday + 14))
+
+    return tuple(dict.fromkeys(dates))
+
+
+def strike_grid(underlying_price: float, width: float = 0.3, step_pct: float = 0.025) -> np.ndarray:
+    """Strikes from -width to +width around the underlying in step_pct increments"""
+    step = underlying_price * step_pct
+    count = int(round(2 * width / step_pct)) + 1
+    return np.round(underlying_price * (1.0 - width) + step * np.arange(count), 2)
+
+
+def occ_symbols(root: str, expirations: List[datetime.date], strikes: np.ndarray,
+                right: str) -> List[str]:
+    """
+    Build OCC option symbols for every expiration x strike pair
+
+    Args:
+        root: Underlying symbol
+        expirations: Expiration dates (grid rows)
+        strikes: Strike prices (grid columns)
+        right: "C" or "P"
+
+    Returns:
+        Row-major list of symbols such as ``AAPL240119C00190000``
+    """
+    prefixes = [f"{root}{d.strftime('%y%m%d')}{right}" for d in expirations]
+    suffixes = [f"{k:08d}" for k in np.rint(strikes * 1000).astype(np.int64).tolist()]
+    return [p + s for p in prefixes for s in suffixes]
+
+
+# Fields of one contract in the order responses list them
+CONTRACT_FIELDS = ("symbol", "underlying", "expiration", "strike", "type", "last", "bid", "ask",
+                   "volume", "open_interest", "implied_volatility", "delta", "gamma", "theta",
+                   "vega", "days_to_expiration")
+
+# Fields stored as arrays; the rest are derived from the grid position when output
+_STORED_FIELDS = ("strike", "last", "bid", "ask", "volume", "open_interest", "implied_volatility",
+                  "delta", "gamma", "theta", "vega", "days_to_expiration")
+
+SIDES = ("call", "put")
+
+
+class OptionChain:
+    """
+    Columnar option chain for one underlying.
+
+    Every stored field is one array over all contracts, ordered by side
+    (calls first), expiration, then strike, so the contracts of one side
+    and expiration are a contiguous run sorted by strike. Queries find
+    rows with index arithmetic and ``searchsorted`` and only build the
+    rows and fields they return. A chain is never modified once built.
+    """
+
+    def __init__(self, symbol: str, underlying_price: float, expirations: List[datetime.date],
+                 strikes: np.ndarray, columns: Dict[str, np.ndarray]):
+        """
+        Wrap built chain columns
+
+        Args:
+            symbol: Underlying symbol
+            underlying_price: Underlying price the chain was priced at
+            expirations: Expiration dates (grid rows)
+            strikes: Sorted strike prices (grid columns)
+            columns: Arrays of length 2 x expirations x strikes per stored field
+        """
+        self.symbol = symbol
+        self.underlying_price = underlying_price
+        self.expirations = [d.isoformat() for d in expirations]
+        self.strikes = strikes
+        self.columns = columns
+        self._expiration_index = {e: i for i, e in enumerate(self.expirations)}
+        self._occ_prefixes = [[f"{symbol}{d.strftime('%y%m%d')}{right}" for d in expirations]
+                              for right in ("C", "P")]
+        self._full = None
+
+    def __len__(self) -> int:
+        return len(self.columns["strike"])
+
+    def select(self, expirations: Optional[List[str]] = None, option_type: Optional[str] = None,
+               strike_min: Optional[float] = None, strike_max: Optional[float] = None,
+               moneyness_min: Optional[float] = None, moneyness_max: Optional[float] = None,
+               delta_min: Optional[float] = None, delta_max: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Find the contracts matching a filter
+
+        Args:
+            expirations: ISO expiration dates to include; all if omitted
+            option_type: "call" or "put"; both if omitted
+            strike_min, strike_max: Strike range, inclusive
+            moneyness_min, moneyness_max: Range of strike / underlying price, inclusive
+            delta_min, delta_max: Range of absolute delta, inclusive
+
+        Returns:
+            Row indices per side ("call", "put"), sorted by expiration and strike
+        """
+        n_exp, n_strike = len(self.expirations), len(self.strikes)
+
+        if expirations is None:
+            exp_rows = np.arange(n_exp)
+        else:
+            exp_rows = np.array([self._expiration_index[e] for e in expirations
+                                 if e in self._expiration_index], dtype=np.intp)
+
+        low, high = strike_min, strike_max
+        if moneyness_min is not None:
+            low = max(low or 0.0, moneyness_min * self.underlying_price)
+        if moneyness_max is not None:
+            high = min(high if high is not None else np.inf, moneyness_max * self.underlying_price)
+        first = 0 if low is None else int(np.searchsorted(self.strikes, low - 1e-9, "left"))
+        last = n_strike if high is None else int(np.searchsorted(self.strikes, high + 1e-9, "right"))
+        grid = (exp_rows[:, None] * n_strike + np.arange(first, max(first, last))[None, :]).ravel()
+
+        result = {}
+        for side_index, side in enumerate(SIDES):
+            if option_type is not None and option_type != side:
+                continue
+            rows = grid + side_index * n_exp * n_strike
+            if delta_min is not None or delta_max is not None:
+                delta = np.abs(self.columns["delta"][rows])
+                keep = np.ones(len(rows), dtype=bool)
+                if delta_min is not None:
+                    keep &= delta >= delta_min
+                if delta_max is not None:
+                    keep &= delta <= delta_max
+                rows = rows[keep]
+            result[side] = rows
+        return result
+
+    def column(self, field: str, rows: np.ndarray) -> List[Any]:
+        """
+        Get one field for some contracts
+
+        Args:
+            field: One of CONTRACT_FIELDS
+            rows: Row indices from ``select``
+
+        Returns:
+            Field values as plain Python objects
+        """
+        if field in self.columns:
+            return self.columns[field][rows].tolist()
+
+        n_grid = len(self.expirations) * len(self.strikes)
+        if field == "underlying":
+            return [self.symbol] * len(rows)
+        if field == "type":
+            return [SIDES[r // n_grid] for r in rows.tolist()]
+        exp_rows = (rows % n_grid) // len(self.strikes)
+        if field == "expiration":
+            return [self.expirations[e] for e in exp_rows.tolist()]
+        if field == "symbol":
+            prefixes = self._occ_prefixes
+            strikes = np.rint(self.columns["strike"][rows] * 1000).astype(np.int64).tolist()
+            return [f"{prefixes[r // n_grid][e]}{k:08d}"
+                    for r, e, k in zip(rows.tolist(), exp_rows.tolist(), strikes)]
+        raise KeyError(field)
+
+    def query(self, fields: Optional[List[str]] = None, columnar: bool = False,
+              **filters) -> Dict[str, Any]:
+        """
+        Get the matching contracts in the API chain format
+
+        Args:
+            fields: Contract fields to include; all of CONTRACT_FIELDS if omitted
+            columnar: Return each side as {field: [values]} instead of a list of contracts
+            filters: Keyword arguments of ``select``
+
+        Returns:
+            Chain dictionary with "calls" and/or "puts" for the requested sides
+        """
+        fields = list(fields or CONTRACT_FIELDS)
+        unknown = [f for f in fields if f not in CONTRACT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown option fields: {', '.join(unknown)}")
+
+        result = {
+            "symbol": self.symbol,
+            "underlying_price": self.underlying_price,
+            "expirations": self.expirations,
+            "strikes": self.strikes.tolist()
+        }
+        for side, rows in self.select(**filters).items():
+            values = [self.column(field, rows) for field in fields]
+            if columnar:
+                result[side + "s"] = dict(zip(fields, values))
+            else:
+                result[side + "s"] = [dict(zip(fields, contract)) for contract in zip(*values)]
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the whole chain as contract dicts, built once per chain"""
+        if self._full is None:
+            self._full = self.query()
+        return self._full
+
+
+def market_smile(underlying_price: float, strikes: np.ndarray, times: np.ndarray,
+                 atm_vol: float) -> np.ndarray:
+    """
+    Get the volatilities the simulated market quotes options at
+
+    The ATM level follows a term structure around the underlying's own
+    volatility, and across strikes the smile has an equity-style skew
+    (puts richer than calls) that is steeper for near expirations.
+
+    Args:
+        underlying_price: Current underlying price
+        strikes: Strike prices, broadcastable against ``times``
+        times: Years to expiration, broadcastable against ``strikes``
+        atm_vol: Annualized volatility of the underlying's price process
+
+    Returns:
+        Volatility per strike and expiration
+    """
+    times = np.maximum(times, MIN_TIME_TO_EXPIRY)
+    atm = atm_vol * (1.0 + TERM_PREMIUM * np.exp(-times / TERM_DECAY))
+    x = np.clip(np.log(strikes / underlying_price) / np.sqrt(times), -MAX_SMILE_MONEYNESS,
+                MAX_SMILE_MONEYNESS)
+    return atm * (1.0 + SKEW * x + CURVATURE * x * x)
+
+
+def simulated_market_chain(symbol: str, underlying_price: float, atm_vol: float,
+                           today: Optional[datetime.date] = None,
+                           rng: Optional[np.random.Generator] = None) -> OptionChain:
+    """
+    Build the chain of quotes the simulated market shows, priced off ``market_smile``
+
+    This is what a volatility surface is fitted to; the contracts served
+    to clients are priced off that surface.
+
+    Args:
+        symbol: Underlying symbol
+        underlying_price: Current underlying price
+        atm_vol: Annualized volatility of the underlying's price process
+        today: Pricing date; defaults to today
+        rng: Optional random generator for simulated volume/open interest
+
+    Returns:
+        Columnar OptionChain over every expiration and strike
+    """
+    today = today or datetime.date.today()
+    strikes = strike_grid(underlying_price)
+    times = np.array([(d - today).days for d in expiration_dates(today)]) / 365.0
+    volatility = market_smile(underlying_price, strikes[None, :], times[:, None], atm_vol)
+    return build_option_chain(symbol, underlying_price, today=today, volatility=volatility,
+                              rng=rng, strikes=strikes)
+
+
+def build_option_chain(symbol: str, underlying_price: float,
+                       today: Optional[datetime.date] = None,
+                       volatility: float = DEFAULT_VOLATILITY,
+                       rate: float = DEFAULT_RISK_FREE_RATE,
+                       rng: Optional[np.random.Generator] = None,
+                       strikes: Optional[np.ndarray] = None,
+                       surface=None) -> OptionChain:
+    """
+    Build a full simulated options chain for a symbol
+
+    Args:
+        symbol: Underlying symbol
+        underlying_price: Current underlying price
+        today: Pricing date; defaults to today
+        volatility: Annualized volatility used for pricing; a scalar, or an
+            (expirations, strikes) array
+        rate: Annualized risk-free rate
+        rng: Optional random generator for simulated volume/open interest
+        strikes: Sorted strikes to list; defaults to ``strike_grid(underlying_price)``
+        surface: Optional fitted VolSurface (quotestream_volsurface); when
+            given, each contract is priced at the surface's interpolated
+            vol instead of ``volatility``
+
+    Returns:
+        Columnar OptionChain over every expiration and strike
+    """
+    today = today or datetime.date.today()
+    rng = rng or np.random.default_rng()
+
+    expirations = list(expiration_dates(today))
+    days = np.array([(d - today).days for d in expirations], dtype=np.int64)
+    if strikes is None:
+        strikes = strike_grid(underlying_price)
+
+    n_exp, n_strike = len(expirations), len(strikes)
+    size = n_exp * n_strike
+
+    times = (days / 365.0)[:, None]
+    if surface is not None:
+        volatility = surface.vol(strikes[None, :], times, underlying_price)
+    greeks = black_scholes(underlying_price, strikes[None, :], times, volatility, rate)
+    implied_volatility = np.round(np.broadcast_to(volatility, (n_exp, n_strike)).ravel(), 4)
+    gamma = np.round(np.broadcast_to(greeks["gamma"], (n_exp, n_strike)).ravel(), 4)
+    vega = np.round(np.broadcast_to(greeks["vega"], (n_exp, n_strike)).ravel(), 4)
+
+    sides = []
+    for kind in SIDES:
+        price = np.maximum(greeks[f"{kind}_price"], 0.01).ravel()
+        volume = rng.integers(10, 5000, size)
+        open_interest = (volume * rng.uniform(1.0, 10.0, size)).astype(np.int64)
+        sides.append({
+            "strike": np.tile(strikes, n_exp),
+            "last": np.round(price, 2),
+            "bid": np.round(price * 0.95, 2),
+            "ask": np.round(price * 1.05, 2),
+            "volume": volume,
+            "open_interest": open_interest,
+            "implied_volatility": implied_volatility,
+            "delta": np.round(greeks[f"{kind}_delta"], 4).ravel(),
+            "gamma": gamma,
+            "theta": np.round(greeks[f"{kind}_theta"], 4).ravel(),
+            "vega": vega,
+            "days_to_expiration": np.repeat(days, n_strike)
+        })
+
+    columns = {field: np.concatenate([side[field] for side in sides]) for field in _STORED_FIELDS}
+    return OptionChain(symbol, underlying_price, expirations, strikes, columns)
@@ -0,0 +1,235 @@
+"""
+Quotestream Volume Profile - Volume-at-price histograms built from the trade tape
+Every printed trade adds its size to one price bin in O(1); VWAP, point of
+control, value area and high/low volume nodes are read from the histogram
+in O(bins)
+"""
+import math
+import logging
+import numpy as np
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger("quotestream")
+
+DEFAULT_BIN_BPS = 5.0        # bin width as basis points of the first traded price
+DEFAULT_VALUE_AREA = 0.70    # share of volume inside the value area
+DEFAULT_NODES = 5            # high and low volume nodes returned per kind
+INITIAL_BINS = 64
+
+# Triangular kernel the histogram is smoothed with before finding volume nodes
+SMOOTHING = np.array([1.0, 2.0, 3.0, 2.0, 1.0]) / 9.0
+
+
+def nice_bin_size(price: float, bps: float = DEFAULT_BIN_BPS) -> float:
+    """
+    Round ``price * bps`` to 1, 2, 2.5 or 5 times a power of ten, at least one cent
+
+    Args:
+        price: Reference price
+        bps: Target bin width in basis points of the price
+
+    Returns:
+        Bin width in price units
+    """
+    raw = max(price * bps / 10000.0, 0.01)
+    scale = 10.0 ** math.floor(math.log10(raw))
+    for step in (1.0, 2.0, 2.5, 5.0, 10.0):
+        if raw <= step * scale * 1.25:
+            return round(step * scale, 6)
+    return round(10.0 * scale, 6)
+
+
+class VolumeProfile:
+    """
+    Traded volume per price bin for one symbol.
+
+    Bin number ``n`` covers prices from ``n * bin_size`` up to the next
+    bin and is stored at ``n - origin``. The histogram grows by doubling
+    towards whichever side a trade falls outside of, so appends are
+    amortized O(1). The point of control is kept current on every add
+    because bin volumes only ever grow. Readers may run while the update
+    thread adds trades: bin numbers do not move when the array grows.
+    """
+
+    def __init__(self, symbol: str, bin_size: Optional[float] = None, bin_bps: float = DEFAULT_BIN_BPS):
+        """
+        Initialize an empty profile
+
+        Args:
+            symbol: The stock symbol
+            bin_size: Bin width in price units; derived from the first trade if omitted
+            bin_bps: Bin width in basis points used to derive ``bin_size``
+        """
+        self.symbol = symbol
+        self.bin_size = bin_size
+        self.bin_bps = bin_bps
+        # (origin bin, volumes) swapped together so readers never see a mismatched pair
+        self._bins = (0, np.zeros(0, dtype=np.int64))
+        self.low = None   # lowest traded bin number
+        self.high = None  # highest traded bin number
+        self.poc = None   # bin number with the most volume
+        self.total_volume = 0
+        self.total_value = 0.0
+        self.trades = 0
+
+    def _grow(self, index: int):
+        """Extend the histogram so bin number ``index`` fits"""
+        origin, volumes = self._bins
+        size = max(len(volumes), INITIAL_BINS)
+        if not len(volumes):
+            origin = index - size // 2
+            volumes = np.zeros(size, dtype=np.int64)
+            self._bins = (origin, volumes)
+            return
+        shift = 0
+        while index < origin - shift:
+            shift += size
+        extra = 0
+        while index >= origin + len(volumes) + extra:
+            extra += size
+        grown = np.zeros(len(volumes) + shift + extra, dtype=np.int64)
+        grown[shift:shift + len(volumes)] = volumes
+        self._bins = (origin - shift, grown)
+
+    def add(self, price: float, size: int):
+        """
+        Add a printed trade
+
+        Args:
+            price: Trade price
+            size: Trade size in shares
+        """
+        if self.bin_size is None:
+            self.bin_size = nice_bin_size(price, self.bin_bps)
+        number = int(math.floor(price / self.bin_size + 1e-9))
+        origin, volumes = self._bins
+        if not len(volumes) or not origin <= number < origin + len(volumes):
+            self._grow(number)
+            origin, volumes = self._bins
+
+        volumes[number - origin] += size
+        if self.poc is None or volumes[number - origin] > volumes[self.poc - origin]:
+            self.poc = number
+        if self.low is None or number < self.low:
+            self.low = number
+        if self.high is None or number > self.high:
+            self.high = number
+        self.total_volume += size
+        self.total_value += price * size
+        self.trades += 1
+
+    @property
+    def vwap(self) -> Optional[float]:
+        """Get the volume-weighted average traded price"""
+        return self.total_value / self.total_volume if self.total_volume else None
+
+    def histogram(self):
+        """
+        Get a consistent copy of the traded range
+
+        Returns:
+            (bin prices, volumes, index of the point of control) for the
+            bins between the lowest and highest traded price
+        """
+        low, high = self.low, self.high
+        origin, volumes = self._bins
+        if low is None:
+            return np.zeros(0), np.zeros(0, dtype=np.int64), -1
+        first = max(low - origin, 0)
+        last = min(high - origin, len(volumes) - 1)
+        volumes = volumes[first:last + 1].copy()
+        prices = (origin + first + np.arange(len(volumes))) * self.bin_size
+        return prices, volumes, int(np.argmax(volumes))
+
+    def analysis(self, last_price: Optional[float] = None, value_area: float = DEFAULT_VALUE_AREA,
+                 nodes: int = DEFAULT_NODES, include_histogram: bool = False) -> Dict[str, Any]:
+        """
+        Summarize the profile
+
+        Args:
+            last_price: Current price, which splits nodes into support and resistance
+            value_area: Share of volume the value area must hold
+            nodes: Number of high and of low volume nodes to report
+            include_histogram: Also return every bin
+
+        Returns:
+            Dictionary with VWAP, POC, value area, volume nodes and levels
+        """
+        prices, volumes, poc = self.histogram()
+        bin_size = self.bin_size or 0.0
+        result = {
+            "symbol": self.symbol,
+            "vwap": round(self.vwap, 4) if self.vwap is not None else None,
+            "total_volume": self.total_volume,
+            "trades": self.trades,
+            "bin_size": bin_size,
+            "poc": None,
+            "value_area_low": None,
+            "value_area_high": None,
+            "high_volume_nodes": [],
+            "low_volume_nodes": [],
+            "levels": []
+        }
+        if poc < 0:
+            return result
+
+        # Value area: grow outwards from the POC, taking the heavier neighbour first
+        bins = volumes.tolist()
+        target = value_area * sum(bins)
+        low = high = poc
+        covered = bins[poc]
+        while covered < target and (low > 0 or high < len(bins) - 1):
+            below = bins[low - 1] if low > 0 else -1
+            above = bins[high + 1] if high < len(bins) - 1 else -1
+            if above >= below:
+                high += 1
+                covered += above
+            else:
+                low -= 1
+                covered += below
+
+        # Volume nodes are the local peaks and troughs of the lightly smoothed histogram
+        smoothed = np.convolve(np.pad(volumes.astype(np.float64), 2, mode="edge"), SMOOTHING, "valid")
+        padded = np.pad(smoothed, 1, mode="constant", constant_values=-1.0)
+        peaks = np.flatnonzero((smoothed >= padded[:-2]) & (smoothed > padded[2:]) & (volumes > 0))
+        padded = np.pad(smoothed, 1, mode="constant", constant_values=np.inf)
+        troughs = np.flatnonzero((smoothed <= padded[:-2]) & (smoothed < padded[2:]))
+        troughs = troughs[(troughs > 0) & (troughs < len(volumes) - 1)]
+        peaks = peaks[np.argsort(-smoothed[peaks], kind="stable")][:nodes]
+        troughs = troughs[np.argsort(smoothed[troughs], kind="stable")][:nodes]
+
+        def node(i):
+            return {"price": round(float(prices[i] + bin_size / 2), 4), "volume": int(volumes[i])}
+
+        result.update({
+            "poc": node(poc)["price"],
+            "value_area_low": round(float(prices[low]), 4),
+            "value_area_high": round(float(prices[high] + bin_size), 4),
+            "high_volume_nodes": [node(i) for i in peaks],
+            "low_volume_nodes": [node(i) for i in troughs],
+        })
+
+        # High volume nodes hold price: below the last price they are support, above resistance
+        levels = []
+        if last_price is not None:
+            levels.append({"price": round(last_price, 2), "volume": 0, "type": "current"})
+        for level in result["high_volume_nodes"]:
+            side = "support" if last_price is None or level["price"] <= last_price else "resistance"
+            levels.append(dict(level, type=side))
+        result["levels"] = sorted(levels, key=lambda level: level["price"])
+
+        if include_histogram:
+            result["histogram"] = {"prices": np.round(prices, 4).tolist(), "volumes": volumes.tolist()}
+        return result
+
+
+class VolumeProfiles(dict):
+    """Mapping of symbol to VolumeProfile that creates profiles on first use"""
+
+    def __init__(self, bin_bps: float = DEFAULT_BIN_BPS):
+        super().__init__()
+        self.bin_bps = bin_bps
+
+    def __missing__(self, symbol: str) -> VolumeProfile:
+        profile = self[symbol] = VolumeProfile(symbol, bin_bps=self.bin_bps)
+        return profile
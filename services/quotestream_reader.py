@@ -0,0 +1,233 @@
+"""
+Quotestream Reader - Local quote lookups for processes running next to QuotestreamPY
+Reads the latest quotes straight from the shared-memory quote board the
+service publishes, and falls back to the service's HTTP API when the board
+is not there or does not have the symbol yet
+"""
+import os
+import time
+import logging
+import threading
+import requests
+from typing import Dict, List, Optional, Any, Tuple
+
+from quotestream_board import QuoteBoard, DEFAULT_BOARD_NAME
+from quotestream_engine import build_quote, F_LAST
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+QUOTESTREAM_URL = os.getenv("QUOTESTREAM_URL", f"http://localhost:{os.getenv('QUOTESTREAM_PORT', 3000)}")
+BOARD_NAME = os.getenv("QUOTESTREAM_BOARD_NAME", DEFAULT_BOARD_NAME)
+
+# Seconds to wait before trying the board or the HTTP API again after a failure
+RETRY_INTERVAL = 5.0
+
+# Seconds between checks that the service owning the board is still running
+OWNER_CHECK_INTERVAL = 1.0
+
+HTTP_TIMEOUT = 2.0
+
+
+class QuoteReader:
+    """
+    Quote lookups from the QuotestreamPY quote board with an HTTP fallback.
+
+    A board read is a seqlock-checked copy of one row and takes a few
+    microseconds. Symbols the board does not hold yet are requested over
+    HTTP, which also makes the service start publishing them. Reads count
+    as users of the board they started on; a board detached while in use
+    is closed by the last read to finish with it.
+    """
+
+    def __init__(self, board_name: str = BOARD_NAME, api_base: str = QUOTESTREAM_URL,
+                 timeout: float = HTTP_TIMEOUT, retry_interval: float = RETRY_INTERVAL):
+        """
+        Initialize the reader; the board is attached on first use
+
+        Args:
+            board_name: Shared memory board name; empty disables board reads
+            api_base: Base URL of the QuotestreamPY service
+            timeout: HTTP request timeout in seconds
+            retry_interval: Seconds to back off after the board or the API failed
+        """
+        self.board_name = board_name
+        self.api_base = api_base.rstrip("/")
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.board: Optional[QuoteBoard] = None
+        self.ids: Dict[str, int] = {}  # symbol -> board id
+        self._lock = threading.Lock()  # guards attaching, detaching and the user counts
+        self._users: Dict[QuoteBoard, int] = {}  # board -> reads in progress
+        self._next_attach = 0.0
+        self._next_owner_check = 0.0
+        self._next_http = 0.0
+        self.board_reads = 0
+        self.http_reads = 0
+        self.misses = 0
+        self.inflight = SingleFlight()
+
+    def _detach(self):
+        """Drop the board; the caller holds the lock"""
+        board, self.board = self.board, None
+        self.ids = {}
+        if board not in self._users:
+            board.close()
+
+    def _acquire(self) -> Tuple[Optional[QuoteBoard], Dict[str, int]]:
+        """Get the board and its symbol ids for a read, counting the read as a user"""
+        with self._lock:
+            board = self._attached_board()
+            if board is not None:
+                self._users[board] = self._users.get(board, 0) + 1
+            return board, self.ids
+
+    def _release(self, board: Optional[QuoteBoard]):
+        """End a read, closing the board if it was detached meanwhile"""
+        if board is None:
+            return
+        with self._lock:
+            users = self._users[board] - 1
+            if users:
+                self._users[board] = users
+                return
+            del self._users[board]
+            if board is not self.board:
+                board.close()
+
+    def _attached_board(self) -> Optional[QuoteBoard]:
+        """Get the board, attaching or dropping it as the service comes and goes; the caller holds the lock"""
+        now = time.monotonic()
+        if self.board is not None and now >= self._next_owner_check:
+            self._next_owner_check = now + OWNER_CHECK_INTERVAL
+            if not self.board.owner_alive():
+                logger.warning(f"QuotestreamPY stopped; detaching from quote board {self.board_name}")
+                self._detach()
+        if self.board is None and self.board_name and now >= self._next_attach:
+            try:
+                self.board = QuoteBoard.attach(self.board_name)
+                self._next_owner_check = now + OWNER_CHECK_INTERVAL
+                logger.info(f"Attached to quote board {self.board_name}")
+            except (FileNotFoundError, ValueError):
+                self._next_attach = now + self.retry_interval
+        return self.board
+
+    def _read(self, board: Optional[QuoteBoard], ids: Dict[str, int],
+              symbol: str) -> Optional[Tuple[int, List[float], List[int]]]:
+        """Read a symbol's row from an acquired board, or None if the board does not have it"""
+        if board is None:
+            return None
+        board_id = ids.get(symbol)
+        if board_id is None and len(board) > len(ids):
+            ids.update(board.symbol_ids(len(ids)))
+            board_id = ids.get(symbol)
+        if board_id is None:
+            return None
+        row = board.read_row(board_id)
+        if row is None:
+            return None
+        self.board_reads += 1
+        return (board_id,) + row
+
+    def _http_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quotes from the service's REST API, sharing requests already in flight"""
+        if not symbols or time.monotonic() < self._next_http:
+            return {}
+        return self.inflight.do(('quotes', tuple(symbols)), lambda: self._request_quotes(symbols))
+
+    def _request_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        try:
+            response = requests.get(f"{self.api_base}/api/quotes", params={"symbols": ",".join(symbols)},
+                                    timeout=self.timeout)
+            response.raise_for_status()
+            self.http_reads += 1
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"QuotestreamPY API unavailable: {e}")
+            self._next_http = now + self.retry_interval
+            return {}
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get quotes for several symbols
+
+        Args:
+            symbols: Stock symbols
+
+        Returns:
+            Mapping of symbol to quote dictionary in the QuotestreamPY wire
+            format; symbols neither the board nor the API had are left out
+        """
+        result = {}
+        missing = []
+        board, ids = self._acquire()
+        try:
+            for symbol in symbols:
+                symbol = symbol.upper()
+                row = self._read(board, ids, symbol)
+                if row is None:
+                    missing.append(symbol)
+                    continue
+                board_id, floats, ints = row
+                info = {"name": board.name_of(board_id) or f"{symbol} Stock",
+                        "sector": board.sector(board_id) or "Unknown"}
+                result[symbol] = build_quote(symbol, info, floats, ints)
+        finally:
+            self._release(board)
+        if missing:
+            fetched = self._http_quotes(missing)
+            result.update(fetched)
+            self.misses += len(set(missing) - set(fetched))
+        return result
+
+    def quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the quote dictionary for a symbol, or None if unavailable"""
+        return self.quotes([symbol]).get(symbol.upper())
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """
+        Get the last price of a symbol
+
+        Args:
+            symbol: The stock symbol
+
+        Returns:
+            Last price rounded to cents, or None if unavailable
+        """
+        symbol = symbol.upper()
+        board, ids = self._acquire()
+        try:
+            row = self._read(board, ids, symbol)
+        finally:
+            self._release(board)
+        if row is not None:
+            return round(row[1][F_LAST], 2)
+        quote = self._http_quotes([symbol]).get(symbol)
+        if quote is None:
+            self.misses += 1
+            return None
+        return quote.get("last")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get reader counters for status endpoints"""
+        board = self.board
+        return {
+            "board": self.board_name if board is not None else None,
+            "board_symbols": len(board) if board is not None else 0,
+            "board_reads": self.board_reads,
+            "http_reads": self.http_reads,
+            "misses": self.misses,
+            "http_coalesced": sum(self.inflight.coalesced.values())
+        }
+
+
+# Singleton instance for the application to use
+_quote_reader = None
+
+def get_quote_reader() -> QuoteReader:
+    """Get the singleton quote reader instance"""
+    global _quote_reader
+    if _quote_reader is None:
+        _quote_reader = QuoteReader()
+    return _quote_reader
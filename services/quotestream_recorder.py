@@ -0,0 +1,320 @@
+"""
+Quotestream Recorder - Append-only memory-mapped tick recording
+Writes every generated quote and trade as a fixed-width binary record into
+rotating segment files that can be opened directly with numpy.memmap
+
+Directory layout:
+    format.json             record dtype (numpy ``descr``) and kind codes
+    symbols.json            symbol names, indexed by ``symbol_id``; only appended to
+    segment-000001.ticks    RECORD_DTYPE records, preallocated while open
+    segment-000001.idx      INDEX_DTYPE entries, one per written batch
+
+A closed segment is truncated to the records it holds, so it reads as
+``numpy.memmap(path, dtype=RECORD_DTYPE, mode="r")``. For the open segment
+use the ``end`` of the last index entry as the record count. Index entries
+give the first timestamp of each batch with its record range, which lets
+readers seek by time with a binary search.
+"""
+import os
+import json
+import glob
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Any, Iterator, Sequence, Tuple
+
+logger = logging.getLogger("quotestream")
+
+KIND_QUOTE = 0
+KIND_TRADE = 1
+
+RECORD_DTYPE = np.dtype([
+    ("ts_ns", "<i8"),      # epoch nanoseconds
+    ("symbol_id", "<u4"),  # index into symbols.json
+    ("kind", "u1"),        # KIND_QUOTE or KIND_TRADE
+    ("side", "i1"),        # trades: -1 at bid, 1 at ask, 0 in between
+    ("flags", "<u2"),      # trades: exchange code | condition code << 8
+    ("price", "<f8"),      # quotes: last; trades: trade price
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("bid_size", "<i4"),
+    ("ask_size", "<i4"),
+    ("size", "<i8")        # quotes: cumulative volume; trades: trade size
+])
+
+INDEX_DTYPE = np.dtype([
+    ("ts_ns", "<i8"),  # timestamp of the first record in the batch
+    ("start", "<i8"),  # first record of the batch
+    ("end", "<i8")     # one past the last record of the batch
+])
+
+DEFAULT_SEGMENT_RECORDS = 1 << 20  # 56 MB per segment
+
+
+def _segment_path(directory: str, number: int, suffix: str) -> str:
+    return os.path.join(directory, f"segment-{number:06d}.{suffix}")
+
+
+class TickRecorder:
+    """
+    Writer for a recording directory.
+
+    Batches are written with one vectorized copy into the open segment's
+    memory map; a segment that fills up is truncated, closed and replaced
+    by the next one. Only the update thread should write.
+
+    Callers number symbols by their own list (tick engine rows), which
+    ``sync_symbols`` maps onto the recording's ids. A reopened recording
+    keeps the ids of its earlier segments and appends new symbols after
+    them, so every segment reads with the same symbols.json.
+    """
+
+    def __init__(self, directory: str, segment_records: int = DEFAULT_SEGMENT_RECORDS,
+                 max_segments: int = 0):
+        """
+        Open a recording directory, continuing after any existing segments
+
+        Args:
+            directory: Directory for segment files (created if missing)
+            segment_records: Record capacity of each segment
+            max_segments: Number of segments to keep; older ones are deleted.
+                0 keeps every segment
+        """
+        self.directory = directory
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, "format.json"), "w") as f:
+            json.dump({"record_dtype": RECORD_DTYPE.descr, "index_dtype": INDEX_DTYPE.descr,
+                       "kinds": {"quote": KIND_QUOTE, "trade": KIND_TRADE}}, f)
+
+        self._symbols = _load_symbols(directory)
+        self._ids = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._row_ids = np.zeros(0, dtype=np.uint32)  # caller symbol number -> recording id
+        self._segment: Optional[np.memmap] = None
+        self._index_file = None
+        self._count = 0
+        self.records_written = 0
+
+        existing = _segment_numbers(directory)
+        if existing and not self._symbols:
+            raise ValueError(f"Recording {directory} has segments but no symbols.json")
+        self._number = existing[-1] if existing else 0
+        self._open_segment(self._number + 1)
+
+    def _open_segment(self, number: int):
+        self._number = number
+        self._segment = np.memmap(_segment_path(self.directory, number, "ticks"),
+                                  dtype=RECORD_DTYPE, mode="w+", shape=(self.segment_records,))
+        # Unbuffered so live readers see a batch as soon as its entry exists
+        self._index_file = open(_segment_path(self.directory, number, "idx"), "wb", buffering=0)
+        self._count = 0
+
+        if self.max_segments:
+            for old in _segment_numbers(self.directory)[:-self.max_segments]:
+                for suffix in ("ticks", "idx"):
+                    try:
+                        os.remove(_segment_path(self.directory, old, suffix))
+                    except OSError:
+                        pass
+
+    def _close_segment(self):
+        """Flush the open segment and truncate it to the records it holds"""
+        if self._segment is None:
+            return
+        self._segment.flush()
+        path = self._segment.filename
+        self._segment = None  # drops the last reference, unmapping the file
+        os.truncate(path, self._count * RECORD_DTYPE.itemsize)
+        self._index_file.close()
+        self._index_file = None
+
+    def sync_symbols(self, symbols: Sequence[str]):
+        """
+        Map the caller's symbol numbers onto recording ids
+
+        Args:
+            symbols: Symbol names indexed by the ids passed to record_quotes()
+                and record_trades(); only ever appended to
+        """
+        if len(symbols) == len(self._row_ids):
+            return
+        known = len(self._symbols)
+        row_ids = self._row_ids.tolist()
+        for symbol in symbols[len(row_ids):]:
+            symbol_id = self._ids.get(symbol)
+            if symbol_id is None:
+                symbol_id = self._ids[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+            row_ids.append(symbol_id)
+        self._row_ids = np.array(row_ids, dtype=np.uint32)
+        if len(self._symbols) == known:
+            return
+        path = os.path.join(self.directory, "symbols.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self._symbols, f)
+        os.replace(path + ".tmp", path)
+
+    def _write(self, records: np.ndarray):
+        """Append a batch of records, rotating segments as they fill"""
+        while len(records):
+            if self._count == self.segment_records:
+                self._close_segment()
+                self._open_segment(self._number + 1)
+            n = min(len(records), self.segment_records - self._count)
+            start = self._count
+            self._segment[start:start + n] = records[:n]
+            self._count += n
+            self._index_file.write(np.array([(records["ts_ns"][0], start, start + n)],
+                                            dtype=INDEX_DTYPE).tobytes())
+            self.records_written += n
+            records = records[n:]
+
+    def record_quotes(self, symbol_ids: np.ndarray, ts_ns: np.ndarray, last: np.ndarray,
+                      bid: np.ndarray, ask: np.ndarray, bid_size: np.ndarray,
+                      ask_size: np.ndarray, volume: np.ndarray):
+        """Record one quote per symbol from column arrays, with symbols numbered as in sync_symbols()"""
+        if not len(symbol_ids):
+            return
+        records = np.zeros(len(symbol_ids), dtype=RECORD_DTYPE)
+        records["ts_ns"] = ts_ns
+        records["symbol_id"] = self._row_ids[symbol_ids]
+        records["kind"] = KIND_QUOTE
+        records["price"] = last
+        records["bid"] = bid
+        records["ask"] = ask
+        records["bid_size"] = bid_size
+        records["ask_size"] = ask_size
+        records["size"] = volume
+        self._write(records)
+
+    def record_trades(self, trades: Sequence[Tuple[int, int, float, int, int, int]]):
+        """
+        Record trades
+
+        Args:
+            trades: (symbol_id, ts_ns, price, size, side, flags) tuples, with
+                symbols numbered as in sync_symbols()
+        """
+        if not trades:
+            return
+        symbol_ids, ts_ns, prices, sizes, sides, flags = zip(*trades)
+        records = np.zeros(len(trades), dtype=RECORD_DTYPE)
+        records["ts_ns"] = ts_ns
+        records["symbol_id"] = self._row_ids[np.array(symbol_ids, dtype=np.intp)]
+        records["kind"] = KIND_TRADE
+        records["side"] = sides
+        records["flags"] = flags
+        records["price"] = prices
+        records["size"] = sizes
+        self._write(records)
+
+    def flush(self):
+        """Flush written records to disk"""
+        if self._segment is not None:
+            self._segment.flush()
+
+    def close(self):
+        """Close the recording; the last segment is truncated to its records"""
+        self._close_segment()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get recorder counters for status endpoints"""
+        return {
+            "directory": self.directory,
+            "segment": self._number,
+            "segment_records": self._count,
+            "records_written": self.records_written
+        }
+
+
+class TickReader:
+    """Reader for a recording directory, including one still being written"""
+
+    def __init__(self, directory: str):
+        """
+        Open a recording directory
+
+        Args:
+            directory: Directory written by TickRecorder
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "symbols.json")) as f:
+            self.symbols: List[str] = json.load(f)
+
+    def reload_symbols(self):
+        """
+        Pick up symbols appended since the recording was opened
+
+        Raises:
+            ValueError: If symbols.json no longer starts with the symbols
+                read before, so ids already read would change meaning
+        """
+        symbols = _load_symbols(self.directory)
+        if symbols[:len(self.symbols)] != self.symbols:
+            raise ValueError(f"Symbol map of recording {self.directory} changed while reading it")
+        self.symbols = symbols
+
+    def segments(self) -> List[int]:
+        """Get the segment numbers present, oldest first"""
+        return _segment_numbers(self.directory)
+
+    def index(self, number: int) -> np.ndarray:
+        """Get a segment's batch index"""
+        return np.fromfile(_segment_path(self.directory, number, "idx"), dtype=INDEX_DTYPE)
+
+    def records(self, number: int) -> np.ndarray:
+        """Memory-map a segment's written records (read-only, zero-copy)"""
+        path = _segment_path(self.directory, number, "ticks")
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        index = self.index(number)
+        if len(index):
+            count = min(count, int(index["end"][-1]))
+        if not count:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def iter_batches(self, start_ns: Optional[int] = None,
+                     end_ns: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Yield record slices in time order, one per written batch
+
+        Args:
+            start_ns: Skip batches that start before this epoch-ns time
+            end_ns: Stop at the first batch starting at or after this time
+        """
+        for number in self.segments():
+            index = self.index(number)
+            if not len(index):
+                continue
+            if end_ns is not None and index["ts_ns"][0] >= end_ns:
+                return
+            if start_ns is not None and index["ts_ns"][-1] < start_ns:
+                continue
+            records = self.records(number)
+            first = 0 if start_ns is None else int(np.searchsorted(index["ts_ns"], start_ns))
+            for ts_ns, start, end in index[first:].tolist():
+                if end_ns is not None and ts_ns >= end_ns:
+                    return
+                if end > len(records):
+                    break
+                yield records[start:end]
+
+
+def _load_symbols(directory: str) -> List[str]:
+    """Read a recording's symbol names, or an empty list if it has none yet"""
+    try:
+        with open(os.path.join(directory, "symbols.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def _segment_numbers(directory: str) -> List[int]:
+    numbers = []
+    for path in glob.glob(os.path.join(directory, "segment-*.ticks")):
+        try:
+            numbers.append(int(os.path.basename(path)[8:14]))
+        except ValueError:
+            continue
+    return sorted(numbers)
@@ -0,0 +1,148 @@
+"""
+Quotestream Replay - Streams recorded ticks back at a chosen speed
+Reads a TickRecorder directory batch by batch (never the whole recording)
+and groups it into ticks of quotes plus the trades printed with them
+"""
+import time
+import logging
+import datetime
+import numpy as np
+from typing import Optional, Iterator, Tuple
+
+from quotestream_recorder import TickReader, KIND_QUOTE, RECORD_DTYPE
+
+logger = logging.getLogger("quotestream")
+
+
+def parse_speed(value: str) -> Optional[float]:
+    """
+    Parse a replay speed such as "1", "10", "10x" or "max"
+
+    Returns:
+        Speed multiplier, or None to replay as fast as possible
+    """
+    value = value.strip().lower().rstrip("x")
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("Replay speed must be positive")
+    return speed
+
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a replay bound given as epoch seconds or an ISO-8601 datetime
+
+    Returns:
+        Epoch nanoseconds, or None if no value was given
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = datetime.datetime.fromisoformat(value).timestamp()
+    return int(seconds * 1e9)
+
+
+class TickReplayer:
+    """
+    Paced iterator over the ticks of a recording.
+
+    At speed N, recorded time advances N times faster than wall-clock
+    time; with no speed ticks are yielded as fast as they can be consumed.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0,
+                 start_ns: Optional[int] = None, end_ns: Optional[int] = None):
+        """
+        Open a recording for replay
+
+        Args:
+            path: Recording directory
+            speed: Replay speed multiplier, or None for maximum speed
+            start_ns: Skip ticks before this epoch-ns time
+            end_ns: Stop at this epoch-ns time
+        """
+        self.reader = TickReader(path)
+        self.speed = speed
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.ticks_replayed = 0
+        self.records_replayed = 0
+
+    def symbol(self, symbol_id: int) -> str:
+        """Get the recorded name of a symbol id"""
+        self._check_ids(symbol_id)
+        return self.reader.symbols[symbol_id]
+
+    def _check_ids(self, max_id: int):
+        """
+        Make sure the symbol map covers an id, rereading it if the recording grew
+
+        Raises:
+            ValueError: If the map does not cover the id or changed mid-recording;
+                replaying would label ticks with the wrong symbols
+        """
+        if max_id < len(self.reader.symbols):
+            return
+        self.reader.reload_symbols()
+        if max_id >= len(self.reader.symbols):
+            raise ValueError(f"Recording {self.reader.directory} has symbol id {max_id} but only "
+                             f"{len(self.reader.symbols)} symbols in symbols.json")
+
+    def _ticks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Group batches into (quotes, trades) ticks, starting a tick at each quote batch"""
+        quotes, trades = [], []
+        for batch in self.reader.iter_batches(self.start_ns, self.end_ns):
+            # Copy out of the memory map; one batch is at most one tick
+            batch = np.array(batch)
+            if self.end_ns is not None:
+                batch = batch[batch["ts_ns"] < self.end_ns]
+            if len(batch):
+                self._check_ids(int(batch["symbol_id"].max()))
+            is_quote = batch["kind"] == KIND_QUOTE
+            if is_quote.any() and (quotes or trades):
+                yield _concat(quotes), _concat(trades)
+                quotes, trades = [], []
+            quotes.append(batch[is_quote])
+            trades.append(batch[~is_quote])
+        if quotes or trades:
+            yield _concat(quotes), _concat(trades)
+
+    def ticks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (quote records, trade records) per recorded tick, sleeping
+        between ticks to keep to the replay speed
+        """
+        first_ns = None
+        wall_start = time.monotonic()
+        for quotes, trades in self._ticks():
+            if not len(quotes) and not len(trades):
+                continue
+            ts_ns = int(quotes["ts_ns"][0] if len(quotes) else trades["ts_ns"][0])
+            if first_ns is None:
+                first_ns = ts_ns
+            if self.speed is not None:
+                delay = wall_start + (ts_ns - first_ns) / 1e9 / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.ticks_replayed += 1
+            self.records_replayed += len(quotes) + len(trades)
+            yield quotes, trades
+
+    def stats(self):
+        """Get replay counters for status endpoints"""
+        return {
+            "directory": self.reader.directory,
+            "speed": self.speed or "max",
+            "ticks_replayed": self.ticks_replayed,
+            "records_replayed": self.records_replayed
+        }
+
+
+def _concat(parts):
+    if not parts:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
@@ -0,0 +1,176 @@
+"""
+Quotestream Scheduler - Fixed-deadline periodic tasks for QuotestreamPY
+Runs each task on its own grid of deadlines (start + k * interval) so work
+time never stretches the period, and measures how late and how long each
+run is
+"""
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Any
+
+logger = logging.getLogger("quotestream")
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.1
+
+
+def parse_tiers(spec: str) -> Dict[str, float]:
+    """
+    Parse per-symbol update rates
+
+    Args:
+        spec: Tiers such as "20:SPY,QQQ;5:AAPL,MSFT" (rate in Hz, then symbols)
+
+    Returns:
+        Mapping of symbol to update rate in Hz
+    """
+    rates = {}
+    for tier in filter(None, (part.strip() for part in spec.split(";"))):
+        hz, _, symbols = tier.partition(":")
+        hz = float(hz)
+        if hz <= 0:
+            raise ValueError(f"Tier rate must be positive: {tier}")
+        for symbol in filter(None, (s.strip().upper() for s in symbols.split(","))):
+            rates[symbol] = hz
+    return rates
+
+
+class PeriodicTask:
+    """
+    One task on the scheduler with its timing counters.
+
+    ``scheduled`` is the deadline of the current run. When a run starts
+    more than a whole interval late the deadlines it missed are skipped,
+    not run back to back, and counted in ``missed``.
+    """
+
+    def __init__(self, name: str, interval: float, callback: Callable[["PeriodicTask"], Any],
+                 start: float):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.deadline = start
+        self.scheduled = start
+        self.runs = 0
+        self.missed = 0
+        self.overruns = 0
+        self.lag = 0.0
+        self.avg_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_duration = 0.0
+        self.max_duration = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the task's counters, with times in milliseconds"""
+        return {
+            "hz": round(1.0 / self.interval, 3),
+            "runs": self.runs,
+            "missed": self.missed,
+            "overruns": self.overruns,
+            "lag_ms": round(self.lag * 1000, 3),
+            "avg_lag_ms": round(self.avg_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "avg_duration_ms": round(self.avg_duration * 1000, 3),
+            "max_duration_ms": round(self.max_duration * 1000, 3)
+        }
+
+
+class TickScheduler:
+    """
+    Single-threaded scheduler for periodic tasks.
+
+    ``run_pending()`` sleeps until the earliest deadline and runs every
+    task that is due, earliest deadline first. A task overruns when one
+    run takes longer than its interval.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Any] = time.sleep):
+        """
+        Initialize the scheduler
+
+        Args:
+            clock: Monotonic clock in seconds
+            sleep: Function used to wait for the next deadline
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.start = clock()
+        self.tasks: Dict[str, PeriodicTask] = {}
+
+    def add(self, name: str, hz: float, callback: Callable[[PeriodicTask], Any],
+            offset: float = 0.0) -> PeriodicTask:
+        """
+        Add a periodic task
+
+        Args:
+            name: Unique task name
+            hz: Runs per second
+            callback: Called with the task on every run
+            offset: Seconds after the scheduler start of the first run
+
+        Returns:
+            The new task
+        """
+        if hz <= 0:
+            raise ValueError(f"Task rate must be positive: {name}")
+        task = PeriodicTask(name, 1.0 / hz, callback, self.start + offset)
+        self.tasks[name] = task
+        return task
+
+    def next_deadline(self) -> Optional[float]:
+        """Get the earliest deadline of any task"""
+        return min((task.deadline for task in self.tasks.values()), default=None)
+
+    def run_pending(self, block: bool = True) -> List[PeriodicTask]:
+        """
+        Run the tasks that are due
+
+        Args:
+            block: Sleep until the next deadline first if nothing is due yet
+
+        Returns:
+            The tasks that ran
+        """
+        deadline = self.next_deadline()
+        if deadline is None:
+            return []
+        if block:
+            delay = deadline - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+
+        now = self.clock()
+        due = sorted((task for task in self.tasks.values() if task.deadline <= now),
+                     key=lambda task: task.deadline)
+        for task in due:
+            started = self.clock()
+            lag = started - task.deadline
+            task.scheduled = task.deadline
+            task.deadline += task.interval
+            if task.deadline <= started:
+                skipped = int((started - task.deadline) // task.interval) + 1
+                task.missed += skipped
+                task.deadline += skipped * task.interval
+
+            task.runs += 1
+            task.lag = lag
+            task.avg_lag += EWMA_ALPHA * (lag - task.avg_lag)
+            task.max_lag = max(task.max_lag, lag)
+            try:
+                task.callback(task)
+            finally:
+                duration = self.clock() - started
+                task.avg_duration += EWMA_ALPHA * (duration - task.avg_duration)
+                task.max_duration = max(task.max_duration, duration)
+                if duration > task.interval:
+                    task.overruns += 1
+        return due
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-task timing counters for status endpoints"""
+        tasks = {name: task.stats() for name, task in self.tasks.items()}
+        return {
+            "lag_ms": max((t["lag_ms"] for t in tasks.values()), default=0.0),
+            "tasks": tasks
+        }
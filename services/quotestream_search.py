@@ -0,0 +1,228 @@
+"""
+Quotestream Symbol Search - Prebuilt prefix and trigram index for QuotestreamPY
+Loads a symbol universe from CSV or JSON and answers autocomplete queries
+with bisect over sorted symbols and names plus a trigram index for fuzzy
+company-name matches
+"""
+import csv
+import json
+import bisect
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+logger = logging.getLogger("quotestream")
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+# Minimum trigram similarity (shared / union) for a fuzzy name match
+MIN_SIMILARITY = 0.2
+
+# Accepted column names, first match wins
+_SYMBOL_COLUMNS = ("symbol", "ticker")
+_NAME_COLUMNS = ("name", "description", "company", "security name")
+_SECTOR_COLUMNS = ("sector", "industry")
+
+# Rank tiers, best first
+MATCH_EXACT, MATCH_SYMBOL_PREFIX, MATCH_NAME_PREFIX, MATCH_WORD_PREFIX, MATCH_FUZZY = range(5)
+
+
+def _pick(row: Dict[str, Any], columns: Tuple[str, ...]) -> str:
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def load_universe(path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Load a symbol universe file
+
+    CSV files need a header with a symbol (or ticker) column and optionally
+    name/description/company and sector/industry columns. JSON files hold
+    either a list of such objects or a mapping of symbol to an object or name.
+
+    Args:
+        path: Path to a .csv or .json file
+
+    Returns:
+        Mapping of symbol to {"name", "sector"}
+    """
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            rows = [dict(value, symbol=symbol) if isinstance(value, dict)
+                    else {"symbol": symbol, "name": value} for symbol, value in data.items()]
+        else:
+            rows = data
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    universe = {}
+    for row in rows:
+        row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+        symbol = _pick(row, _SYMBOL_COLUMNS).upper()
+        if symbol:
+            universe[symbol] = {"name": _pick(row, _NAME_COLUMNS),
+                                "sector": _pick(row, _SECTOR_COLUMNS) or "Unknown"}
+    logger.info(f"Loaded {len(universe)} symbols from {path}")
+    return universe
+
+
+def _words(text: str) -> List[str]:
+    return "".join(c if c.isalnum() else " " for c in text.lower()).split()
+
+
+def _trigrams(text: str, partial_last: bool = False) -> List[str]:
+    """
+    Trigrams of each word padded with two leading spaces and one trailing space
+
+    With ``partial_last`` the last word gets no trailing space, so a word
+    still being typed matches longer words it is a prefix of.
+    """
+    words = _words(text)
+    grams = set()
+    for i, word in enumerate(words):
+        padded = "  " + word + ("" if partial_last and i == len(words) - 1 else " ")
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return sorted(grams)
+
+
+class SymbolIndex:
+    """
+    Read-only search index over a symbol universe.
+
+    Symbols and lower-cased names are kept in sorted arrays for bisect
+    prefix lookups, every name word in another sorted array, and each name
+    trigram maps to the array of entries containing it. Results are ranked:
+    exact symbol, symbol prefix, name prefix, name word prefix, then fuzzy
+    name matches by trigram similarity.
+    """
+
+    def __init__(self, universe: Dict[str, Dict[str, str]]):
+        """
+        Build the index
+
+        Args:
+            universe: Mapping of symbol to {"name", "sector"}
+        """
+        self.entries: List[Tuple[str, str, str]] = sorted(
+            (symbol.upper(), info.get("name", ""), info.get("sector", "Unknown"))
+            for symbol, info in universe.items())
+        self.symbols = [symbol for symbol, _, _ in self.entries]
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        names = sorted((name.lower(), i) for i, (_, name, _) in enumerate(self.entries) if name)
+        self._names = [name for name, _ in names]
+        self._name_ids = [i for _, i in names]
+
+        words = sorted({(word, i) for i, (_, name, _) in enumerate(self.entries) for word in _words(name)})
+        self._words = [word for word, _ in words]
+        self._word_ids = [i for _, i in words]
+
+        postings: Dict[str, List[int]] = {}
+        self._trigram_counts = np.zeros(len(self.entries), dtype=np.int32)
+        for i, (_, name, _) in enumerate(self.entries):
+            grams = _trigrams(name)
+            self._trigram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._symbol_index
+
+    def get(self, symbol: str) -> Optional[Dict[str, str]]:
+        """Get {"name", "sector"} for a symbol, or None if it is not in the universe"""
+        i = self._symbol_index.get(symbol.upper())
+        if i is None:
+            return None
+        _, name, sector = self.entries[i]
+        return {"name": name, "sector": sector}
+
+    @staticmethod
+    def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+        start = bisect.bisect_left(keys, prefix)
+        return start, bisect.bisect_left(keys, prefix + "\uffff", start)
+
+    def _fuzzy(self, query: str) -> List[Tuple[float, int]]:
+        """Score entries by trigram similarity to the query, best first"""
+        grams = _trigrams(query, partial_last=True)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.entries))
+        candidates = np.flatnonzero(shared)
+        similarity = shared[candidates] / (len(grams) + self._trigram_counts[candidates] - shared[candidates])
+        keep = similarity >= MIN_SIMILARITY
+        candidates, similarity = candidates[keep], similarity[keep]
+        order = np.lexsort((candidates, -similarity))
+        return list(zip(similarity[order].tolist(), candidates[order].tolist()))
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Find symbols for an autocomplete query
+
+        Args:
+            query: Symbol or company name fragment
+            limit: Maximum number of results
+
+        Returns:
+            Ranked results with symbol, description, sector and match type
+        """
+        query = query.strip()
+        if not query:
+            return []
+        limit = max(1, min(limit, MAX_LIMIT))
+        upper, lower = query.upper(), query.lower()
+
+        ranked: Dict[int, Tuple[int, float]] = {}
+
+        def add(ids: Iterable[int], tier: int, scores: Optional[List[float]] = None):
+            for n, i in enumerate(ids):
+                if len(ranked) >= limit:
+                    return
+                if i not in ranked:
+                    ranked[i] = (tier, scores[n] if scores else 0.0)
+
+        exact = self._symbol_index.get(upper)
+        if exact is not None:
+            add([exact], MATCH_EXACT)
+
+        # Shorter symbols first: "A" before "AA" before "AAPL"
+        start, end = self._prefix_range(self.symbols, upper)
+        if start < end:
+            prefixed = range(start, min(end, start + 4 * limit))
+            add(sorted(prefixed, key=lambda i: len(self.symbols[i])), MATCH_SYMBOL_PREFIX)
+
+        start, end = self._prefix_range(self._names, lower)
+        add(self._name_ids[start:min(end, start + limit)], MATCH_NAME_PREFIX)
+
+        if " " not in lower:
+            start, end = self._prefix_range(self._words, lower)
+            add(self._word_ids[start:min(end, start + 4 * limit)], MATCH_WORD_PREFIX)
+
+        # One or two letters are already covered by the prefix tiers
+        if len(ranked) < limit and len(lower) >= 3:
+            matches = self._fuzzy(query)
+            add([i for _, i in matches], MATCH_FUZZY, [s for s, _ in matches])
+
+        results = []
+        for i, (tier, score) in ranked.items():
+            symbol, name, sector = self.entries[i]
+            results.append({
+                "symbol": symbol,
+                "description": name,
+                "sector": sector,
+                "match": ("exact", "symbol", "name", "word", "fuzzy")[tier],
+                "score": round(score, 3) if tier == MATCH_FUZZY else 1.0
+            })
+        return results
+
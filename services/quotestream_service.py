@@ -4,6 +4,7 @@ Provides real-time and historical market data via a REST API and WebSocket
 """
 import os
 import json
+import argparse
 import logging
 import time
 import random
@@ -11,9 +12,28 @@ import threading
 import datetime
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
 import numpy as np
 from typing import Dict, List, Optional, Any
+from quotestream_engine import (TickEngine, F_LAST, F_BID, F_ASK, F_TS,
+                                I_BID_SIZE, I_ASK_SIZE, I_VOLUME)
+from quotestream_options import build_option_chain, simulated_market_chain
+from quotestream_volsurface import SurfaceCache, DEFAULT_REFIT_THRESHOLD, DEFAULT_MAX_AGE
+from quotestream_subscriptions import (SubscriptionManager, room_name, ROOM_CHANNELS,
+                                       CHANNEL_ROOM, CHANNEL_DELTA_MSGPACK, CHANNEL_BATCH)
+from quotestream_batching import BatchCoalescer, BATCH_DELTA_ROOM
+from quotestream_delta import DeltaEncoder, pack, MSGPACK_AVAILABLE
+from quotestream_tape import TradeTapes, EXCHANGES, CONDITIONS, EXCHANGE_CODES, CONDITION_CODES
+from quotestream_book import OrderBook
+from quotestream_store import SnapshotStore
+from quotestream_recorder import TickRecorder, DEFAULT_SEGMENT_RECORDS
+from quotestream_replay import TickReplayer, parse_speed, parse_time
+from quotestream_scheduler import TickScheduler, parse_tiers
+from quotestream_search import SymbolIndex, load_universe, DEFAULT_LIMIT
+from quotestream_profile import VolumeProfiles, DEFAULT_BIN_BPS, DEFAULT_VALUE_AREA, DEFAULT_NODES
+from quotestream_board import QuoteBoard, DEFAULT_BOARD_NAME, DEFAULT_CAPACITY
+from socketio_backpressure import (BackpressureManager, transport_backlog,
+                                   DEFAULT_HIGH_WATER, DEFAULT_LOW_WATER)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -28,6 +48,78 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Default port for the service
 DEFAULT_PORT = int(os.getenv("QUOTESTREAM_PORT", 3000))
 
+# Quote update rates in Hz per symbol tier ("hz:SYM,SYM;hz:SYM") and for everything else
+QUOTE_TIERS = parse_tiers(os.getenv("QUOTESTREAM_QUOTE_TIERS",
+                                    "20:SPY;5:AAPL,MSFT,AMZN,GOOG,TSLA,META,NVDA,AMD,INTC"))
+DEFAULT_QUOTE_HZ = float(os.getenv("QUOTESTREAM_DEFAULT_QUOTE_HZ", 1))
+
+# Update rates in Hz of the other periodic tasks
+DEPTH_HZ = float(os.getenv("QUOTESTREAM_DEPTH_HZ", 5))
+TRADE_HZ = float(os.getenv("QUOTESTREAM_TRADE_HZ", 2))
+OPTIONS_HZ = float(os.getenv("QUOTESTREAM_OPTIONS_HZ", 0.5))
+STATUS_INTERVAL = float(os.getenv("QUOTESTREAM_STATUS_INTERVAL", 20))
+
+# Simulator seed (unset draws a fresh one), default price process and
+# simulated market seconds per wall-clock second
+SIM_SEED = int(os.environ["QUOTESTREAM_SEED"]) if os.getenv("QUOTESTREAM_SEED") else None
+SIM_PROCESS = os.getenv("QUOTESTREAM_SIM_PROCESS", "jump")
+SIM_TIME_SCALE = float(os.getenv("QUOTESTREAM_SIM_TIME_SCALE", 60))
+
+# Watchlist symbols nobody is subscribed to, and symbols only looked up over REST or
+# the quote board, only update on every Nth run of a task
+IDLE_UPDATE_TICKS = int(os.getenv("QUOTESTREAM_IDLE_UPDATE_TICKS", 10))
+
+# Shard worker processes simulating quotes (quotestream_shard.py, started by
+# run_services.py); 0 simulates everything in this process
+SHARDS = int(os.getenv("QUOTESTREAM_SHARDS", 0))
+
+# Shared-memory quote board other local processes read quotes from; an
+# empty name disables it unless sharded
+BOARD_NAME = os.getenv("QUOTESTREAM_BOARD_NAME", DEFAULT_BOARD_NAME)
+BOARD_CAPACITY = int(os.getenv("QUOTESTREAM_BOARD_CAPACITY", DEFAULT_CAPACITY))
+BOARD_HZ = float(os.getenv("QUOTESTREAM_BOARD_HZ", max(QUOTE_TIERS.values(), default=DEFAULT_QUOTE_HZ)))
+
+# Minimum interval between market_batch frames; 0 sends one frame per tick
+BATCH_FLUSH_MS = int(os.getenv("QUOTESTREAM_BATCH_FLUSH_MS", 0))
+
+# Client queue depths (Engine.IO packets) at which a client is treated as slow and
+# as caught up, how often they are checked, and how long a client may stay slow
+# before it is disconnected (0 never)
+CLIENT_HIGH_WATER = int(os.getenv("QUOTESTREAM_CLIENT_HIGH_WATER", DEFAULT_HIGH_WATER))
+CLIENT_LOW_WATER = int(os.getenv("QUOTESTREAM_CLIENT_LOW_WATER", DEFAULT_LOW_WATER))
+BACKPRESSURE_HZ = float(os.getenv("QUOTESTREAM_BACKPRESSURE_HZ", 10))
+CLIENT_MAX_SLOW_SECONDS = float(os.getenv("QUOTESTREAM_CLIENT_MAX_SLOW_SECONDS", 120))
+
+# Relative underlying move and age in seconds after which a symbol's implied
+# volatility surface is fitted again; option chains are priced off it in between
+SURFACE_REFIT_THRESHOLD = float(os.getenv("QUOTESTREAM_SURFACE_REFIT_THRESHOLD", DEFAULT_REFIT_THRESHOLD))
+SURFACE_MAX_AGE = float(os.getenv("QUOTESTREAM_SURFACE_MAX_AGE", DEFAULT_MAX_AGE))
+
+# Numeric range filters accepted by /api/options
+OPTION_RANGE_FILTERS = ("strike_min", "strike_max", "moneyness_min", "moneyness_max",
+                        "delta_min", "delta_max")
+
+# Data kinds served by /api/snapshot, and the ones returned when none are named
+SNAPSHOT_FIELDS = ("quote", "depth", "trades", "options")
+SNAPSHOT_DEFAULT_FIELDS = ("quote", "depth", "trades")
+
+# Optional CSV or JSON file of searchable symbols (symbol, name, sector columns)
+UNIVERSE_PATH = os.getenv("QUOTESTREAM_UNIVERSE", "")
+
+# Number of recent trades kept per symbol
+TAPE_CAPACITY = int(os.getenv("QUOTESTREAM_TAPE_CAPACITY", 1000))
+
+# Volume profile bin width in basis points of each symbol's first traded price
+PROFILE_BIN_BPS = float(os.getenv("QUOTESTREAM_PROFILE_BIN_BPS", DEFAULT_BIN_BPS))
+
+# Price levels simulated on each side of every order book
+DEPTH_LEVELS = int(os.getenv("QUOTESTREAM_DEPTH_LEVELS", 50))
+
+# Directory to record generated quotes and trades into; empty disables recording
+RECORD_DIR = os.getenv("QUOTESTREAM_RECORD_DIR", "")
+RECORD_SEGMENT_RECORDS = int(os.getenv("QUOTESTREAM_RECORD_SEGMENT_RECORDS", DEFAULT_SEGMENT_RECORDS))
+RECORD_MAX_SEGMENTS = int(os.getenv("QUOTESTREAM_RECORD_MAX_SEGMENTS", 0))
+
 # Sample stock data
 SAMPLE_STOCKS = {
     "AAPL": {"name": "Apple Inc.", "sector": "Technology"},
@@ -42,12 +134,20 @@ SAMPLE_STOCKS = {
     "SPY": {"name": "SPDR S&P 500 ETF Trust", "sector": "ETF"}
 }
 
-# In-memory data store
-quotes = {}
-depth_data = {}
-trades = {}
-options_data = {}
-watchlist = list(SAMPLE_STOCKS.keys())[:5]  # Default watchlist with 5 stocks
+# Symbol metadata: the universe file plus the sample stocks, indexed for search
+STOCK_INFO = load_universe(UNIVERSE_PATH) if UNIVERSE_PATH else {}
+STOCK_INFO.update(SAMPLE_STOCKS)
+symbol_index = SymbolIndex(STOCK_INFO)
+
+# In-memory data store, written by the update thread (or under store.lock)
+books = {}  # symbol -> incremental L2 order book
+trades = TradeTapes(TAPE_CAPACITY)  # symbol -> ring buffer of recent trades
+profiles = VolumeProfiles(PROFILE_BIN_BPS)  # symbol -> session volume at price
+vol_surfaces = SurfaceCache(SURFACE_REFIT_THRESHOLD, SURFACE_MAX_AGE)  # symbol -> fitted IV surface
+
+# Immutable per-tick snapshots that request handlers read without locking
+store = SnapshotStore()
+store.publish(watchlist=list(SAMPLE_STOCKS.keys())[:5])  # Default watchlist with 5 stocks
 
 # Service status
 running = True
@@ -67,130 +167,110 @@ base_prices = {
     "SPY": 510.0
 }
 
+# Vectorized quote state for every simulated symbol; quotes are built lazily
+tick_engine = TickEngine(STOCK_INFO, base_prices, seed=SIM_SEED, process=SIM_PROCESS)
+
+# Trades and option chains draw from the random module
+if SIM_SEED is not None:
+    random.seed(SIM_SEED)
+quotes = tick_engine.quotes
+
+# Per-symbol Socket.IO room subscriptions
+subscriptions = SubscriptionManager()
+
+# Pending updates for clients that opted into market_batch frames
+batcher = BatchCoalescer(flush_interval=BATCH_FLUSH_MS / 1000.0)
+
+# Last quote fields sent per delta room (or per batch client session)
+delta_encoder = DeltaEncoder()
+
+# Slow clients are skipped by room broadcasts and resynced per symbol once caught up
+backpressure = BackpressureManager(lambda sid: transport_backlog(socketio.server, sid),
+                                   CLIENT_HIGH_WATER, CLIENT_LOW_WATER,
+                                   max_slow_seconds=CLIENT_MAX_SLOW_SECONDS)
+
+# Tick recorder, opened by the update thread when RECORD_DIR is set
+recorder = None
+
+# Recording being replayed instead of the simulator (main --replay)
+replayer = None
+
+# Periodic task scheduler of the update (or replay) thread
+scheduler = None
+
+# Shared-memory quote board, and the board sequence number of each row as
+# of the last read of what the shard workers wrote
+board = None
+board_seen = None
+
+# Tick engine rows already offered to the board, so symbols that did not fit
+# on a full board are reported once
+board_offered = 0
+
 # Market trend simulation
 market_trend = 0.0  # -1.0 to 1.0, negative is bearish, positive is bullish
-trend_change_time = time.time()
 
 def update_market_trend():
-    """Update the overall market trend periodically"""
-    global market_trend, trend_change_time
+    """Follow the simulator's market regime, which switches at seeded random times"""
+    global market_trend
     
-    # Change market trend every 5-15 minutes
-    now = time.time()
-    if now - trend_change_time > random.randint(300, 900):
-        # Gradual trend shift with some randomness
-        market_trend = max(-1.0, min(1.0, market_trend + random.uniform(-0.3, 0.3)))
-        trend_change_time = now
-        logger.info(f"Market trend updated to {market_trend:.2f}")
+    trend = tick_engine.market_trend
+    if trend != market_trend:
+        market_trend = trend
+        logger.info(f"Market trend updated to {market_trend:.2f} ({tick_engine.simulator.market_regime})")
+
+def seed_symbol(symbol):
+    """
+    Make sure a symbol has a published quote, order book, trades and option chain
+    
+    Args:
+        symbol: The stock symbol
+        
+    Returns:
+        The current snapshot, which includes the symbol
+    """
+    # Quotes cover every tick engine symbol; the order book is only added here
+    snapshot = store.current
+    if symbol in snapshot.depth:
+        return snapshot
+    
+    with store.lock:
+        snapshot = store.current
+        if symbol in snapshot.depth:
+            return snapshot
+        tick_engine.add_symbol(symbol)
+        if board is not None:
+            _register_board_symbols()
+        if replayer is None:
+            # A replay only shows recorded trades
+            for _ in range(10):
+                generate_trade(symbol)
+        return store.publish(quotes=tick_engine.frame(), moved=[symbol],
+                             depth={symbol: order_book(symbol)},
+                             trades={symbol: trades[symbol].count},
+                             options={symbol: generate_option_chain(symbol)})
 
 def generate_quote(symbol):
-    """Generate a simulated market quote for a symbol"""
-    global base_prices
-    
-    if symbol not in base_prices:
-        base_prices[symbol] = random.uniform(10, 500)
-    
-    base_price = base_prices[symbol]
-    
-    # Apply market trend influence
-    trend_factor = 1.0 + (market_trend * random.uniform(0.0001, 0.001))
-    
-    # Apply individual stock movement
-    stock_factor = 1.0 + random.uniform(-0.002, 0.002)
-    
-    # Calculate new price with a small random movement
-    new_price = base_price * trend_factor * stock_factor
-    
-    # Update base price with some mean reversion
-    base_prices[symbol] = base_price * 0.9995 + new_price * 0.0005
-    
-    # Create previous close
-    prev_close = base_price * (1.0 + random.uniform(-0.02, 0.02))
-    
-    # Calculate change
-    change = new_price - prev_close
-    change_percent = (change / prev_close) * 100.0
-    
-    # Generate bid/ask spread
-    spread = new_price * random.uniform(0.0005, 0.002)
-    bid = new_price - (spread / 2)
-    ask = new_price + (spread / 2)
-    
-    # Volume
-    volume = int(random.uniform(10000, 10000000))
-    
-    # Time
-    timestamp = datetime.datetime.now().isoformat()
-    
-    return {
-        "symbol": symbol,
-        "description": SAMPLE_STOCKS.get(symbol, {}).get("name", f"{symbol} Stock"),
-        "last": round(new_price, 2),
-        "bid": round(bid, 2),
-        "ask": round(ask, 2),
-        "bid_size": int(random.uniform(100, 2000)),
-        "ask_size": int(random.uniform(100, 2000)),
-        "volume": volume,
-        "open": round(prev_close * (1.0 + random.uniform(-0.01, 0.01)), 2),
-        "high": round(new_price * (1.0 + random.uniform(0.001, 0.02)), 2),
-        "low": round(new_price * (1.0 - random.uniform(0.001, 0.02)), 2),
-        "prev_close": round(prev_close, 2),
-        "change": round(change, 2),
-        "change_percent": round(change_percent, 2),
-        "sector": SAMPLE_STOCKS.get(symbol, {}).get("sector", "Unknown"),
-        "vwap": round(new_price * (1.0 + random.uniform(-0.005, 0.005)), 2),
-        "timestamp": timestamp
-    }
+    """Get the current simulated market quote for a symbol"""
+    return seed_symbol(symbol).quotes[symbol]
+
+def order_book(symbol):
+    """Get the L2 order book for a symbol, seeding it around the last price on first use"""
+    book = books.get(symbol)
+    if book is None:
+        book = OrderBook(symbol, levels=DEPTH_LEVELS)
+        book.simulate(tick_engine.last_price(symbol), tick_engine.rng)
+        book.drain_changes()
+        book = books.setdefault(symbol, book)
+    return book
 
 def generate_market_depth(symbol):
-    """Generate simulated market depth data for a symbol"""
-    if symbol not in quotes:
-        quotes[symbol] = generate_quote(symbol)
-    
-    quote = quotes[symbol]
-    last_price = quote["last"]
-    
-    bids = []
-    asks = []
-    
-    # Generate bid levels
-    for i in range(10):
-        price_delta = (i + 1) * random.uniform(0.01, 0.05)
-        price = round(last_price - price_delta, 2)
-        size = int(random.uniform(100, 5000))
-        bids.append({
-            "price": price,
-            "size": size,
-            "exchange": random.choice(["NSDQ", "NYSE", "ARCA", "BATS"]),
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-    
-    # Generate ask levels
-    for i in range(10):
-        price_delta = (i + 1) * random.uniform(0.01, 0.05)
-        price = round(last_price + price_delta, 2)
-        size = int(random.uniform(100, 5000))
-        asks.append({
-            "price": price,
-            "size": size,
-            "exchange": random.choice(["NSDQ", "NYSE", "ARCA", "BATS"]),
-            "timestamp": datetime.datetime.now().isoformat()
-        })
-    
-    return {
-        "symbol": symbol,
-        "bids": sorted(bids, key=lambda x: x["price"], reverse=True),
-        "asks": sorted(asks, key=lambda x: x["price"]),
-        "timestamp": datetime.datetime.now().isoformat()
-    }
-
-def generate_trade(symbol):
-    """Generate a simulated trade for a symbol"""
-    if symbol not in quotes:
-        quotes[symbol] = generate_quote(symbol)
-    
-    quote = quotes[symbol]
-    last_price = quote["last"]
+    """Get the current market depth for a symbol from its order book"""
+    return seed_symbol(symbol).depth[symbol].snapshot()
+
+def generate_trade(symbol, now=None):
+    """Generate a simulated trade for a symbol and record it on the symbol's tape"""
+    last_price = round(tick_engine.last_price(symbol), 2)
     
     # Small variation around last price
     price = round(last_price * (1.0 + random.uniform(-0.001, 0.001)), 2)
@@ -212,299 +292,234 @@ def generate_trade(symbol):
     # Conditions
     conditions = random.choice(["", "Regular", "Odd Lot", "Outside Regular Hours"])
     
-    # Timestamp
-    timestamp = datetime.datetime.now().isoformat()
-    
-    return {
-        "symbol": symbol,
-        "price": price,
-        "size": size,
-        "price_change": price_change,
-        "exchange": exchange,
-        "conditions": conditions,
-        "timestamp": timestamp
-    }
+    now = time.time() if now is None else now
+    return print_trade(symbol, now, price, size, price_change, exchange, conditions)
+
+def print_trade(symbol, ts, price, size, price_change, exchange, conditions):
+    """Record a trade on the symbol's tape and volume profile"""
+    profiles[symbol].add(price, size)
+    return trades[symbol].append(ts, price, size, price_change, exchange, conditions)
 
 def generate_option_chain(symbol):
-    """Generate a simulated options chain for a symbol"""
-    if symbol not in quotes:
-        quotes[symbol] = generate_quote(symbol)
-    
-    quote = quotes[symbol]
-    underlying_price = quote["last"]
-    
-    chain = {
-        "symbol": symbol,
-        "underlying_price": underlying_price,
-        "expirations": [],
-        "strikes": [],
-        "calls": [],
-        "puts": []
-    }
-    
-    # Generate expirations (weekly and monthly)
-    today = datetime.date.today()
-    
-    # Next 4 weekly expirations (Fridays)
-    for i in range(1, 5):
-        days_until_friday = (4 - today.weekday()) % 7  # 4 = Friday
-        friday = today + datetime.timedelta(days=days_until_friday + (i-1)*7)
-        chain["expirations"].append(friday.strftime("%Y-%m-%d"))
-    
-    # Next 3 monthly expirations (3rd Friday of each month)
-    for i in range(1, 4):
-        # Find the first day of next month
-        if today.month + i > 12:
-            year = today.year + (today.month + i - 1) // 12
-            month = (today.month + i - 1) % 12 + 1
-        else:
-            year = today.year
-            month = today.month + i
-        
-        first_day = datetime.date(year, month, 1)
+    """
+    Generate a simulated options chain for a symbol
+    
+    Contracts are priced off the symbol's cached volatility surface. Once
+    the underlying has moved past the refit threshold, a chain of simulated
+    market quotes is built around the symbol's current process volatility,
+    with skew and term structure, and the surface is fitted from it again.
+    """
+    underlying_price = round(tick_engine.last_price(symbol), 2)
+    surface = vol_surfaces.get(symbol, underlying_price)
+    if surface is None:
+        market = simulated_market_chain(symbol, underlying_price, tick_engine.volatility(symbol),
+                                        rng=tick_engine.rng)
+        surface = vol_surfaces.fit(market)
+    return build_option_chain(symbol, underlying_price, rng=tick_engine.rng, surface=surface)
+
+def generate_volume_analysis(symbol, value_area=DEFAULT_VALUE_AREA, nodes=DEFAULT_NODES,
+                             include_histogram=False):
+    """Get VWAP, POC, value area and volume-node levels from a symbol's traded volume profile"""
+    quote = generate_quote(symbol)
+    analysis = profiles[symbol].analysis(quote["last"], value_area, nodes, include_histogram)
+    analysis["timestamp"] = datetime.datetime.now().isoformat()
+    return analysis
+
+def _record_quotes(rows):
+    """Append the current quotes of some rows to the recording"""
+    recorder.sync_symbols(tick_engine.symbols)
+    floats = tick_engine.floats[rows]
+    ints = tick_engine.ints[rows]
+    recorder.record_quotes(rows, (floats[:, F_TS] * 1e9).astype(np.int64),
+                           floats[:, F_LAST], floats[:, F_BID], floats[:, F_ASK],
+                           ints[:, I_BID_SIZE], ints[:, I_ASK_SIZE], ints[:, I_VOLUME])
+
+def _record_trades(symbols, new_trades, now):
+    """Append one new trade per symbol to the recording"""
+    recorder.sync_symbols(tick_engine.symbols)
+    now_ns = int(now * 1e9)
+    index = tick_engine.index
+    recorder.record_trades([(index[symbol], now_ns, trade["price"], trade["size"], trade["price_change"],
+                             EXCHANGE_CODES[trade["exchange"]] | CONDITION_CODES[trade["conditions"]] << 8)
+                            for symbol, trade in zip(symbols, new_trades)])
+
+def _due_symbols(task, symbols):
+    """
+    Pick the symbols a task run should update, seeding any added since the last run
+    
+    Subscribed symbols update on every run; the rest only on every
+    IDLE_UPDATE_TICKS-th run so REST reads stay fresh.
+    """
+    if task.runs % IDLE_UPDATE_TICKS == 0:
+        symbols = list(symbols)
+    else:
+        symbols = [s for s in symbols if subscriptions.is_active(s)]
+    for symbol in symbols:
+        seed_symbol(symbol)
+    return symbols
+
+def update_quotes(task, hz):
+    """Advance the quotes of the symbols in one update-rate tier; off-watchlist symbols at the idle rate"""
+    with store.lock:
+        watchlist = store.current.watchlist
+        tier = [s for s in watchlist if QUOTE_TIERS.get(s, DEFAULT_QUOTE_HZ) == hz]
+        symbols = _due_symbols(task, tier)
+        if task.runs % IDLE_UPDATE_TICKS == 0:
+            # Symbols seeded by a REST or quote board lookup are off the watchlist but
+            # on the board, where readers take their price from; keep them moving too
+            on_watchlist = set(watchlist)
+            symbols += [s for s in tick_engine.symbols
+                        if s not in on_watchlist and QUOTE_TIERS.get(s, DEFAULT_QUOTE_HZ) == hz]
         
-        # Find the third Friday
-        days_until_friday = (4 - first_day.weekday()) % 7  # 4 = Friday
-        third_friday = first_day + datetime.timedelta(days=days_until_friday + 14)  # +14 for third friday
+        # Simulated time follows the task deadlines, so a seeded run is reproducible
+        sim_clock = (task.scheduled - scheduler.start) * SIM_TIME_SCALE
+        rows = tick_engine.rows(symbols)
+        tick_engine.step(rows, sim_clock - tick_engine.simulator.clock)
         
-        chain["expirations"].append(third_friday.strftime("%Y-%m-%d"))
-    
-    # Generate strikes (around current price)
-    min_strike = underlying_price * 0.7
-    max_strike = underlying_price * 1.3
-    step = underlying_price * 0.025  # 2.5% increments
-    
-    strikes = []
-    current_strike = min_strike
-    while current_strike <= max_strike:
-        strikes.append(round(current_strike, 2))
-        current_strike += step
-    
-    chain["strikes"] = strikes
-    
-    # Generate option contracts
-    for expiration in chain["expirations"]:
-        for strike in chain["strikes"]:
-            # Calculate days to expiration
-            exp_date = datetime.datetime.strptime(expiration, "%Y-%m-%d").date()
-            days_to_exp = (exp_date - today).days
-            
-            # Call option
-            call_price = _calculate_option_price(underlying_price, strike, days_to_exp/365.0, 0.3, 0.02, "call")
-            call_volume = int(random.uniform(10, 5000))
-            call_open_interest = int(call_volume * random.uniform(1.0, 10.0))
-            
-            call = {
-                "symbol": f"{symbol}{exp_date.strftime('%y%m%d')}C{int(strike*100):08d}",
-                "underlying": symbol,
-                "expiration": expiration,
-                "strike": strike,
-                "type": "call",
-                "last": round(call_price, 2),
-                "bid": round(call_price * 0.95, 2),
-                "ask": round(call_price * 1.05, 2),
-                "volume": call_volume,
-                "open_interest": call_open_interest,
-                "implied_volatility": round(random.uniform(0.2, 0.6), 2),
-                "delta": round(random.uniform(0.1, 0.9), 2),
-                "gamma": round(random.uniform(0.01, 0.2), 3),
-                "theta": round(random.uniform(-0.1, -0.01), 3),
-                "vega": round(random.uniform(0.01, 0.2), 3),
-                "days_to_expiration": days_to_exp
-            }
-            
-            # Put option
-            put_price = _calculate_option_price(underlying_price, strike, days_to_exp/365.0, 0.3, 0.02, "put")
-            put_volume = int(random.uniform(10, 5000))
-            put_open_interest = int(put_volume * random.uniform(1.0, 10.0))
-            
-            put = {
-                "symbol": f"{symbol}{exp_date.strftime('%y%m%d')}P{int(strike*100):08d}",
-                "underlying": symbol,
-                "expiration": expiration,
-                "strike": strike,
-                "type": "put",
-                "last": round(put_price, 2),
-                "bid": round(put_price * 0.95, 2),
-                "ask": round(put_price * 1.05, 2),
-                "volume": put_volume,
-                "open_interest": put_open_interest,
-                "implied_volatility": round(random.uniform(0.2, 0.6), 2),
-                "delta": round(random.uniform(-0.9, -0.1), 2),
-                "gamma": round(random.uniform(0.01, 0.2), 3),
-                "theta": round(random.uniform(-0.1, -0.01), 3),
-                "vega": round(random.uniform(0.01, 0.2), 3),
-                "days_to_expiration": days_to_exp
-            }
-            
-            chain["calls"].append(call)
-            chain["puts"].append(put)
-    
-    return chain
+        for symbol in symbols:
+            if subscriptions.is_active(symbol):
+                _fan_out(symbol, quote=True)
+        if recorder is not None:
+            _record_quotes(rows)
+        if board is not None:
+            _write_board(rows)
+        store.publish(quotes=tick_engine.frame(), moved=symbols)
 
-def _calculate_option_price(spot, strike, time_to_exp, volatility, risk_free_rate, option_type):
-    """Simplified Black-Scholes option pricing"""
-    # This is a very simplified version of Black-Scholes
-    # In a real scenario, use a proper options pricing library
-    
-    if time_to_exp < 0.01:  # Avoid calculation issues for near-expiry options
-        time_to_exp = 0.01
-    
-    # Calculate d1 and d2
-    d1 = (np.log(spot/strike) + (risk_free_rate + 0.5 * volatility**2) * time_to_exp) / (volatility * np.sqrt(time_to_exp))
-    d2 = d1 - volatility * np.sqrt(time_to_exp)
-    
-    # Normal CDF approximation
-    def norm_cdf(x):
-        return 0.5 * (1 + np.tanh(np.sqrt(2/np.pi) * x * (0.044715 * x * x + 1)))
-    
-    if option_type.lower() == "call":
-        price = spot * norm_cdf(d1) - strike * np.exp(-risk_free_rate * time_to_exp) * norm_cdf(d2)
-    else:  # put
-        price = strike * np.exp(-risk_free_rate * time_to_exp) * norm_cdf(-d2) - spot * norm_cdf(-d1)
-    
-    return max(0.01, price)  # Minimum price of 0.01
+def update_depth(task):
+    """Move the order books with the price; only changed levels are sent"""
+    with store.lock:
+        for symbol in _due_symbols(task, store.current.watchlist):
+            book = order_book(symbol)
+            book.simulate(tick_engine.last_price(symbol), tick_engine.rng)
+            depth_delta = book.drain_changes()
+            if depth_delta and subscriptions.is_active(symbol):
+                _fan_out(symbol, depth_delta=depth_delta)
 
-def generate_volume_analysis(symbol):
-    """Generate simulated volume analysis data for a symbol"""
-    if symbol not in quotes:
-        quotes[symbol] = generate_quote(symbol)
-    
-    quote = quotes[symbol]
-    
-    # Daily VWAP
-    vwap = quote.get("vwap", quote["last"])
-    
-    # Price levels with volume concentration
-    levels = []
-    
-    # Add current price area
-    levels.append({
-        "price": round(quote["last"], 2),
-        "volume": int(quote["volume"] * random.uniform(0.1, 0.3)),
-        "type": "current"
-    })
-    
-    # Add support levels (below current price)
-    for i in range(random.randint(2, 4)):
-        price = round(quote["last"] * (1 - random.uniform(0.02, 0.1) * (i+1)), 2)
-        volume = int(quote["volume"] * random.uniform(0.05, 0.2))
-        levels.append({
-            "price": price,
-            "volume": volume,
-            "type": "support"
-        })
-    
-    # Add resistance levels (above current price)
-    for i in range(random.randint(2, 4)):
-        price = round(quote["last"] * (1 + random.uniform(0.02, 0.1) * (i+1)), 2)
-        volume = int(quote["volume"] * random.uniform(0.05, 0.2))
-        levels.append({
-            "price": price,
-            "volume": volume,
-            "type": "resistance"
-        })
-    
-    # Sort by price
-    levels.sort(key=lambda x: x["price"])
-    
-    return {
-        "symbol": symbol,
-        "vwap": vwap,
-        "total_volume": quote["volume"],
-        "levels": levels,
-        "timestamp": datetime.datetime.now().isoformat()
-    }
+def update_trades(task):
+    """Print one trade per symbol; the tape overwrites its oldest entry when full"""
+    with store.lock:
+        symbols = _due_symbols(task, store.current.watchlist)
+        now = time.time()
+        new_trades = []
+        for symbol in symbols:
+            new_trade = generate_trade(symbol, now)
+            new_trades.append(new_trade)
+            if subscriptions.is_active(symbol):
+                _fan_out(symbol, new_trades=[new_trade])
+        if recorder is not None:
+            _record_trades(symbols, new_trades, now)
+        store.publish(trades={s: trades[s].count for s in symbols})
+
+def update_options(task):
+    """Rebuild option chains around the current prices"""
+    with store.lock:
+        symbols = _due_symbols(task, store.current.watchlist)
+        store.publish(options={s: generate_option_chain(s) for s in symbols})
+
+def _register_board_symbols():
+    """Put symbols added to the tick engine since the last call on the quote board"""
+    global board_offered
+    
+    for row in range(max(len(board), board_offered), len(tick_engine)):
+        board_offered = row + 1
+        symbol = tick_engine.symbols[row]
+        info = STOCK_INFO.get(symbol, {})
+        try:
+            board_id = board.register(symbol, tick_engine.floats[row], tick_engine.ints[row],
+                                      info.get("name", ""), info.get("sector", ""))
+        except OverflowError as e:
+            logger.error(f"{e}; {symbol} is not on the board" + (" and will not update" if board.shards else ""))
+            continue
+        board_seen[board_id] = board.seqs[board_id]
+
+def _write_board(rows):
+    """Copy quotes this process simulated (or replayed) to the quote board"""
+    _register_board_symbols()
+    rows = rows[rows < len(board)]
+    board.write(rows, tick_engine.floats[rows], tick_engine.ints[rows])
+
+def update_board(task):
+    """Take the quotes the shard workers wrote since the last run"""
+    with store.lock:
+        _register_board_symbols()
+        
+        # Board ids follow tick engine rows, since every engine row is registered in order
+        rows = board.changed(board_seen)
+        seqs, floats, ints, valid = board.read(rows)
+        rows, seqs = rows[valid], seqs[valid]
+        tick_engine.set_state(rows, floats[valid], ints[valid])
+        board_seen[rows] = seqs
+        
+        symbols = [tick_engine.symbols[row] for row in rows.tolist()]
+        for symbol in symbols:
+            if subscriptions.is_active(symbol):
+                _fan_out(symbol, quote=True)
+        if recorder is not None:
+            _record_quotes(rows)
+        store.publish(quotes=tick_engine.frame(), moved=symbols)
+
+def log_status(task):
+    """Flush the recording and log a status line"""
+    if recorder is not None:
+        recorder.flush()
+    snapshot = store.current
+    logger.info(f"Data update cycle {task.runs}: {len(snapshot.watchlist)} symbols, "
+                f"{len(snapshot.quotes)} quotes, snapshot version {snapshot.version}, "
+                f"lag {scheduler.stats()['lag_ms']:.1f} ms")
 
 def update_data():
-    """Update market data periodically"""
-    global quotes, depth_data, trades, options_data, last_update, running
+    """Update market data on the scheduler until the service stops"""
+    global last_update, running, recorder, scheduler
     
     logger.info("Starting market data update thread")
     
+    if RECORD_DIR and recorder is None:
+        recorder = TickRecorder(RECORD_DIR, RECORD_SEGMENT_RECORDS, RECORD_MAX_SEGMENTS)
+        logger.info(f"Recording ticks to {RECORD_DIR}")
+    
     # Initial data generation for all symbols to ensure data is available immediately
-    for symbol in watchlist:
-        quotes[symbol] = generate_quote(symbol)
-        depth_data[symbol] = generate_market_depth(symbol)
-        trades[symbol] = [generate_trade(symbol) for _ in range(10)]
-        options_data[symbol] = generate_option_chain(symbol)
+    for symbol in store.current.watchlist:
+        seed_symbol(symbol)
     
-    logger.info(f"Initial data generated for {len(watchlist)} symbols")
+    logger.info(f"Initial data generated for {len(store.current.watchlist)} symbols")
     
     # Add some additional popular symbols
     additional_symbols = ["AAPL", "MSFT", "AMZN", "GOOG", "TSLA", "META", "NVDA"]
-    for symbol in additional_symbols:
-        if symbol not in watchlist:
-            watchlist.append(symbol)
-            quotes[symbol] = generate_quote(symbol)
-            depth_data[symbol] = generate_market_depth(symbol)
-            trades[symbol] = [generate_trade(symbol) for _ in range(10)]
-            options_data[symbol] = generate_option_chain(symbol)
-    
-    update_counter = 0
+    with store.lock:
+        watchlist = list(store.current.watchlist)
+        for symbol in additional_symbols:
+            if symbol not in watchlist:
+                watchlist.append(symbol)
+                seed_symbol(symbol)
+        store.publish(watchlist=watchlist)
+    
+    # Quotes, depth, trades and options each run on their own fixed deadlines
+    scheduler = TickScheduler()
+    if board is not None and board.shards:
+        # Shard workers simulate the quotes; this process serves and fans them out
+        scheduler.add("board", BOARD_HZ, update_board)
+    else:
+        for hz in sorted(set(QUOTE_TIERS.values()) | {DEFAULT_QUOTE_HZ}, reverse=True):
+            scheduler.add(f"quotes_{hz:g}hz", hz, lambda task, hz=hz: update_quotes(task, hz))
+    scheduler.add("depth", DEPTH_HZ, update_depth)
+    scheduler.add("trades", TRADE_HZ, update_trades)
+    scheduler.add("options", OPTIONS_HZ, update_options)
+    scheduler.add("backpressure", BACKPRESSURE_HZ, update_backpressure)
+    scheduler.add("status", 1.0 / STATUS_INTERVAL, log_status, offset=STATUS_INTERVAL)
+    
     error_counter = 0
     
     while running:
         try:
-            update_counter += 1
+            scheduler.run_pending()
             
             # Update market trend
             update_market_trend()
             
-            # Update quotes for watchlist symbols
-            for symbol in watchlist:
-                # Always update quotes for real-time data
-                quotes[symbol] = generate_quote(symbol)
-                
-                # Update market depth more frequently (40% of the time instead of 20%)
-                if random.random() < 0.4:
-                    depth_data[symbol] = generate_market_depth(symbol)
-                
-                # Add new trade
-                if symbol not in trades:
-                    trades[symbol] = []
-                
-                new_trade = generate_trade(symbol)
-                trades[symbol].insert(0, new_trade)
-                
-                # Limit to 50 most recent trades
-                if len(trades[symbol]) > 50:
-                    trades[symbol] = trades[symbol][:50]
-                
-                # Update options data more frequently (10% of the time instead of 5%)
-                if random.random() < 0.1:
-                    options_data[symbol] = generate_option_chain(symbol)
-                
-                # Always emit quote updates
-                socketio.emit('quote_update', {
-                    'symbol': symbol,
-                    'quote': quotes[symbol]
-                })
-                
-                # Emit depth update more frequently
-                if random.random() < 0.2 and symbol in depth_data:
-                    socketio.emit('depth_update', {
-                        'symbol': symbol,
-                        'depth': depth_data[symbol]
-                    })
-                
-                # Emit trade update more frequently
-                if random.random() < 0.5 and symbol in trades and trades[symbol]:
-                    socketio.emit('trade_update', {
-                        'symbol': symbol,
-                        'trade': trades[symbol][0]
-                    })
-            
-            # Every 100 updates, log a status message
-            if update_counter % 100 == 0:
-                logger.info(f"Data update cycle {update_counter}: {len(watchlist)} symbols, {len(quotes)} quotes")
+            _flush_batches()
             
             last_update = time.time()
             
-            # Sleep for a consistent time to avoid CPU spikes
-            # We'll use a fixed interval of 200ms which is 5 updates per second - fast enough for real-time
-            time.sleep(0.2)
-            
             # Reset error counter when successful
             error_counter = 0
             
@@ -518,6 +533,145 @@ def update_data():
             
             # Wait a bit longer after an error
             time.sleep(1)
+    
+    if recorder is not None:
+        recorder.close()
+
+def replay_data(replay):
+    """Feed recorded ticks through the quote, trade and Socket.IO pipeline instead of simulating"""
+    global last_update, scheduler
+    
+    logger.info(f"Replaying {replay.reader.directory} at {replay.speed or 'max'} speed")
+    
+    # Books and option chains are not recorded, so they keep being simulated
+    # around the replayed prices on their usual schedule
+    scheduler = TickScheduler()
+    scheduler.add("depth", DEPTH_HZ, update_depth)
+    scheduler.add("options", OPTIONS_HZ, update_options)
+    scheduler.add("backpressure", BACKPRESSURE_HZ, update_backpressure)
+    
+    for quote_records, trade_records in replay.ticks():
+        if not running:
+            break
+        try:
+            with store.lock:
+                names = [replay.symbol(i) for i in quote_records["symbol_id"].tolist()]
+                quote_names = set(names)
+                
+                # Symbols first seen in the recording start from their recorded price
+                for symbol, price in zip(names, quote_records["price"].tolist()):
+                    if symbol not in tick_engine:
+                        tick_engine.add_symbol(symbol, base_price=price)
+                    seed_symbol(symbol)
+                
+                rows = tick_engine.rows(names)
+                tick_engine.apply(rows, quote_records["price"], quote_records["bid"], quote_records["ask"],
+                                  quote_records["bid_size"], quote_records["ask_size"],
+                                  quote_records["size"], quote_records["ts_ns"] / 1e9)
+                if board is not None:
+                    _write_board(rows)
+                
+                new_trades = {}
+                for symbol_id, ts_ns, price, size, side, flags in zip(
+                        *(trade_records[field].tolist() for field in
+                          ("symbol_id", "ts_ns", "price", "size", "side", "flags"))):
+                    symbol = replay.symbol(symbol_id)
+                    seed_symbol(symbol)
+                    trade = print_trade(symbol, ts_ns / 1e9, price, size, side,
+                                        EXCHANGES[flags & 0xff], CONDITIONS[flags >> 8])
+                    new_trades.setdefault(symbol, []).append(trade)
+                
+                for symbol in dict.fromkeys(names + list(new_trades)):
+                    if subscriptions.is_active(symbol):
+                        _fan_out(symbol, quote=symbol in quote_names, new_trades=new_trades.get(symbol, ()))
+                
+                store.publish(quotes=tick_engine.frame(), moved=names,
+                              trades={s: trades[s].count for s in new_trades})
+            
+            scheduler.run_pending(block=False)
+            _flush_batches()
+            last_update = time.time()
+            
+        except Exception as e:
+            logger.error(f"Error in replay thread: {e}")
+    
+    logger.info(f"Replay finished: {replay.ticks_replayed} ticks, {replay.records_replayed} records")
+
+def _fan_out(symbol, quote=False, depth_delta=None, new_trades=()):
+    """Send a symbol's new quote, L2 delta and/or new trades to every channel it has listeners on"""
+    # Batch-mode clients get these folded into the next market_batch frame
+    if subscriptions.has_listeners(symbol, CHANNEL_BATCH):
+        if quote:
+            batcher.add_quote(symbol, quotes[symbol], tick_engine.timestamp_ms(symbol))
+        if depth_delta:
+            batcher.add_depth_delta(symbol, depth_delta)
+        for trade in new_trades:
+            batcher.add_trade(symbol, trade)
+    
+    for channel in ROOM_CHANNELS:
+        if subscriptions.has_listeners(symbol, channel):
+            _emit_to_room(symbol, channel, quote, depth_delta, new_trades)
+    
+    # Slow clients only get the symbol's latest state once they catch up
+    for sid in backpressure.slow_clients():
+        if subscriptions.is_subscribed(sid, symbol):
+            backpressure.defer(sid, symbol, 'snapshot', size=0)
+
+def _flush_batches():
+    """Flush coalesced updates as market_batch frames, one per room of batch clients"""
+    if batcher.pending() and batcher.due():
+        batch_clients = subscriptions.channel_clients(CHANNEL_BATCH)
+        client_options = {sid: subscriptions.options(sid) for sid in batch_clients}
+        delta_clients = {sid for sid, options in client_options.items() if options['delta']}
+        for sids, frame in batcher.frames(batch_clients, delta_encoder=delta_encoder,
+                                          delta_clients=delta_clients):
+            # One emit per encoding, so the frame is serialized once for the room
+            rooms = {}
+            for sid in sids:
+                if not backpressure.is_slow(sid):
+                    rooms.setdefault(client_options[sid]['encoding'], []).append(sid)
+            for encoding, room in rooms.items():
+                socketio.emit('market_batch', pack(frame, encoding), room=room)
+
+def update_backpressure(task):
+    """Resync slow clients that caught up and disconnect the ones that never do"""
+    deliveries, expired = backpressure.poll(subscriptions.clients())
+    for sid, items, overflowed in deliveries:
+        symbols = subscriptions.client_symbols(sid) if overflowed else [key for key, _, _ in items]
+        for symbol in symbols:
+            if subscriptions.is_subscribed(sid, symbol):
+                _send_snapshot(symbol, sid)
+    for sid in expired:
+        logger.warning(f"Disconnecting client {sid}: slow for over {CLIENT_MAX_SLOW_SECONDS:g} s")
+        socketio.server.disconnect(sid)
+
+def _emit_to_room(symbol, channel, quote, depth_delta, new_trades):
+    """Emit a symbol's new quote, L2 delta and/or new trades to one of its room channels"""
+    room = room_name(symbol, channel)
+    encoding = 'msgpack' if channel == CHANNEL_DELTA_MSGPACK else 'json'
+    skip_sid = backpressure.skip_sids()
+    
+    # Quote updates go out in full, or as only the changed fields on delta channels
+    if quote and channel == CHANNEL_ROOM:
+        socketio.emit('quote_update', {
+            'symbol': symbol,
+            'quote': quotes[symbol]
+        }, room=room, skip_sid=skip_sid)
+    elif quote:
+        delta = delta_encoder.encode(room, symbol, quotes[symbol], tick_engine.timestamp_ms(symbol))
+        if delta is not None:
+            socketio.emit('quote_delta', pack(delta, encoding), room=room, skip_sid=skip_sid)
+    
+    # Emit only the book levels that changed
+    if depth_delta:
+        socketio.emit('depth_delta', pack(depth_delta, encoding), room=room, skip_sid=skip_sid)
+    
+    # Emit trade update more frequently
+    for trade in new_trades:
+        socketio.emit('trade_update', pack({
+            'symbol': symbol,
+            'trade': trade
+        }, encoding), room=room, skip_sid=skip_sid)
 
 # API endpoints
 @app.route('/api/status')
@@ -526,8 +680,17 @@ def api_status():
     return jsonify({
         "status": "running",
         "uptime": time.time() - last_update,
-        "watchlist_symbols": len(watchlist),
-        "market_trend": market_trend
+        "watchlist_symbols": len(store.current.watchlist),
+        "market_trend": market_trend,
+        "simulator": tick_engine.simulator.stats(),
+        "version": store.version,
+        "subscriptions": subscriptions.stats(),
+        "backpressure": backpressure.stats(),
+        "vol_surfaces": vol_surfaces.stats(),
+        "scheduler": scheduler.stats() if scheduler is not None else None,
+        "board": board.stats() if board is not None else None,
+        "recorder": recorder.stats() if recorder is not None else None,
+        "replay": replayer.stats() if replayer is not None else None
     })
 
 @app.route('/api/quotes')
@@ -541,9 +704,7 @@ def api_quotes():
     result = {}
     
     for symbol in symbol_list:
-        if symbol not in quotes:
-            quotes[symbol] = generate_quote(symbol)
-        result[symbol] = quotes[symbol]
+        result[symbol] = generate_quote(symbol)
     
     return jsonify(result)
 
@@ -552,10 +713,7 @@ def api_depth(symbol):
     """Get market depth for a symbol"""
     symbol = symbol.upper()
     
-    if symbol not in depth_data:
-        depth_data[symbol] = generate_market_depth(symbol)
-    
-    return jsonify(depth_data[symbol])
+    return jsonify(generate_market_depth(symbol))
 
 @app.route('/api/trades/<symbol>')
 def api_trades(symbol):
@@ -563,64 +721,152 @@ def api_trades(symbol):
     symbol = symbol.upper()
     limit = request.args.get('limit', 20, type=int)
     
-    if symbol not in trades:
-        trades[symbol] = [generate_trade(symbol) for _ in range(min(10, limit))]
-    
-    return jsonify(trades[symbol][:limit])
+    # Read the tape as of the published snapshot
+    snapshot = seed_symbol(symbol)
+    return jsonify(trades[symbol].latest(limit, end=snapshot.trades[symbol]))
 
 @app.route('/api/options/<symbol>')
 def api_options(symbol):
-    """Get options chain for a symbol"""
+    """
+    Get options chain for a symbol
+    
+    Query parameters narrow the chain: expiration (comma-separated ISO dates),
+    type (call/put), strike_min/strike_max, moneyness_min/moneyness_max
+    (strike / underlying price), delta_min/delta_max (absolute delta) and
+    fields (comma-separated contract fields). format=columns returns each
+    side as arrays per field.
+    """
     symbol = symbol.upper()
     
-    if symbol not in options_data:
-        options_data[symbol] = generate_option_chain(symbol)
+    chain = seed_symbol(symbol).options[symbol]
     
-    # Filter by expiration if requested
-    expiration = request.args.get('expiration')
-    if expiration:
-        filtered_calls = [c for c in options_data[symbol]["calls"] if c["expiration"] == expiration]
-        filtered_puts = [p for p in options_data[symbol]["puts"] if p["expiration"] == expiration]
-        
-        result = {
-            "symbol": symbol,
-            "underlying_price": options_data[symbol]["underlying_price"],
-            "expirations": options_data[symbol]["expirations"],
-            "strikes": options_data[symbol]["strikes"],
-            "calls": filtered_calls,
-            "puts": filtered_puts
-        }
-        return jsonify(result)
-    
-    return jsonify(options_data[symbol])
+    args = request.args
+    filters = {key: args.get(key, type=float) for key in OPTION_RANGE_FILTERS if key in args}
+    if args.get('expiration'):
+        filters['expirations'] = args['expiration'].split(',')
+    if args.get('type') in ('call', 'put'):
+        filters['option_type'] = args['type']
+    fields = [f for f in args.get('fields', '').split(',') if f]
+    columnar = args.get('format') == 'columns'
+    
+    # The unfiltered chain is built once per chain version
+    if not filters and not fields and not columnar:
+        return jsonify(chain.to_dict())
+    
+    try:
+        return jsonify(chain.query(fields=fields, columnar=columnar, **filters))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/volsurface/<symbol>')
+def api_volsurface(symbol):
+    """
+    Get the fitted implied volatility surface for a symbol
+    
+    Returns the SVI parameters and at-the-money vol of every expiration.
+    With strikes (comma-separated), the response also has the vol
+    interpolated at each strike for every expiration, measured against
+    the current underlying price.
+    """
+    symbol = symbol.upper()
+    
+    chain = seed_symbol(symbol).options[symbol]
+    surface = vol_surfaces.peek(symbol)
+    if surface is None:
+        return jsonify({"error": f"No volatility surface for {symbol}"}), 404
+    
+    result = surface.to_dict()
+    if request.args.get('strikes'):
+        try:
+            strikes = np.array([float(k) for k in request.args['strikes'].split(',')])
+        except ValueError:
+            return jsonify({"error": "strikes must be numbers"}), 400
+        if not len(strikes) or (strikes <= 0).any():
+            return jsonify({"error": "strikes must be positive"}), 400
+        vols = surface.vol(strikes[None, :], surface.times[:, None], chain.underlying_price)
+        result["strikes"] = strikes.tolist()
+        result["vols"] = {e: np.round(row, 4).tolist() for e, row in zip(surface.expirations, vols)}
+    return jsonify(result)
+
+@app.route('/api/snapshot')
+def api_snapshot():
+    """
+    Get several kinds of data for several symbols in one response
+    
+    Query parameters: symbols (comma-separated, required), fields
+    (comma-separated from quote, depth, trades and options; default
+    quote,depth,trades) and trades_limit. The ETag changes whenever any
+    requested symbol changes, so a poll with If-None-Match gets an empty
+    304 until then.
+    """
+    symbol_list = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    fields = [f for f in request.args.get('fields', ','.join(SNAPSHOT_DEFAULT_FIELDS)).split(',') if f]
+    unknown = [f for f in fields if f not in SNAPSHOT_FIELDS]
+    if not symbol_list:
+        return jsonify({"error": "symbols is required"}), 400
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+    limit = request.args.get('trades_limit', 20, type=int)
+    
+    for symbol in symbol_list:
+        seed_symbol(symbol)
+    snapshot = store.current
+    
+    # Order books change in place between publishes, so their own versions join the tag
+    symbol_version = max(snapshot.versions[s] for s in symbol_list)
+    book_version = sum(snapshot.depth[s].version for s in symbol_list) if 'depth' in fields else 0
+    etag = f"{symbol_version}-{book_version}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        result = {}
+        for symbol in symbol_list:
+            data = result[symbol] = {}
+            if 'quote' in fields:
+                data['quote'] = snapshot.quotes[symbol]
+            if 'depth' in fields:
+                data['depth'] = snapshot.depth[symbol].snapshot()
+            if 'trades' in fields:
+                data['trades'] = trades[symbol].latest(limit, end=snapshot.trades[symbol])
+            if 'options' in fields:
+                data['options'] = snapshot.options[symbol].to_dict()
+        response = jsonify({"version": snapshot.version, "symbols": result})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/watchlist', methods=['GET'])
 def api_get_watchlist():
     """Get the current watchlist"""
-    return jsonify({"symbols": watchlist})
+    return jsonify({"symbols": list(store.current.watchlist)})
 
 @app.route('/api/watchlist', methods=['POST'])
 def api_update_watchlist():
     """Update the watchlist"""
     data = request.json
-    global watchlist
     
     if not data:
         return jsonify({"error": "No data provided"}), 400
     
-    if 'symbol' in data:
-        # Add or remove a symbol
-        symbol = data['symbol'].upper()
-        action = data.get('action', 'add')
+    # Copy, change and publish; the update thread picks it up next tick
+    with store.lock:
+        watchlist = list(store.current.watchlist)
         
-        if action == 'add' and symbol not in watchlist:
-            watchlist.append(symbol)
-        elif action == 'remove' and symbol in watchlist:
-            watchlist.remove(symbol)
+        if 'symbol' in data:
+            # Add or remove a symbol
+            symbol = data['symbol'].upper()
+            action = data.get('action', 'add')
             
-    elif 'symbols' in data:
-        # Replace entire watchlist
-        watchlist = [s.upper() for s in data['symbols']]
+            if action == 'add' and symbol not in watchlist:
+                watchlist.append(symbol)
+            elif action == 'remove' and symbol in watchlist:
+                watchlist.remove(symbol)
+                
+        elif 'symbols' in data:
+            # Replace entire watchlist
+            watchlist = [s.upper() for s in data['symbols']]
+        
+        store.publish(watchlist=watchlist)
     
     return jsonify({
         "success": True,
@@ -629,29 +875,23 @@ def api_update_watchlist():
 
 @app.route('/api/search')
 def api_search():
-    """Search for symbols"""
-    query = request.args.get('q', '').upper()
+    """Search the symbol universe by symbol prefix or company name, best matches first"""
+    query = request.args.get('q', '').strip()
     if not query:
         return jsonify({"results": []}), 400
     
-    # Filter sample stocks by query
-    results = []
-    for symbol, data in SAMPLE_STOCKS.items():
-        if query in symbol or query in data.get("name", "").upper():
-            results.append({
-                "symbol": symbol,
-                "description": data.get("name", ""),
-                "sector": data.get("sector", "Unknown")
-            })
-    
-    return jsonify({"results": results})
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return jsonify({"results": symbol_index.search(query, limit)})
 
 @app.route('/api/analysis/volume/<symbol>')
 def api_volume_analysis(symbol):
-    """Get volume analysis for a symbol"""
+    """Get the volume profile analysis for a symbol (value_area, nodes and histogram parameters)"""
     symbol = symbol.upper()
+    value_area = min(max(request.args.get('value_area', DEFAULT_VALUE_AREA, type=float), 0.0), 1.0)
+    nodes = min(max(request.args.get('nodes', DEFAULT_NODES, type=int), 0), 50)
+    include_histogram = request.args.get('histogram', '').lower() in ('1', 'true', 'yes')
     
-    return jsonify(generate_volume_analysis(symbol))
+    return jsonify(generate_volume_analysis(symbol, value_area, nodes, include_histogram))
 
 @socketio.on('connect')
 def handle_connect():
@@ -661,42 +901,184 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    logger.info(f"Client disconnected: {request.sid}")
+    channel, symbols = subscriptions.remove_client(request.sid)
+    _release_delta_state(request.sid, channel, symbols)
+    backpressure.forget(request.sid)
+    logger.info(f"Client disconnected: {request.sid} ({len(symbols)} subscriptions released)")
+
+def _event_symbols(data):
+    """Extract the upper-cased symbols from a subscribe/unsubscribe payload"""
+    if not isinstance(data, dict):
+        return []
+    symbols = data.get('symbols') or []
+    if 'symbol' in data:
+        symbols = list(symbols) + [data['symbol']]
+    return [s.strip().upper() for s in symbols if isinstance(s, str) and s.strip()]
+
+def _release_delta_state(sid, channel, symbols):
+    """Forget delta baselines nobody receives any more"""
+    if channel == CHANNEL_BATCH:
+        delta_encoder.forget(BATCH_DELTA_ROOM, [s for s in symbols if not subscriptions.has_listeners(s, CHANNEL_BATCH)])
+    elif channel != CHANNEL_ROOM:
+        for symbol in symbols:
+            if not subscriptions.has_listeners(symbol, channel):
+                delta_encoder.forget(room_name(symbol, channel))
+
+def _send_snapshot(symbol, sid=None):
+    """Send a client (the current one by default) full depth and a full quote in the format of its channel"""
+    sid = request.sid if sid is None else sid
+    channel = subscriptions.channel(sid)
+    options = subscriptions.options(sid)
+    quote = generate_quote(symbol)
+    
+    # Later depth_delta messages apply on top of this book
+    socketio.emit('depth_update', pack({
+        'symbol': symbol,
+        'depth': generate_market_depth(symbol)
+    }, options['encoding']), room=sid)
+    
+    if channel == CHANNEL_ROOM or (channel == CHANNEL_BATCH and not options['delta']):
+        socketio.emit('quote_update', {
+            'symbol': symbol,
+            'quote': quote
+        }, room=sid)
+        return
+    
+    timestamp_ms = tick_engine.timestamp_ms(symbol)
+    # Match the stream the other members of the delta room already follow
+    room = BATCH_DELTA_ROOM if channel == CHANNEL_BATCH else room_name(symbol, channel)
+    snapshot = delta_encoder.snapshot(room, symbol, quote, timestamp_ms)
+    socketio.emit('quote_snapshot', pack(snapshot, options['encoding']), room=sid)
+
+def _apply_options(data):
+    """
+    Apply delivery options from an event payload to the current client
+    
+    Moves the client between room channels when they change and resends
+    snapshots in the new format.
+    """
+    options = {key: data[key] for key in ('batch', 'delta', 'encoding') if key in data}
+    if not options:
+        return
+    if 'batch' in options:
+        options['batch'] = bool(options['batch'])
+    if 'delta' in options:
+        options['delta'] = bool(options['delta'])
+    if 'encoding' in options and options['encoding'] not in ('json', 'msgpack'):
+        options['encoding'] = 'json'
+    if options.get('encoding') == 'msgpack' and not MSGPACK_AVAILABLE:
+        logger.warning("msgpack is not installed; falling back to JSON payloads")
+        options['encoding'] = 'json'
+    
+    sid = request.sid
+    changed = subscriptions.set_options(sid, **options)
+    symbols = subscriptions.client_symbols(sid)
+    if changed:
+        old_channel, new_channel = changed
+        logger.info(f"Client {sid} switched from {old_channel} to {new_channel} updates")
+        for symbol in symbols:
+            if old_channel in ROOM_CHANNELS:
+                leave_room(room_name(symbol, old_channel))
+            if new_channel in ROOM_CHANNELS:
+                join_room(room_name(symbol, new_channel))
+        _release_delta_state(sid, old_channel, symbols)
+    elif subscriptions.channel(sid) != CHANNEL_BATCH or 'delta' not in options:
+        return
+    
+    for symbol in symbols:
+        _send_snapshot(symbol)
 
 @socketio.on('subscribe')
 def handle_subscribe(data):
-    """Handle subscription to a symbol"""
-    if 'symbol' in data:
-        symbol = data['symbol'].upper()
+    """
+    Handle subscription to one symbol ('symbol') or several ('symbols')
+    
+    Optional delivery options: 'batch' (market_batch frames), 'delta'
+    (quote_delta messages with only changed fields) and 'encoding'
+    ('json' or 'msgpack').
+    """
+    if isinstance(data, dict):
+        _apply_options(data)
+    
+    added = subscriptions.subscribe(request.sid, _event_symbols(data))
+    channel = subscriptions.channel(request.sid)
+    
+    for symbol in added:
         logger.info(f"Client {request.sid} subscribed to {symbol}")
+        if channel in ROOM_CHANNELS:
+            join_room(room_name(symbol, channel))
         
         # Add to watchlist if not present
-        if symbol not in watchlist:
-            watchlist.append(symbol)
+        with store.lock:
+            if symbol not in store.current.watchlist:
+                store.publish(watchlist=store.current.watchlist + (symbol,))
             
         # Emit current data
-        if symbol in quotes:
-            socketio.emit('quote_update', {
-                'symbol': symbol,
-                'quote': quotes[symbol]
-            }, room=request.sid)
+        _send_snapshot(symbol)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(data):
+    """Handle unsubscription from one symbol ('symbol') or several ('symbols')"""
+    channel = subscriptions.channel(request.sid)
+    removed = subscriptions.unsubscribe(request.sid, _event_symbols(data))
+    for symbol in removed:
+        logger.info(f"Client {request.sid} unsubscribed from {symbol}")
+        if channel in ROOM_CHANNELS:
+            leave_room(room_name(symbol, channel))
+    _release_delta_state(request.sid, channel, removed)
+
+@socketio.on('set_batch_mode')
+def handle_set_batch_mode(data):
+    """Opt in to ('enabled': true) or out of market_batch frames"""
+    _apply_options({'batch': bool(isinstance(data, dict) and data.get('enabled'))})
+
+@socketio.on('resync')
+def handle_resync(data=None):
+    """Resend full snapshots for some ('symbols') or all subscribed symbols"""
+    subscribed = subscriptions.client_symbols(request.sid)
+    requested = _event_symbols(data)
+    for symbol in (requested or subscribed):
+        if symbol in subscribed:
+            _send_snapshot(symbol)
 
 def health_check():
     """Health check endpoint for monitoring"""
     return {"status": "running" if running else "stopped", 
             "uptime": time.time() - last_update,
-            "watchlist_symbols": len(watchlist),
+            "watchlist_symbols": len(store.current.watchlist),
             "market_trend": market_trend}
 
-def main():
+def main(argv=None):
     """Main function to start the service"""
-    global running
+    global running, replayer, board, board_seen
+    
+    parser = argparse.ArgumentParser(description="QuotestreamPY market data service")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Replay a recording (QUOTESTREAM_RECORD_DIR) instead of simulating")
+    parser.add_argument("--speed", default="1", type=parse_speed,
+                        help="Replay speed multiplier such as 1, 10 or max (default: 1)")
+    parser.add_argument("--start", type=parse_time,
+                        help="Replay from this time (ISO-8601 or epoch seconds)")
+    parser.add_argument("--end", type=parse_time,
+                        help="Stop the replay at this time (ISO-8601 or epoch seconds)")
+    args = parser.parse_args(argv)
     
     # Add health check endpoint
     app.route('/api/health', methods=['GET'])(lambda: jsonify(health_check()))
     
+    # Quotes are simulated in shard workers only when not replaying
+    shards = SHARDS if not args.replay else 0
+    if BOARD_NAME or shards:
+        board = QuoteBoard.create(BOARD_NAME or DEFAULT_BOARD_NAME, BOARD_CAPACITY, shards)
+        board_seen = np.zeros(board.capacity, dtype=np.uint64)
+        logger.info(f"Quote board {board.name} created" + (f" for {shards} shard workers" if shards else ""))
+    
     # Start update thread
-    update_thread = threading.Thread(target=update_data)
+    if args.replay:
+        replayer = TickReplayer(args.replay, args.speed, args.start, args.end)
+        update_thread = threading.Thread(target=replay_data, args=(replayer,))
+    else:
+        update_thread = threading.Thread(target=update_data)
     update_thread.daemon = True
     update_thread.start()
     
@@ -725,6 +1107,10 @@ def main():
             running = False
             break
     
+    if board is not None:
+        running = False
+        with store.lock:
+            board.close()
     logger.info("QuotestreamPY service stopped")
 
 if __name__ == "__main__":
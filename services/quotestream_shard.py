@@ -0,0 +1,179 @@
+"""
+Quotestream Shard - Worker process for sharded QuotestreamPY
+Simulates the quotes of one hash partition of the symbols registered on
+the shared-memory quote board and writes each tick back into the board
+Run with: python quotestream_shard.py --shard I --shards N
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+from typing import Dict, Optional
+
+from quotestream_engine import TickEngine
+from quotestream_board import QuoteBoard, DEFAULT_BOARD_NAME
+from quotestream_scheduler import TickScheduler, parse_tiers
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("quotestream")
+
+# Same settings as quotestream_service.py
+BOARD_NAME = os.getenv("QUOTESTREAM_BOARD_NAME", DEFAULT_BOARD_NAME)
+QUOTE_TIERS = parse_tiers(os.getenv("QUOTESTREAM_QUOTE_TIERS",
+                                    "20:SPY;5:AAPL,MSFT,AMZN,GOOG,TSLA,META,NVDA,AMD,INTC"))
+DEFAULT_QUOTE_HZ = float(os.getenv("QUOTESTREAM_DEFAULT_QUOTE_HZ", 1))
+SIM_SEED = int(os.environ["QUOTESTREAM_SEED"]) if os.getenv("QUOTESTREAM_SEED") else None
+SIM_PROCESS = os.getenv("QUOTESTREAM_SIM_PROCESS", "jump")
+SIM_TIME_SCALE = float(os.getenv("QUOTESTREAM_SIM_TIME_SCALE", 60))
+
+# How often new symbols are picked up from the board and the front process is checked
+SYNC_HZ = 4.0
+
+# Seconds to wait for the front process to create the board
+ATTACH_TIMEOUT = 60.0
+
+
+class ShardWorker:
+    """
+    Tick engine for the board rows of one shard.
+
+    Each symbol's update rate comes from its quote tier, so SPY on a
+    20 Hz tier ticks as often here as it does in a single-process service.
+    """
+
+    def __init__(self, board: QuoteBoard, shard: int, seed: Optional[int] = None,
+                 process: str = "jump", tiers: Optional[Dict[str, float]] = None,
+                 default_hz: float = 1.0, time_scale: float = 60.0):
+        """
+        Initialize the worker
+
+        Args:
+            board: Attached quote board
+            shard: Shard number this worker owns
+            seed: Service seed; each shard derives its own stream from it
+            process: Default price process
+            tiers: Mapping of symbol to update rate in Hz
+            default_hz: Update rate of symbols in no tier
+            time_scale: Simulated market seconds per wall-clock second
+        """
+        self.board = board
+        self.shard = shard
+        self.tiers = tiers or {}
+        self.default_hz = default_hz
+        self.time_scale = time_scale
+        self.engine = TickEngine({}, seed=None if seed is None else [seed, shard], process=process)
+        self.board_ids = np.zeros(0, dtype=np.intp)  # engine row -> board id
+        self.tier_rows: Dict[float, np.ndarray] = {}
+        self.synced = 0  # board rows already looked at
+
+    def sync(self):
+        """Take over the symbols registered on the board since the last sync"""
+        engine = self.engine
+        board = self.board
+        new_ids = board.shard_ids(self.shard, self.synced)
+        self.synced = max(self.synced, len(board))
+        if not len(new_ids):
+            return
+        _, floats, ints, _ = board.read(new_ids)
+        tier_rows = {hz: rows.tolist() for hz, rows in self.tier_rows.items()}
+        board_ids = self.board_ids.tolist()
+        for board_id, f, i in zip(new_ids.tolist(), floats, ints):
+            symbol = board.symbol(board_id)
+            engine.stock_info[symbol] = {"sector": board.sector(board_id)}
+            row = engine.add_symbol(symbol)
+            # Continue from the state the front process registered
+            engine.floats[row] = f
+            engine.ints[row] = i
+            board_ids.append(board_id)
+            tier_rows.setdefault(self.tiers.get(symbol, self.default_hz), []).append(row)
+        self.board_ids = np.array(board_ids, dtype=np.intp)
+        self.tier_rows = {hz: np.array(rows, dtype=np.intp) for hz, rows in tier_rows.items()}
+        logger.info(f"Shard {self.shard}: {len(self.board_ids)} symbols")
+
+    def step(self, hz: float, sim_clock: float, now: Optional[float] = None):
+        """
+        Advance the symbols of one tier and write them to the board
+
+        Args:
+            hz: Update rate of the tier
+            sim_clock: Simulated seconds since the worker started
+            now: Tick timestamp in epoch seconds
+        """
+        rows = self.tier_rows.get(hz)
+        if rows is None or not len(rows):
+            return
+        engine = self.engine
+        engine.step(rows, sim_clock - engine.simulator.clock, now)
+        self.board.write(self.board_ids[rows], engine.floats[rows], engine.ints[rows])
+        self.board.heartbeat(self.shard)
+
+    def run(self, should_run=lambda: True):
+        """
+        Tick every tier on its own deadlines until the front process goes away
+
+        Args:
+            should_run: Checked between runs; returning False stops the worker
+        """
+        scheduler = TickScheduler()
+        start = scheduler.start
+
+        def tick(task, hz):
+            self.step(hz, (task.scheduled - start) * self.time_scale)
+
+        for hz in sorted(set(self.tiers.values()) | {self.default_hz}, reverse=True):
+            scheduler.add(f"quotes_{hz:g}hz", hz, lambda task, hz=hz: tick(task, hz))
+        scheduler.add("sync", SYNC_HZ, lambda task: self.sync())
+
+        self.sync()
+        while should_run() and self.board.owner_alive():
+            scheduler.run_pending()
+
+
+def attach_board(name: str, timeout: float = ATTACH_TIMEOUT) -> Optional[QuoteBoard]:
+    """Attach to the board, waiting for the front process to create it"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return QuoteBoard.attach(name)
+        except (FileNotFoundError, ValueError):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.5)
+
+
+def main(argv=None):
+    """Run one shard, re-attaching when the front process restarts"""
+    parser = argparse.ArgumentParser(description="QuotestreamPY shard worker")
+    parser.add_argument("--shard", type=int, required=True, help="Shard number, from 0")
+    parser.add_argument("--shards", type=int, required=True, help="Total number of shards")
+    parser.add_argument("--board", default=BOARD_NAME, help="Shared memory board name")
+    args = parser.parse_args(argv)
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+
+    while True:
+        board = attach_board(args.board)
+        if board is None:
+            logger.error(f"Shard {args.shard}: quote board {args.board} did not appear")
+            return 1
+        if board.shards != args.shards:
+            logger.error(f"Shard {args.shard}: board has {board.shards} shards, expected {args.shards}")
+            board.close()
+            return 1
+        logger.info(f"Shard {args.shard}/{args.shards} attached to {args.board}")
+        try:
+            ShardWorker(board, args.shard, SIM_SEED, SIM_PROCESS, QUOTE_TIERS,
+                        DEFAULT_QUOTE_HZ, SIM_TIME_SCALE).run()
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            board.close()
+        logger.warning(f"Shard {args.shard}: front process exited, waiting for a new board")
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+Quotestream Simulator - Seeded stochastic price processes for QuotestreamPY
+Generates log returns for a whole universe per step from per-symbol GBM,
+jump-diffusion or regime-switching parameters, correlated through a
+market factor and one factor per sector
+"""
+import math
+import logging
+import numpy as np
+from typing import Dict, Optional, Any, NamedTuple
+
+logger = logging.getLogger("quotestream")
+
+# Parameters are annualized over a trading year of simulated seconds
+SECONDS_PER_YEAR = 252 * 6.5 * 3600
+
+# Price processes
+PROCESS_GBM, PROCESS_JUMP, PROCESS_REGIME = range(3)
+PROCESSES = {"gbm": PROCESS_GBM, "jump": PROCESS_JUMP, "regime": PROCESS_REGIME}
+
+# Column layout of the per-symbol parameter array
+(P_MU, P_SIGMA, P_BETA, P_SECTOR_BETA, P_JUMP_RATE, P_JUMP_MEAN, P_JUMP_STD,
+ P_STRESS_MULT, P_STRESS_RATE, P_CALM_RATE) = range(10)
+NUM_PARAMS = 10
+
+# Market regimes: (name, trend, annual drift, volatility multiplier)
+MARKET_REGIMES = (
+    ("bear", -1.0, -0.30, 1.6),
+    ("neutral", 0.0, 0.05, 1.0),
+    ("bull", 1.0, 0.25, 0.8),
+)
+
+# Market regime transition probabilities once a regime ends (rows: from, columns: to)
+MARKET_TRANSITIONS = np.array([
+    [0.0, 0.7, 0.3],
+    [0.5, 0.0, 0.5],
+    [0.3, 0.7, 0.0],
+])
+
+MARKET_SIGMA = 0.15          # annual volatility of the market factor
+SECTOR_SIGMA = 0.10          # annual volatility of each sector factor
+MARKET_REGIME_DWELL = 46800  # mean regime length in simulated seconds (two sessions)
+
+
+class ProcessParams(NamedTuple):
+    """
+    Price process of one symbol.
+
+    Rates are per simulated year. ``PROCESS_GBM`` ignores the jump and
+    stress fields; ``PROCESS_JUMP`` adds lognormal jumps; ``PROCESS_REGIME``
+    adds jumps and switches between calm and stressed volatility.
+    """
+    process: int = PROCESS_GBM
+    mu: float = 0.05            # idiosyncratic annual drift
+    sigma: float = 0.25         # idiosyncratic annual volatility
+    beta: float = 1.0           # loading on the market factor
+    sector_beta: float = 0.5    # loading on the symbol's sector factor
+    jump_rate: float = 0.0      # expected jumps per year
+    jump_mean: float = 0.0      # mean log jump size
+    jump_std: float = 0.0       # standard deviation of the log jump size
+    stress_mult: float = 1.0    # volatility multiplier while stressed
+    stress_rate: float = 0.0    # calm -> stressed transitions per year
+    calm_rate: float = 0.0      # stressed -> calm transitions per year
+
+
+class MarketSimulator:
+    """
+    Vectorized multi-factor price simulator.
+
+    The simulator keeps a clock and the cumulative log level of every
+    factor. Each symbol remembers the clock and factor levels of its last
+    step, so ``returns()`` for any subset of rows covers exactly the time
+    since each row last moved; symbols stepped less often stay on the same
+    correlated path. Given the same seed and sequence of calls the output
+    is identical.
+    """
+
+    def __init__(self, seed: Optional[int] = None, process: str = "jump",
+                 capacity: int = 64, rng: Optional[np.random.Generator] = None):
+        """
+        Initialize the simulator
+
+        Args:
+            seed: Seed for the random generator; ignored if ``rng`` is given
+            process: Default process for symbols added without parameters
+            capacity: Initial number of rows to allocate
+            rng: Optional random generator to draw from
+        """
+        if process not in PROCESSES:
+            raise ValueError(f"Unknown price process: {process}")
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.default_process = PROCESSES[process]
+        self.clock = 0.0  # simulated seconds
+
+        # Factor 0 is the market; sectors get the following columns
+        self.sectors: Dict[str, int] = {}
+        self.factors = np.zeros(1, dtype=np.float64)
+        self.regime = 1  # neutral
+        self._regime_end = self._regime_length()
+
+        self.params = np.zeros((capacity, NUM_PARAMS), dtype=np.float64)
+        self.process = np.zeros(capacity, dtype=np.uint8)
+        self.sector = np.zeros(capacity, dtype=np.intp)
+        self.stressed = np.zeros(capacity, dtype=bool)
+        self.last_clock = np.zeros(capacity, dtype=np.float64)
+        self.market_anchor = np.zeros(capacity, dtype=np.float64)
+        self.sector_anchor = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def market_trend(self) -> float:
+        """Get the trend of the current market regime, -1.0 (bear) to 1.0 (bull)"""
+        return MARKET_REGIMES[self.regime][1]
+
+    @property
+    def market_regime(self) -> str:
+        """Get the name of the current market regime"""
+        return MARKET_REGIMES[self.regime][0]
+
+    def _regime_length(self) -> float:
+        return float(self.rng.exponential(MARKET_REGIME_DWELL))
+
+    def _grow(self, needed: int):
+        """Double the per-row arrays until they can hold ``needed`` rows"""
+        capacity = len(self.params)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == len(self.params):
+            return
+        for name in ("params", "process", "sector", "stressed", "last_clock",
+                     "market_anchor", "sector_anchor"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _sector_factor(self, sector: str) -> int:
+        column = self.sectors.get(sector)
+        if column is None:
+            column = self.sectors[sector] = len(self.factors)
+            self.factors = np.append(self.factors, 0.0)
+        return column
+
+    def default_params(self, process: Optional[int] = None) -> ProcessParams:
+        """
+        Draw plausible parameters for a new symbol
+
+        Args:
+            process: Process code; defaults to the simulator's default process
+
+        Returns:
+            Randomized ProcessParams
+        """
+        rng = self.rng
+        process = self.default_process if process is None else process
+        mu, sigma, beta, sector_beta = rng.uniform((-0.05, 0.15, 0.6, 0.3), (0.15, 0.45, 1.5, 0.9))
+        params = ProcessParams(process=process, mu=mu, sigma=sigma, beta=beta, sector_beta=sector_beta)
+        if process != PROCESS_GBM:
+            params = params._replace(jump_rate=rng.uniform(2, 12), jump_mean=rng.normal(0, 0.005),
+                                     jump_std=rng.uniform(0.01, 0.04))
+        if process == PROCESS_REGIME:
+            params = params._replace(stress_mult=rng.uniform(1.5, 3.0), stress_rate=rng.uniform(10, 40),
+                                     calm_rate=rng.uniform(60, 250))
+        return params
+
+    def add_symbol(self, sector: str = "", params: Optional[ProcessParams] = None) -> int:
+        """
+        Add a symbol starting at the current clock
+
+        Args:
+            sector: Sector name; symbols in the same sector share a factor
+            params: Process parameters; drawn with ``default_params`` if omitted
+
+        Returns:
+            Row index of the symbol
+        """
+        if params is None:
+            params = self.default_params()
+        row = self.count
+        self._grow(row + 1)
+        self.params[row] = params[1:]
+        self.process[row] = params.process
+        self.sector[row] = self._sector_factor(sector)
+        self.stressed[row] = False
+        self.last_clock[row] = self.clock
+        self.market_anchor[row] = self.factors[0]
+        self.sector_anchor[row] = self.factors[self.sector[row]]
+        self.count += 1
+        return row
+
+    def set_params(self, row: int, params: ProcessParams):
+        """Replace the process parameters of a row"""
+        self.params[row] = params[1:]
+        self.process[row] = params.process
+
+    def advance(self, dt: float):
+        """
+        Move the clock and the factor levels forward
+
+        Args:
+            dt: Simulated seconds to advance
+        """
+        if dt <= 0:
+            return
+        rng = self.rng
+
+        # Market regime changes happen at exponentially distributed times
+        self.clock += dt
+        while self.clock >= self._regime_end:
+            previous = self.regime
+            self.regime = int(rng.choice(len(MARKET_REGIMES), p=MARKET_TRANSITIONS[self.regime]))
+            self._regime_end += self._regime_length()
+            logger.debug(f"Market regime {MARKET_REGIMES[previous][0]} -> {self.market_regime}")
+
+        years = dt / SECONDS_PER_YEAR
+        _, _, drift, vol_mult = MARKET_REGIMES[self.regime]
+        sigmas = np.full(len(self.factors), SECTOR_SIGMA)
+        sigmas[0] = MARKET_SIGMA * vol_mult
+        drifts = -0.5 * sigmas ** 2
+        drifts[0] += drift
+        self.factors += drifts * years + sigmas * math.sqrt(years) * rng.standard_normal(len(self.factors))
+
+    def returns(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Draw each row's log return since its last step, up to the current clock
+
+        Args:
+            rows: Row indices
+
+        Returns:
+            Log returns per row
+        """
+        n = len(rows)
+        rng = self.rng
+        p = self.params[rows]
+        process = self.process[rows]
+        sector = self.sector[rows]
+        years = (self.clock - self.last_clock[rows]) / SECONDS_PER_YEAR
+
+        # Systematic part: factor moves since the row's anchors
+        market = self.factors[0]
+        sector_level = self.factors[sector]
+        systematic = (p[:, P_BETA] * (market - self.market_anchor[rows])
+                      + p[:, P_SECTOR_BETA] * (sector_level - self.sector_anchor[rows]))
+
+        # Calm/stressed switching for regime rows, then idiosyncratic diffusion
+        stressed = self.stressed[rows]
+        switching = process == PROCESS_REGIME
+        rate = np.where(stressed, p[:, P_CALM_RATE], p[:, P_STRESS_RATE])
+        flips = switching & (rng.random(n) < -np.expm1(-rate * years))
+        stressed = stressed ^ flips
+        sigma = p[:, P_SIGMA] * np.where(stressed, p[:, P_STRESS_MULT], 1.0)
+        log_return = (systematic + (p[:, P_MU] - 0.5 * sigma ** 2) * years
+                      + sigma * np.sqrt(years) * rng.standard_normal(n))
+
+        # Compound Poisson lognormal jumps, compensated so they do not add drift
+        jump_rate = np.where(process == PROCESS_GBM, 0.0, p[:, P_JUMP_RATE])
+        if jump_rate.any():
+            jump_mean, jump_std = p[:, P_JUMP_MEAN], p[:, P_JUMP_STD]
+            jumps = rng.poisson(jump_rate * years)
+            log_return += (jumps * jump_mean + np.sqrt(jumps) * jump_std * rng.standard_normal(n)
+                           - jump_rate * np.expm1(jump_mean + 0.5 * jump_std ** 2) * years)
+
+        self.stressed[rows] = stressed
+        self.last_clock[rows] = self.clock
+        self.market_anchor[rows] = market
+        self.sector_anchor[rows] = sector_level
+        return log_return
+
+    def volatility(self, row: int) -> float:
+        """
+        Get the annualized volatility of a row's log returns right now
+
+        Combines the market factor (in the current regime), the sector
+        factor, the idiosyncratic diffusion (stressed or calm) and jumps.
+        """
+        p = self.params[row]
+        vol_mult = MARKET_REGIMES[self.regime][3]
+        sigma = p[P_SIGMA] * (p[P_STRESS_MULT] if self.stressed[row] else 1.0)
+        variance = ((p[P_BETA] * MARKET_SIGMA * vol_mult) ** 2 + (p[P_SECTOR_BETA] * SECTOR_SIGMA) ** 2
+                    + sigma ** 2)
+        if self.process[row] != PROCESS_GBM:
+            variance += p[P_JUMP_RATE] * (p[P_JUMP_MEAN] ** 2 + p[P_JUMP_STD] ** 2)
+        return float(math.sqrt(variance))
+
+    def paths(self, rows: np.ndarray, initial: np.ndarray, steps: int, dt: float) -> np.ndarray:
+        """
+        Simulate price paths for offline use
+
+        Args:
+            rows: Row indices to simulate
+            initial: Starting price per row
+            steps: Number of steps
+            dt: Simulated seconds per step
+
+        Returns:
+            Array of shape (steps + 1, len(rows)) with the initial prices first
+        """
+        log_returns = np.empty((steps, len(rows)), dtype=np.float64)
+        for step in range(steps):
+            self.advance(dt)
+            log_returns[step] = self.returns(rows)
+        prices = np.empty((steps + 1, len(rows)), dtype=np.float64)
+        prices[0] = initial
+        prices[1:] = initial * np.exp(np.cumsum(log_returns, axis=0))
+        return prices
+
+    def stats(self) -> Dict[str, Any]:
+        """Get simulator state for status endpoints"""
+        return {
+            "clock": self.clock,
+            "market_regime": self.market_regime,
+            "symbols": self.count,
+            "factors": len(self.factors),
+            "stressed": int(self.stressed[:self.count].sum())
+        }
@@ -0,0 +1,108 @@
+"""
+Quotestream Snapshot Store - Versioned copy-on-write market state
+The update thread publishes an immutable MarketSnapshot per tick; request
+handlers read whichever snapshot is current without taking any lock
+"""
+import time
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, Optional, Any, Iterable, NamedTuple, Mapping, Tuple
+
+logger = logging.getLogger("quotestream")
+
+_EMPTY = MappingProxyType({})
+
+
+class MarketSnapshot(NamedTuple):
+    """
+    One published version of the market state.
+
+    Mappings are read-only views of dictionaries that are never modified
+    after publication; a new version copies them before changing anything.
+    Quotes are a frozen copy of the tick engine state (a QuoteFrame) that
+    builds quote dicts as they are read.
+    """
+    version: int = 0
+    timestamp: float = 0.0
+    watchlist: Tuple[str, ...] = ()
+    quotes: Mapping[str, Dict[str, Any]] = _EMPTY   # symbol -> quote, built on read
+    depth: Mapping[str, Any] = _EMPTY               # symbol -> OrderBook
+    trades: Mapping[str, int] = _EMPTY              # symbol -> trades on the tape
+    options: Mapping[str, Any] = _EMPTY             # symbol -> OptionChain
+    versions: Mapping[str, int] = _EMPTY            # symbol -> version of its last change
+
+
+class SnapshotStore:
+    """
+    Single current MarketSnapshot behind an atomically swapped reference.
+
+    Readers use ``current`` (one attribute read) and keep working on that
+    snapshot even while newer ones are published. Writers serialize on
+    ``lock``; hold it while changing the engine state a snapshot is built
+    from, then call ``publish``.
+    """
+
+    MAPPINGS = ("depth", "trades", "options")
+
+    def __init__(self):
+        """Initialize the store with an empty snapshot"""
+        self.lock = threading.RLock()
+        self._current = MarketSnapshot()
+
+    @property
+    def current(self) -> MarketSnapshot:
+        """Get the latest published snapshot"""
+        return self._current
+
+    @property
+    def version(self) -> int:
+        """Get the version of the latest snapshot; grows by one per publish"""
+        return self._current.version
+
+    def publish(self, watchlist: Optional[Iterable[str]] = None,
+                quotes: Optional[Mapping[str, Dict[str, Any]]] = None, moved: Iterable[str] = (),
+                **updates: Mapping[str, Any]) -> MarketSnapshot:
+        """
+        Publish a new snapshot with some entries changed
+
+        Args:
+            watchlist: Replacement watchlist, or None to keep the current one
+            quotes: Replacement quote mapping covering every symbol, published
+                as is rather than copied
+            moved: Symbols whose quotes changed in ``quotes``
+            updates: Per-mapping changes (depth, trades, options) keyed by
+                symbol; a value of None removes the symbol
+
+        Returns:
+            The newly published snapshot
+        """
+        with self.lock:
+            current = self._current
+            version = current.version + 1
+            changes = {}
+            changed = set(moved)
+            if quotes is not None:
+                changes["quotes"] = quotes
+            for name, entries in updates.items():
+                if name not in self.MAPPINGS:
+                    raise ValueError(f"Unknown snapshot field: {name}")
+                if not entries:
+                    continue
+                merged = dict(getattr(current, name))
+                for symbol, value in entries.items():
+                    if value is None:
+                        merged.pop(symbol, None)
+                    else:
+                        merged[symbol] = value
+                changes[name] = MappingProxyType(merged)
+                changed.update(entries)
+            if changed:
+                versions = dict(current.versions)
+                versions.update(dict.fromkeys(changed, version))
+                changes["versions"] = MappingProxyType(versions)
+            if watchlist is not None:
+                changes["watchlist"] = tuple(watchlist)
+            snapshot = current._replace(version=version, timestamp=time.time(), **changes)
+            self._current = snapshot
+            return snapshot
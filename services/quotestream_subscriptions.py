@@ -0,0 +1,233 @@
+"""
+Quotestream Subscriptions - Reference-counted per-symbol Socket.IO rooms
+Tracks which clients listen to which symbols so the update loop only
+simulates and emits at full rate for symbols somebody is watching
+"""
+import logging
+import threading
+from typing import Dict, List, Set, Iterable, Optional, Tuple
+
+logger = logging.getLogger("quotestream")
+
+# Delivery channels. Room channels map to one Socket.IO room per symbol;
+# batch clients get market_batch frames, shared by clients with the same symbols.
+CHANNEL_ROOM = "symbol"
+CHANNEL_DELTA = "delta"
+CHANNEL_DELTA_MSGPACK = "delta-msgpack"
+CHANNEL_BATCH = "batch"
+ROOM_CHANNELS = (CHANNEL_ROOM, CHANNEL_DELTA, CHANNEL_DELTA_MSGPACK)
+
+DEFAULT_OPTIONS = {"batch": False, "delta": False, "encoding": "json"}
+
+
+def room_name(symbol: str, channel: str = CHANNEL_ROOM) -> str:
+    """Get the Socket.IO room that carries a channel's updates for a symbol"""
+    return f"{channel}:{symbol}"
+
+
+def channel_for(options: Dict[str, object]) -> str:
+    """Get the delivery channel for a client's options"""
+    if options.get("batch"):
+        return CHANNEL_BATCH
+    if options.get("delta"):
+        return CHANNEL_DELTA_MSGPACK if options.get("encoding") == "msgpack" else CHANNEL_DELTA
+    return CHANNEL_ROOM
+
+
+class SubscriptionManager:
+    """
+    Reference-counted symbol subscriptions keyed by Socket.IO session id.
+
+    Each client has delivery options (batch frames, delta encoding, wire
+    encoding) that select its channel; listener counts are kept per symbol
+    and per channel. All methods are thread-safe; Socket.IO handlers mutate
+    the state while the update thread reads it every tick.
+    """
+
+    def __init__(self):
+        """Initialize empty subscription state"""
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Set[str]] = {}
+        self._counts: Dict[str, int] = {}
+        # Only clients with non-default options are stored
+        self._options: Dict[str, Dict[str, object]] = {}
+        self._channel_counts: Dict[str, Dict[str, int]] = {
+            channel: {} for channel in ROOM_CHANNELS + (CHANNEL_BATCH,)
+        }
+        self._channel_clients: Dict[str, Set[str]] = {
+            channel: set() for channel in ROOM_CHANNELS + (CHANNEL_BATCH,)
+        }
+
+    def _channel(self, sid: str) -> str:
+        options = self._options.get(sid)
+        return channel_for(options) if options else CHANNEL_ROOM
+
+    def subscribe(self, sid: str, symbols: Iterable[str]) -> List[str]:
+        """
+        Subscribe a client to symbols
+
+        Args:
+            sid: Socket.IO session id
+            symbols: Symbols to subscribe to
+
+        Returns:
+            Symbols the client was not already subscribed to
+        """
+        added = []
+        with self._lock:
+            client = self._clients.setdefault(sid, set())
+            channel = self._channel(sid)
+            self._channel_clients[channel].add(sid)
+            channel_counts = self._channel_counts[channel]
+            for symbol in symbols:
+                if symbol in client:
+                    continue
+                client.add(symbol)
+                self._counts[symbol] = self._counts.get(symbol, 0) + 1
+                channel_counts[symbol] = channel_counts.get(symbol, 0) + 1
+                added.append(symbol)
+        return added
+
+    def unsubscribe(self, sid: str, symbols: Iterable[str]) -> List[str]:
+        """
+        Unsubscribe a client from symbols
+
+        Args:
+            sid: Socket.IO session id
+            symbols: Symbols to unsubscribe from
+
+        Returns:
+            Symbols the client was actually subscribed to
+        """
+        removed = []
+        with self._lock:
+            client = self._clients.get(sid)
+            if not client:
+                return removed
+            channel_counts = self._channel_counts[self._channel(sid)]
+            for symbol in symbols:
+                if symbol not in client:
+                    continue
+                client.discard(symbol)
+                self._release(self._counts, symbol)
+                self._release(channel_counts, symbol)
+                removed.append(symbol)
+        return removed
+
+    def remove_client(self, sid: str) -> Tuple[str, List[str]]:
+        """
+        Drop every subscription held by a disconnected client
+
+        Args:
+            sid: Socket.IO session id
+
+        Returns:
+            Tuple of (channel, symbols) the client was subscribed to
+        """
+        with self._lock:
+            channel = self._channel(sid)
+            client = self._clients.pop(sid, set())
+            self._options.pop(sid, None)
+            self._channel_clients[channel].discard(sid)
+            channel_counts = self._channel_counts[channel]
+            for symbol in client:
+                self._release(self._counts, symbol)
+                self._release(channel_counts, symbol)
+        return channel, list(client)
+
+    def set_options(self, sid: str, **options) -> Optional[Tuple[str, str]]:
+        """
+        Update a client's delivery options (batch, delta, encoding)
+
+        Args:
+            sid: Socket.IO session id
+            options: Option values to change; unknown keys are ignored
+
+        Returns:
+            Tuple of (old_channel, new_channel) if the channel changed, else None
+        """
+        with self._lock:
+            current = dict(self._options.get(sid, DEFAULT_OPTIONS))
+            current.update({k: v for k, v in options.items() if k in DEFAULT_OPTIONS})
+            old_channel = self._channel(sid)
+            if current == DEFAULT_OPTIONS:
+                self._options.pop(sid, None)
+            else:
+                self._options[sid] = current
+            new_channel = self._channel(sid)
+            if new_channel == old_channel:
+                return None
+
+            client = self._clients.get(sid, ())
+            if sid in self._clients:
+                self._channel_clients[old_channel].discard(sid)
+                self._channel_clients[new_channel].add(sid)
+            old_counts = self._channel_counts[old_channel]
+            new_counts = self._channel_counts[new_channel]
+            for symbol in client:
+                self._release(old_counts, symbol)
+                new_counts[symbol] = new_counts.get(symbol, 0) + 1
+            return old_channel, new_channel
+
+    def options(self, sid: str) -> Dict[str, object]:
+        """Get a client's delivery options"""
+        return dict(self._options.get(sid, DEFAULT_OPTIONS))
+
+    def channel(self, sid: str) -> str:
+        """Get a client's delivery channel"""
+        return self._channel(sid)
+
+    @staticmethod
+    def _release(counts: Dict[str, int], symbol: str):
+        """Decrement a symbol's listener count, forgetting it at zero"""
+        count = counts.get(symbol, 0) - 1
+        if count > 0:
+            counts[symbol] = count
+        else:
+            counts.pop(symbol, None)
+
+    def listeners(self, symbol: str) -> int:
+        """Get the number of clients subscribed to a symbol"""
+        return self._counts.get(symbol, 0)
+
+    def is_active(self, symbol: str) -> bool:
+        """Check whether any client is subscribed to a symbol"""
+        return symbol in self._counts
+
+    def has_listeners(self, symbol: str, channel: str) -> bool:
+        """Check whether a symbol has listeners on a delivery channel"""
+        return symbol in self._channel_counts[channel]
+
+    def channel_clients(self, channel: str) -> Dict[str, Set[str]]:
+        """Get a snapshot of a channel's clients and their symbols"""
+        with self._lock:
+            return {sid: set(self._clients.get(sid, ())) for sid in self._channel_clients[channel]}
+
+    def active_symbols(self) -> Set[str]:
+        """Get the set of symbols with at least one listener"""
+        with self._lock:
+            return set(self._counts)
+
+    def clients(self) -> List[str]:
+        """Get the session ids of every client with subscriptions"""
+        with self._lock:
+            return list(self._clients)
+
+    def is_subscribed(self, sid: str, symbol: str) -> bool:
+        """Check whether a client is subscribed to a symbol"""
+        return symbol in self._clients.get(sid, ())
+
+    def client_symbols(self, sid: str) -> Set[str]:
+        """Get the symbols a client is subscribed to"""
+        with self._lock:
+            return set(self._clients.get(sid, ()))
+
+    def stats(self) -> Dict[str, object]:
+        """Get subscription counters for status endpoints"""
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "subscribed_symbols": len(self._counts),
+                "subscriptions": sum(self._counts.values()),
+                "channels": {channel: len(sids) for channel, sids in self._channel_clients.items()}
+            }
@@ -0,0 +1,146 @@
+"""
+Quotestream Trade Tape - Fixed-capacity ring buffers of recent trades
+Each symbol's tape is a NumPy structured array written in place, so adding
+a trade is O(1) and reading the latest N trades returns array views
+"""
+import logging
+import datetime
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+
+logger = logging.getLogger("quotestream")
+
+EXCHANGES = ("NSDQ", "NYSE", "ARCA", "BATS")
+CONDITIONS = ("", "Regular", "Odd Lot", "Outside Regular Hours")
+EXCHANGE_CODES = {name: code for code, name in enumerate(EXCHANGES)}
+CONDITION_CODES = {name: code for code, name in enumerate(CONDITIONS)}
+
+TRADE_DTYPE = np.dtype([
+    ("ts", "f8"),            # epoch seconds
+    ("price", "f8"),
+    ("size", "i4"),
+    ("price_change", "i1"),  # -1 at bid, 1 at ask, 0 in between
+    ("exchange", "u1"),      # index into EXCHANGES
+    ("conditions", "u1")     # index into CONDITIONS
+])
+
+DEFAULT_CAPACITY = 1000
+
+
+class TradeTape:
+    """
+    Ring buffer of one symbol's most recent trades.
+
+    Appends overwrite the oldest slot once the tape is full; nothing is
+    shifted or copied, so a deeper tape costs no extra work per trade.
+    """
+
+    def __init__(self, symbol: str, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize an empty tape
+
+        Args:
+            symbol: The stock symbol
+            capacity: Maximum number of trades retained
+        """
+        self.symbol = symbol
+        self.capacity = capacity
+        self.records = np.zeros(capacity, dtype=TRADE_DTYPE)
+        self.count = 0  # total trades ever appended
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, ts: float, price: float, size: int, price_change: int,
+               exchange: str, conditions: str) -> Dict[str, Any]:
+        """
+        Record a trade
+
+        Returns:
+            The trade as a dictionary in the QuotestreamPY wire format
+        """
+        self.records[self.count % self.capacity] = (
+            ts, price, size, price_change,
+            EXCHANGE_CODES.get(exchange, 0), CONDITION_CODES.get(conditions, 0)
+        )
+        self.count += 1
+        return self._to_dict(ts, price, size, price_change, exchange, conditions)
+
+    def views(self, n: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+        """
+        Zero-copy views of the latest ``n`` trades in chronological order
+
+        Returns one view, or two when the window wraps around the end of
+        the buffer (older part first).
+        """
+        size = len(self)
+        n = size if n is None else max(0, min(n, size))
+        if n == 0:
+            return (self.records[:0],)
+        end = self.count % self.capacity or (self.capacity if self.count else 0)
+        start = end - n
+        if start >= 0:
+            return (self.records[start:end],)
+        return (self.records[start:], self.records[:end])
+
+    def latest(self, n: int = 20, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the latest ``n`` trades as dictionaries, newest first
+
+        Safe to call from other threads while the writer appends: records
+        are copied out and any the writer overwrote meanwhile are dropped.
+
+        Args:
+            n: Number of trades to return
+            end: Read as of this many total trades (a published snapshot's
+                count) instead of the live tape
+
+        Returns:
+            List of trade dictionaries
+        """
+        count = self.count
+        end = count if end is None else min(end, count)
+        start = max(end - n, count - self.capacity, 0)
+        if start >= end:
+            return []
+        records = self.records[np.arange(start, end) % self.capacity]
+        overwritten = self.count - self.capacity - start
+        if overwritten > 0:
+            records = records[overwritten:]
+
+        ts = records["ts"].tolist()
+        price = records["price"].tolist()
+        size = records["size"].tolist()
+        change = records["price_change"].tolist()
+        exchange = records["exchange"].tolist()
+        conditions = records["conditions"].tolist()
+        return [self._to_dict(ts[i], price[i], size[i], change[i], EXCHANGES[exchange[i]], CONDITIONS[conditions[i]])
+                for i in range(len(ts) - 1, -1, -1)]
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Get the most recent trade, or None if the tape is empty"""
+        trades = self.latest(1)
+        return trades[0] if trades else None
+
+    def _to_dict(self, ts, price, size, price_change, exchange, conditions) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "price": price,
+            "size": size,
+            "price_change": price_change,
+            "exchange": exchange,
+            "conditions": conditions,
+            "timestamp": datetime.datetime.fromtimestamp(ts).isoformat()
+        }
+
+
+class TradeTapes(dict):
+    """Symbol -> TradeTape mapping that creates empty tapes on first access"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        super().__init__()
+        self.capacity = capacity
+
+    def __missing__(self, symbol: str) -> TradeTape:
+        tape = self[symbol] = TradeTape(symbol, self.capacity)
+        return tape
@@ -0,0 +1,414 @@
+"""
+Quotestream Volatility Surfaces - Implied volatility solving and surface fitting for QuotestreamPY
+Solves implied vols from option chain mid prices with a vectorized,
+bracketed Newton solver, fits one SVI smile per expiration and caches the
+surface per symbol so chains are priced by interpolating it instead of
+solving again on every rebuild
+"""
+import math
+import time
+import logging
+import datetime
+import numpy as np
+from typing import Dict, List, Optional, Any, Tuple
+
+from quotestream_options import (black_scholes, OptionChain, DEFAULT_RISK_FREE_RATE,
+                                 MIN_TIME_TO_EXPIRY)
+
+logger = logging.getLogger("quotestream")
+
+# Volatility bracket the solver searches
+MIN_VOLATILITY = 1e-3
+MAX_VOLATILITY = 5.0
+
+# Solver stops once every price is within this many dollars of its target
+PRICE_TOLERANCE = 1e-6
+MAX_ITERATIONS = 40
+
+# Quotes with a lower mid price are mostly tick size and are left out of fits
+MIN_FIT_PRICE = 0.05
+
+# Relative underlying move after which a cached surface is refit
+DEFAULT_REFIT_THRESHOLD = 0.02
+
+# Seconds after which a cached surface is refit even if the underlying stayed put
+DEFAULT_MAX_AGE = 900.0
+
+# Candidate SVI centers (log-moneyness) and curvatures searched per expiration,
+# then searched again on a finer grid around the best pair
+SVI_GRID = 9
+SVI_PASSES = 2
+
+# SVI parameter columns: w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2))
+S_A, S_B, S_RHO, S_M, S_SIGMA = range(5)
+
+
+def implied_volatility(prices: np.ndarray, spot: float, strikes: np.ndarray, times: np.ndarray,
+                       is_call: np.ndarray, rate: float = DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """
+    Solve the Black-Scholes volatility of many option prices at once
+
+    Every contract takes a Newton step on vega; steps that leave the
+    bracket known to hold the root fall back to bisection, so deep
+    in- or out-of-the-money contracts with tiny vega still converge.
+
+    Args:
+        prices: Option prices
+        spot: Underlying price
+        strikes: Strike per price
+        times: Years to expiration per price
+        is_call: True for calls, False for puts, per price
+        rate: Annualized risk-free rate
+
+    Returns:
+        Implied volatility per price; NaN where the price is outside the
+        no-arbitrage bounds
+    """
+    prices, strikes, times, is_call = np.broadcast_arrays(
+        np.asarray(prices, dtype=np.float64), np.asarray(strikes, dtype=np.float64),
+        np.asarray(times, dtype=np.float64), np.asarray(is_call, dtype=bool))
+    shape = prices.shape
+    prices, strikes, times, is_call = (a.ravel() for a in (prices, strikes, times, is_call))
+    times = np.maximum(times, MIN_TIME_TO_EXPIRY)
+    discounted_strike = strikes * np.exp(-rate * times)
+    lower = np.where(is_call, np.maximum(spot - discounted_strike, 0.0),
+                     np.maximum(discounted_strike - spot, 0.0))
+    upper = np.where(is_call, spot, discounted_strike)
+    solvable = (prices > lower) & (prices < upper)
+
+    low = np.full(prices.shape, MIN_VOLATILITY)
+    high = np.full(prices.shape, MAX_VOLATILITY)
+    vol = np.full(prices.shape, 0.3)
+    active = np.flatnonzero(solvable)
+    for _ in range(MAX_ITERATIONS):
+        if not len(active):
+            break
+        greeks = black_scholes(spot, strikes[active], times[active], vol[active], rate)
+        model = np.where(is_call[active], greeks["call_price"], greeks["put_price"])
+        error = model - prices[active]
+        done = np.abs(error) < PRICE_TOLERANCE
+
+        # The price rises with volatility, so the sign of the error moves one bracket end
+        above = error > 0
+        high[active] = np.where(above, vol[active], high[active])
+        low[active] = np.where(above, low[active], vol[active])
+
+        vega = greeks["vega"] * 100.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = vol[active] - error / vega
+        bisect = ~np.isfinite(step) | (step <= low[active]) | (step >= high[active])
+        vol[active] = np.where(done, vol[active],
+                               np.where(bisect, 0.5 * (low[active] + high[active]), step))
+        active = active[~done]
+
+    vol[~solvable] = np.nan
+    return vol.reshape(shape)
+
+
+def svi_total_variance(params: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """
+    Evaluate raw SVI total implied variance
+
+    Args:
+        params: SVI parameters (a, b, rho, m, sigma) along the last axis
+        k: Log-moneyness log(strike / forward), broadcastable against the params
+
+    Returns:
+        Total variance (implied vol squared times years) at each k
+    """
+    a, b, rho, m, sigma = np.moveaxis(params, -1, 0)
+    y = k - m
+    return a + b * (rho * y + np.sqrt(y * y + sigma * sigma))
+
+
+def fit_svi(k: np.ndarray, w: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, float]:
+    """
+    Fit one SVI smile to total variances
+
+    For a fixed center m and curvature sigma, SVI is linear in
+    (a, b * rho, b), so every candidate pair on a grid is solved by weighted
+    least squares at once; candidates that break b >= 0, |rho| <= 1 or
+    w >= 0 are discarded and the grid is refined around the best fit.
+
+    Args:
+        k: Log-moneyness of the quotes
+        w: Total implied variance of the quotes
+        weights: Optional weight per quote, such as its vega
+
+    Returns:
+        (SVI parameters, root-mean-square error in total variance)
+    """
+    weights = np.ones_like(w) if weights is None else weights
+    span = max(float(k.max() - k.min()), 0.05)
+    m_lo, m_hi = float(k.min()), float(k.max())
+    s_lo, s_hi = math.log(1e-3), math.log(span)
+    best = np.array([float(np.average(w, weights=weights)), 0.0, 0.0, 0.0, 0.1])
+    best_error = np.inf
+
+    for _ in range(SVI_PASSES):
+        ms, sigmas = np.meshgrid(np.linspace(m_lo, m_hi, SVI_GRID),
+                                 np.exp(np.linspace(s_lo, s_hi, SVI_GRID)), indexing="ij")
+        ms, sigmas = ms.ravel(), sigmas.ravel()
+        y = k[None, :] - ms[:, None]
+        design = np.stack([np.ones_like(y), y, np.sqrt(y * y + sigmas[:, None] ** 2)], axis=-1)
+        weighted = design * weights[None, :, None]
+        normal = np.einsum("gni,gnj->gij", weighted, design) + np.eye(3) * 1e-12
+        rhs = np.einsum("gni,n->gi", weighted, w)
+        a, d, c = np.moveaxis(np.linalg.solve(normal, rhs[..., None])[..., 0], -1, 0)
+
+        rho = np.divide(d, c, out=np.zeros_like(d), where=c > 0)
+        feasible = (c >= 0) & (np.abs(rho) <= 1) & (a + c * sigmas * np.sqrt(np.maximum(1 - rho * rho, 0)) >= 0)
+        residual = design @ np.stack([a, d, c], axis=-1)[..., None]
+        errors = np.sqrt(np.average((residual[..., 0] - w[None, :]) ** 2, axis=1, weights=weights))
+        errors[~feasible] = np.inf
+        g = int(np.argmin(errors))
+        if errors[g] < best_error:
+            best_error = float(errors[g])
+            best = np.array([a[g], c[g], rho[g], ms[g], sigmas[g]])
+
+        # Narrow both searches to one grid step around the best pair
+        m_step = (m_hi - m_lo) / (SVI_GRID - 1)
+        s_step = (s_hi - s_lo) / (SVI_GRID - 1)
+        m_lo, m_hi = best[S_M] - m_step, best[S_M] + m_step
+        s_lo, s_hi = math.log(best[S_SIGMA]) - s_step, math.log(best[S_SIGMA]) + s_step
+
+    if not np.isfinite(best_error):
+        best_error = float(np.sqrt(np.average((w - best[S_A]) ** 2, weights=weights)))
+    return best, best_error
+
+
+class VolSurface:
+    """
+    Implied volatility surface of one underlying.
+
+    One SVI smile per expiration over log-moneyness against the forward.
+    Between expirations total variance is interpolated linearly in time;
+    before the first and after the last expiration the nearest smile's
+    implied vol is held. Lookups are vectorized and take microseconds,
+    far less than solving the vols again.
+    """
+
+    def __init__(self, symbol: str, spot: float, expirations: List[str], times: np.ndarray,
+                 params: np.ndarray, errors: np.ndarray, rate: float = DEFAULT_RISK_FREE_RATE,
+                 fitted_at: Optional[float] = None):
+        """
+        Wrap fitted smiles
+
+        Args:
+            symbol: Underlying symbol
+            spot: Underlying price the surface was fitted at
+            expirations: ISO expiration dates, ascending
+            times: Years to each expiration
+            params: SVI parameters per expiration, shape (expirations, 5)
+            errors: RMS fit error in total variance per expiration
+            rate: Risk-free rate used for forwards
+            fitted_at: Epoch seconds of the fit
+        """
+        self.symbol = symbol
+        self.spot = spot
+        self.expirations = expirations
+        self.times = np.maximum(times, MIN_TIME_TO_EXPIRY)
+        self.params = params
+        self.errors = errors
+        self.rate = rate
+        self.fitted_at = time.time() if fitted_at is None else fitted_at
+
+    def vol(self, strikes, times, spot: Optional[float] = None) -> np.ndarray:
+        """
+        Interpolate implied volatilities
+
+        Args:
+            strikes: Strike prices, broadcastable against ``times``
+            times: Years to expiration, broadcastable against ``strikes``
+            spot: Current underlying price; moneyness is measured against it
+                (sticky moneyness), defaulting to the fitted spot
+
+        Returns:
+            Implied volatility at each strike and time
+        """
+        spot = self.spot if spot is None else spot
+        strikes, times = np.broadcast_arrays(np.asarray(strikes, dtype=np.float64),
+                                             np.maximum(np.asarray(times, dtype=np.float64), MIN_TIME_TO_EXPIRY))
+        k = np.log(strikes / spot) - self.rate * times
+
+        # Total variance of the two bracketing smiles, rescaled to constant vol outside them
+        right = np.minimum(np.searchsorted(self.times, times), len(self.times) - 1)
+        left = np.maximum(right - 1, 0)
+        right = np.maximum(right, np.minimum(left + 1, len(self.times) - 1))
+        t_left, t_right = self.times[left], self.times[right]
+        w_left = np.maximum(svi_total_variance(self.params[left], k), 0.0)
+        w_right = np.maximum(svi_total_variance(self.params[right], k), 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(t_right > t_left, (times - t_left) / (t_right - t_left), 0.0)
+        total = np.where(times <= t_left, w_left * times / t_left,
+                         np.where(times >= t_right, w_right * times / t_right,
+                                  w_left + weight * (w_right - w_left)))
+        return np.sqrt(np.maximum(total, 0.0) / times)
+
+    def atm_vols(self) -> np.ndarray:
+        """Get the at-the-forward implied vol of each expiration"""
+        return np.sqrt(np.maximum(svi_total_variance(self.params, 0.0), 0.0) / self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the surface parameters in the API format"""
+        atm = self.atm_vols()
+        return {
+            "symbol": self.symbol,
+            "spot": self.spot,
+            "rate": self.rate,
+            "fitted_at": datetime.datetime.fromtimestamp(self.fitted_at).isoformat(),
+            "model": "svi",
+            "expirations": [{
+                "expiration": expiration,
+                "years": round(float(self.times[i]), 6),
+                "atm_vol": round(float(atm[i]), 4),
+                "a": float(self.params[i, S_A]),
+                "b": float(self.params[i, S_B]),
+                "rho": float(self.params[i, S_RHO]),
+                "m": float(self.params[i, S_M]),
+                "sigma": float(self.params[i, S_SIGMA]),
+                "rmse": float(self.errors[i])
+            } for i, expiration in enumerate(self.expirations)]
+        }
+
+
+def fit_surface(chain: OptionChain, today: Optional[datetime.date] = None,
+                rate: float = DEFAULT_RISK_FREE_RATE) -> VolSurface:
+    """
+    Fit a volatility surface to an option chain's quotes
+
+    Uses the mid price of the out-of-the-money side at every strike
+    (puts below the underlying, calls at and above it), which are the
+    most liquid quotes and carry the most time value. Quotes under
+    MIN_FIT_PRICE are skipped.
+
+    Args:
+        chain: Option chain with bid and ask quotes
+        today: Pricing date; defaults to today
+        rate: Annualized risk-free rate
+
+    Returns:
+        Fitted VolSurface
+    """
+    today = today or datetime.date.today()
+    spot = chain.underlying_price
+    strikes = chain.strikes
+    n_exp, n_strike = len(chain.expirations), len(strikes)
+    times = np.array([(datetime.date.fromisoformat(e) - today).days for e in chain.expirations],
+                     dtype=np.float64) / 365.0
+    times = np.maximum(times, MIN_TIME_TO_EXPIRY)
+
+    columns = chain.columns
+    mid = (0.5 * (columns["bid"] + columns["ask"])).reshape(2, n_exp, n_strike)
+    is_call = np.broadcast_to(strikes >= spot, (n_exp, n_strike))
+    prices = np.where(is_call, mid[0], mid[1])
+    prices = np.where(prices >= MIN_FIT_PRICE, prices, np.nan)
+    grid_times = np.broadcast_to(times[:, None], (n_exp, n_strike))
+    vols = implied_volatility(prices, spot, strikes[None, :], grid_times, is_call, rate)
+
+    params = np.zeros((n_exp, 5))
+    errors = np.zeros(n_exp)
+    for i in range(n_exp):
+        ok = np.isfinite(vols[i])
+        if ok.sum() < 3:
+            # Too few quotes for a smile: flat at whatever could be solved
+            level = float(np.nanmean(vols[i])) if ok.any() else 0.3
+            params[i] = (level * level * times[i], 0.0, 0.0, 0.0, 0.1)
+            continue
+        k = np.log(strikes[ok] / spot) - rate * times[i]
+        w = vols[i, ok] ** 2 * times[i]
+        # Weight quotes by vega so near-the-money strikes dominate the fit
+        weights = np.maximum(black_scholes(spot, strikes[ok], times[i], vols[i, ok], rate)["vega"], 1e-6)
+        params[i], errors[i] = fit_svi(k, w, weights)
+
+    return VolSurface(chain.symbol, spot, list(chain.expirations), times, params, errors, rate)
+
+
+class SurfaceCache:
+    """
+    Latest fitted surface per symbol.
+
+    A cached surface keeps being used until the underlying has moved more
+    than ``threshold`` (relative) from the price it was fitted at, the
+    pricing date changes or it is older than ``max_age`` seconds.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_REFIT_THRESHOLD, max_age: float = DEFAULT_MAX_AGE,
+                 rate: float = DEFAULT_RISK_FREE_RATE):
+        """
+        Initialize the cache
+
+        Args:
+            threshold: Relative underlying move that triggers a refit
+            max_age: Seconds after which a surface is refit anyway; 0 never
+            rate: Risk-free rate surfaces are fitted with
+        """
+        self.threshold = threshold
+        self.max_age = max_age
+        self.rate = rate
+        self.surfaces: Dict[str, Tuple[VolSurface, datetime.date, float]] = {}  # symbol -> (surface, date, monotonic fit time)
+        self.hits = 0
+        self.refits = 0
+        self.fit_seconds = 0.0
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.surfaces
+
+    def peek(self, symbol: str) -> Optional[VolSurface]:
+        """Get the cached surface of a symbol however stale it is"""
+        entry = self.surfaces.get(symbol)
+        return entry[0] if entry is not None else None
+
+    def get(self, symbol: str, spot: float, today: Optional[datetime.date] = None) -> Optional[VolSurface]:
+        """
+        Get a symbol's surface if it is still valid for the current price
+
+        Args:
+            symbol: Underlying symbol
+            spot: Current underlying price
+            today: Pricing date; defaults to today
+
+        Returns:
+            The cached surface, or None if the symbol needs a (re)fit
+        """
+        entry = self.surfaces.get(symbol)
+        if entry is None:
+            return None
+        surface, fitted_on, fitted_at = entry
+        if fitted_on != (today or datetime.date.today()):
+            return None
+        if self.max_age and time.monotonic() - fitted_at > self.max_age:
+            return None
+        if abs(spot / surface.spot - 1.0) > self.threshold:
+            return None
+        self.hits += 1
+        return surface
+
+    def fit(self, chain: OptionChain, today: Optional[datetime.date] = None) -> VolSurface:
+        """
+        Fit and cache a surface from a chain's quotes
+
+        Args:
+            chain: Option chain of the symbol
+            today: Pricing date; defaults to today
+
+        Returns:
+            The new surface
+        """
+        today = today or datetime.date.today()
+        start = time.perf_counter()
+        surface = fit_surface(chain, today, self.rate)
+        self.fit_seconds += time.perf_counter() - start
+        self.refits += 1
+        self.surfaces[chain.symbol] = (surface, today, time.monotonic())
+        return surface
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for status endpoints"""
+        return {
+            "symbols": len(self.surfaces),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "refits": self.refits,
+            "avg_fit_ms": round(self.fit_seconds / self.refits * 1000, 3) if self.refits else None
+        }
@@ -14,9 +14,13 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("runner")
 
+# Number of quotestream shard worker processes (0 runs quotestream in one process)
+QUOTESTREAM_SHARDS = int(os.getenv("QUOTESTREAM_SHARDS", 0))
+
 # Process objects for the services
 main_process = None
 quotestream_process = None
+shard_processes = {}  # shard number -> worker process
 
 # Flag to indicate if we should keep running
 keep_running = True
@@ -71,6 +75,33 @@ def run_quotestream():
     except Exception as e:
         logger.error(f"Error running QuotestreamPY service: {e}")
 
+def run_shard(shard, shards):
+    """Run one QuotestreamPY shard worker, restarting it if it exits early"""
+    cmd = [sys.executable, "quotestream_shard.py", "--shard", str(shard), "--shards", str(shards)]
+    
+    while keep_running:
+        try:
+            logger.info(f"Starting QuotestreamPY shard {shard}: {' '.join(cmd)}")
+            process = shard_processes[shard] = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1
+            )
+            
+            # Monitor the output
+            for line in process.stdout:
+                print(f"[SHARD{shard}] {line.strip()}")
+            
+            process.wait()
+            if keep_running:
+                logger.warning(f"QuotestreamPY shard {shard} exited, restarting")
+                time.sleep(2)
+        except Exception as e:
+            logger.error(f"Error running QuotestreamPY shard {shard}: {e}")
+            time.sleep(2)
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C gracefully"""
     global keep_running, main_process, quotestream_process
@@ -82,6 +113,10 @@ def signal_handler(sig, frame):
     if quotestream_process:
         logger.info("Terminating QuotestreamPY service...")
         quotestream_process.terminate()
+    
+    for shard, process in shard_processes.items():
+        logger.info(f"Terminating QuotestreamPY shard {shard}...")
+        process.terminate()
         
     if main_process:
         logger.info("Terminating main application...")
@@ -94,6 +129,11 @@ def signal_handler(sig, frame):
     if quotestream_process and quotestream_process.poll() is None:
         logger.warning("Force killing QuotestreamPY service...")
         quotestream_process.kill()
+    
+    for shard, process in shard_processes.items():
+        if process.poll() is None:
+            logger.warning(f"Force killing QuotestreamPY shard {shard}...")
+            process.kill()
         
     if main_process and main_process.poll() is None:
         logger.warning("Force killing main application...")
@@ -113,6 +153,12 @@ def main():
     quotestream_thread.daemon = True
     quotestream_thread.start()
     
+    # The shard workers attach to the quote board the service creates
+    for shard in range(QUOTESTREAM_SHARDS):
+        shard_thread = threading.Thread(target=run_shard, args=(shard, QUOTESTREAM_SHARDS))
+        shard_thread.daemon = True
+        shard_thread.start()
+    
     # Give QuotestreamPY service some time to start
     time.sleep(2)
     
@@ -3,7 +3,6 @@
 import os
 import json
 import logging
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from models import Signal, db
@@ -117,7 +116,15 @@ class SignalService:
             logger.error(f"Error getting recent signals: {str(e)}")
             return []
     
-    def generate_og_signal(self, symbol, timeframe='1D', contract_type=None, expiry=None):
+    def _alpaca_timeframe(self, timeframe):
+        """Map a chart timeframe to the Alpaca API name"""
+        if timeframe == '1D':
+            return '1Day'
+        elif timeframe == '1H':
+            return '1Hour'
+        return timeframe
+    
+    def generate_og_signal(self, symbol, timeframe='1D', contract_type=None, expiry=None, bars=None):
         """
         Generate an OG strategy signal for a symbol
         
@@ -126,6 +133,7 @@ class SignalService:
             timeframe: Chart timeframe (1D, 1H, etc.)
             contract_type: Optional option contract type (CALL or PUT)
             expiry: Optional option expiry date
+            bars: Optional Bars already fetched for the symbol
             
         Returns:
             Generated Signal object or None on error
@@ -136,21 +144,15 @@ class SignalService:
                 logger.error("Alpaca service is not configured, cannot generate OG signal")
                 return None
             
-            # Adjust timeframe for Alpaca API
-            alpaca_timeframe = timeframe
-            if timeframe == '1D':
-                alpaca_timeframe = '1Day'
-            elif timeframe == '1H':
-                alpaca_timeframe = '1Hour'
-            
             # Get bars
-            bars = self.alpaca.get_bars(symbol, alpaca_timeframe, limit=50)
+            if bars is None:
+                bars = self.alpaca.get_bars(symbol, self._alpaca_timeframe(timeframe), limit=50)
             if bars is None or len(bars) < 20:
                 logger.error(f"Insufficient data for {symbol} to generate OG signal")
                 return None
             
-            # Convert to pandas DataFrame
-            df = pd.DataFrame(bars)
+            # Columns of the bars, without copying them
+            df = bars.to_dataframe()
             
             # Calculate EMAs
             df['ema8'] = df['close'].ewm(span=8, adjust=False).mean()
@@ -319,9 +321,21 @@ class SignalService:
             'errors': []
         }
         
+        # Fetch every symbol's bars in one batch instead of one request per symbol
+        symbol_bars = None
+        if getattr(self.alpaca, 'enabled', False):
+            symbol_bars = self.alpaca.get_bars_many(symbols, self._alpaca_timeframe(timeframe), limit=50)
+        
         for symbol in symbols:
+            if symbol_bars is not None and symbol not in symbol_bars:
+                results['errors'].append({
+                    'symbol': symbol,
+                    'error': 'No bar data'
+                })
+                continue
             try:
-                signal = self.generate_og_signal(symbol, timeframe)
+                signal = self.generate_og_signal(symbol, timeframe,
+                                                 bars=symbol_bars[symbol] if symbol_bars else None)
                 if signal:
                     results['signals'].append(signal.to_dict())
             except Exception as e:
@@ -0,0 +1,95 @@
+"""
+Single Flight - Request coalescing for the market data services
+Concurrent lookups of the same key wait for one in-flight fetch and share
+its result instead of each calling the provider, which keeps bursts of
+identical requests (such as every client refreshing after a dashboard
+broadcast) down to one provider call per key
+"""
+
+import threading
+from typing import Callable, Dict, Any, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call:
+    """A fetch in flight and the callers waiting for it"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls by key.
+
+    The first caller of a key runs the fetch; callers arriving while it
+    runs block until it finishes and get the same result, or the same
+    exception. Nothing is cached: once the fetch returns, the next call
+    of the key fetches again. Keys are tuples whose first item names the
+    kind of lookup ('price', 'bars', ...), which the counters are kept by.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    def do(self, key: tuple, fetch: Callable[[], T]) -> T:
+        """
+        Run a fetch unless one for the same key is already running
+
+        Args:
+            key: Lookup key, e.g. ('price', 'AAPL')
+            fetch: Fetches the value; called at most once per concurrent burst
+
+        Returns:
+            The fetch's result, shared by every caller that waited on it
+        """
+        kind = key[0]
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls[kind] = self.calls.get(kind, 0) + 1
+            else:
+                call.waiters += 1
+                self.coalesced[kind] = self.coalesced.get(kind, 0) + 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fetch()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get fetches run and calls coalesced per kind of lookup"""
+        with self._lock:
+            kinds = {}
+            for kind in set(self.calls) | set(self.coalesced):
+                calls = self.calls.get(kind, 0)
+                coalesced = self.coalesced.get(kind, 0)
+                kinds[kind] = {
+                    "fetches": calls,
+                    "coalesced": coalesced,
+                    "coalesced_rate": round(coalesced / (calls + coalesced), 4) if calls + coalesced else None
+                }
+            return {"in_flight": len(self._calls), "kinds": kinds}
@@ -0,0 +1,252 @@
+"""
+Socket.IO Backpressure - Per-client outbound limits for the Socket.IO servers
+Watches how many packets each client's Engine.IO queue still holds. A client
+that falls behind is skipped by broadcasts and gets only the latest message
+per key once it has caught up, so one slow connection cannot grow server
+memory or delay everyone else
+"""
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Client queue depths (in Engine.IO packets) that mark a client slow and caught up
+DEFAULT_HIGH_WATER = 256
+DEFAULT_LOW_WATER = 32
+
+# Bounds of the latest-per-key messages held for one slow client
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_PENDING_BYTES = 4 * 1024 * 1024
+
+
+def transport_backlog(server, sid: str, namespace: str = "/") -> int:
+    """
+    Get the number of packets queued for a client and not yet written to its transport
+
+    Args:
+        server: python-socketio server (``SocketIO.server`` in Flask-SocketIO)
+        sid: Socket.IO session id
+        namespace: Namespace of the session
+
+    Returns:
+        Queued packet count, or 0 if the client is gone
+    """
+    try:
+        eio_sid = server.manager.eio_sid_from_sid(sid, namespace)
+        socket = server.eio.sockets.get(eio_sid) if eio_sid else None
+        return socket.queue.qsize() if socket is not None else 0
+    except (AttributeError, KeyError, NotImplementedError):
+        return 0
+
+
+def payload_size(payload: Any) -> int:
+    """Estimate the wire size of an event payload in bytes"""
+    if isinstance(payload, (bytes, bytearray, str)):
+        return len(payload)
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class ConflationQueue:
+    """
+    Latest message per key for one client, oldest key first.
+
+    Putting a key that is already queued replaces its message (conflation)
+    and moves it to the back. When the length or byte bound is exceeded
+    the oldest keys are dropped and ``overflowed`` is set.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_MAX_PENDING, max_bytes: int = DEFAULT_MAX_PENDING_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.items: "OrderedDict[Hashable, Tuple[str, Any, int]]" = OrderedDict()
+        self.bytes = 0
+        self.overflowed = False
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def put(self, key: Hashable, event: str, payload: Any, size: int = 0) -> Tuple[int, int]:
+        """
+        Queue a message, replacing any older one with the same key
+
+        Returns:
+            (messages conflated, messages dropped for the bounds)
+        """
+        conflated = dropped = 0
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+            conflated = 1
+        self.items[key] = (event, payload, size)
+        self.bytes += size
+        while len(self.items) > 1 and (len(self.items) > self.max_items or self.bytes > self.max_bytes):
+            _, (_, _, old_size) = self.items.popitem(last=False)
+            self.bytes -= old_size
+            dropped += 1
+            self.overflowed = True
+        return conflated, dropped
+
+    def take(self, limit: int) -> List[Tuple[Hashable, str, Any]]:
+        """Remove and return up to ``limit`` messages, oldest first"""
+        taken = []
+        while self.items and len(taken) < limit:
+            key, (event, payload, size) = self.items.popitem(last=False)
+            self.bytes -= size
+            taken.append((key, event, payload))
+        return taken
+
+
+class BackpressureManager:
+    """
+    Tracks slow clients and the conflated messages they still need.
+
+    Call ``poll()`` periodically with the connected session ids. A client
+    whose backlog exceeds ``high_water`` becomes slow: broadcasts should
+    pass ``skip_sids()`` as ``skip_sid`` and hand the message to ``defer()``
+    instead. Once its backlog is at or below ``low_water``, ``poll()``
+    returns its queued messages a batch at a time, and the client is
+    treated as healthy again when nothing is left.
+    """
+
+    def __init__(self, backlog: Callable[[str], int], high_water: int = DEFAULT_HIGH_WATER,
+                 low_water: int = DEFAULT_LOW_WATER, max_pending: int = DEFAULT_MAX_PENDING,
+                 max_pending_bytes: int = DEFAULT_MAX_PENDING_BYTES, max_slow_seconds: float = 0.0):
+        """
+        Initialize the manager
+
+        Args:
+            backlog: Function returning the queued packet count of a session id
+            high_water: Backlog that makes a client slow
+            low_water: Backlog at which a slow client is sent its queued messages
+            max_pending: Maximum messages queued per slow client
+            max_pending_bytes: Maximum estimated bytes queued per slow client
+            max_slow_seconds: Report clients slow for longer than this from
+                ``poll()`` so the server can disconnect them; 0 never does
+        """
+        if low_water >= high_water:
+            raise ValueError("low_water must be below high_water")
+        self.backlog = backlog
+        self.high_water = high_water
+        self.low_water = low_water
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self.max_slow_seconds = max_slow_seconds
+        self.queues: Dict[str, ConflationQueue] = {}  # slow sid -> pending messages
+        self.slow_since: Dict[str, float] = {}
+        self._skip: List[str] = []
+        self.max_backlog = 0
+        self.slow_events = 0
+        self.recovered = 0
+        self.deferred = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def is_slow(self, sid: str) -> bool:
+        return sid in self.queues
+
+    def skip_sids(self) -> Optional[List[str]]:
+        """Get the slow session ids for ``emit(skip_sid=...)``, or None if there are none"""
+        return self._skip or None
+
+    def slow_clients(self) -> List[str]:
+        return list(self._skip)
+
+    def defer(self, sid: str, key: Hashable, event: str, payload: Any = None, size: Optional[int] = None):
+        """
+        Hold a message for a slow client, keeping only the latest one per key
+
+        Args:
+            sid: Slow session id
+            key: Conflation key, such as a symbol or (event, symbol)
+            event: Event name
+            payload: Event payload
+            size: Payload size in bytes; estimated if omitted
+        """
+        queue = self.queues.get(sid)
+        if queue is None:
+            return
+        conflated, dropped = queue.put(key, event, payload, payload_size(payload) if size is None else size)
+        self.deferred += 1
+        self.conflated += conflated
+        self.dropped += dropped
+
+    def forget(self, sid: str):
+        """Drop all state of a disconnected client"""
+        if self.queues.pop(sid, None) is not None:
+            del self.slow_since[sid]
+            self._skip = list(self.queues)
+
+    def poll(self, sids, now: Optional[float] = None) -> Tuple[List[Tuple[str, List[Tuple[Hashable, str, Any]], bool]], List[str]]:
+        """
+        Measure client backlogs and release what caught-up clients may receive
+
+        Args:
+            sids: Connected session ids
+            now: Current time in seconds
+
+        Returns:
+            (deliveries, expired): deliveries are (sid, [(key, event, payload)],
+            overflowed) for slow clients with room again, where overflowed
+            means some keys were dropped and the client needs a full resync;
+            expired lists clients slow for longer than ``max_slow_seconds``
+        """
+        now = time.monotonic() if now is None else now
+        deliveries = []
+        expired = []
+        changed = False
+        for sid in sids:
+            backlog = self.backlog(sid)
+            self.max_backlog = max(self.max_backlog, backlog)
+            queue = self.queues.get(sid)
+            if queue is None:
+                if backlog > self.high_water:
+                    self.queues[sid] = ConflationQueue(self.max_pending, self.max_pending_bytes)
+                    self.slow_since[sid] = now
+                    self.slow_events += 1
+                    changed = True
+                    logger.warning(f"Client {sid} is slow ({backlog} packets queued); conflating its updates")
+                continue
+            if backlog > self.low_water:
+                if self.max_slow_seconds and now - self.slow_since[sid] > self.max_slow_seconds:
+                    expired.append(sid)
+                continue
+            overflowed = queue.overflowed
+            queue.overflowed = False
+            items = queue.take(self.high_water - backlog)
+            if items or overflowed:
+                deliveries.append((sid, items, overflowed))
+            if not queue:
+                del self.queues[sid]
+                lag = now - self.slow_since.pop(sid)
+                self.recovered += 1
+                changed = True
+                logger.info(f"Client {sid} caught up after {lag:.1f} s")
+        if changed:
+            self._skip = list(self.queues)
+        self.expired += len(expired)
+        return deliveries, expired
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Get drop and lag counters for status endpoints"""
+        now = time.monotonic() if now is None else now
+        return {
+            "high_water": self.high_water,
+            "low_water": self.low_water,
+            "slow_clients": {sid: {"lag_s": round(now - self.slow_since[sid], 3),
+                                   "pending": len(queue), "pending_bytes": queue.bytes}
+                             for sid, queue in self.queues.items()},
+            "max_backlog": self.max_backlog,
+            "slow_events": self.slow_events,
+            "recovered": self.recovered,
+            "deferred": self.deferred,
+            "conflated": self.conflated,
+            "dropped": self.dropped,
+            "expired": self.expired
+        }
@@ -3,12 +3,22 @@
 import os
 import logging
 import json
+import itertools
 from datetime import datetime
 from flask import request
 from flask_socketio import SocketIO, emit, disconnect
+from socketio_backpressure import (BackpressureManager, transport_backlog,
+                                   DEFAULT_HIGH_WATER, DEFAULT_LOW_WATER)
 
 logger = logging.getLogger(__name__)
 
+# Client queue depths (Engine.IO packets) at which a client is treated as slow and
+# as caught up, seconds between checks, and how long a client may stay slow (0 = forever)
+CLIENT_HIGH_WATER = int(os.getenv("SOCKETIO_CLIENT_HIGH_WATER", DEFAULT_HIGH_WATER))
+CLIENT_LOW_WATER = int(os.getenv("SOCKETIO_CLIENT_LOW_WATER", DEFAULT_LOW_WATER))
+BACKPRESSURE_INTERVAL = float(os.getenv("SOCKETIO_BACKPRESSURE_INTERVAL", 0.5))
+CLIENT_MAX_SLOW_SECONDS = float(os.getenv("SOCKETIO_CLIENT_MAX_SLOW_SECONDS", 300))
+
 # Initialize SocketIO
 socketio = SocketIO()
 
@@ -21,6 +31,10 @@ class SocketIOService:
         """Initialize Socket.IO service"""
         self.clients = {}
         self.app = app
+        self._signal_numbers = itertools.count()  # conflation keys for signals without an id
+        self.backpressure = BackpressureManager(lambda sid: transport_backlog(socketio.server, sid),
+                                                CLIENT_HIGH_WATER, CLIENT_LOW_WATER,
+                                                max_slow_seconds=CLIENT_MAX_SLOW_SECONDS)
         
         if app:
             self.init_app(app)
@@ -41,6 +55,9 @@ class SocketIOService:
         # Register event handlers
         self._register_handlers()
         
+        # Watch for clients that cannot keep up with broadcasts
+        socketio.start_background_task(self._watch_backpressure)
+        
         logger.info("Socket.IO service initialized")
     
     def _register_handlers(self):
@@ -70,6 +87,7 @@ class SocketIOService:
             client_id = request.sid
             if client_id in self.clients:
                 del self.clients[client_id]
+            self.backpressure.forget(client_id)
             logger.info(f"Client disconnected: {client_id}")
         
         @socketio.on('client_ready')
@@ -131,9 +149,41 @@ class SocketIOService:
             emit('health_response', {
                 'status': 'healthy',
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'server_uptime': 'Active'
+                'server_uptime': 'Active',
+                'backpressure': self.backpressure.stats()
             })
     
+    def broadcast(self, event, data, key=None):
+        """
+        Emit an event to every client, conflating it for clients that are behind
+        
+        Args:
+            event: Event name
+            data: Event payload
+            key: Optional conflation key such as a symbol; a slow client only
+                gets the latest payload per (event, key)
+        """
+        socketio.emit(event, data, skip_sid=self.backpressure.skip_sids())
+        for sid in self.backpressure.slow_clients():
+            self.backpressure.defer(sid, (event, key), event, data)
+    
+    def _watch_backpressure(self):
+        """Send slow clients their conflated events once they catch up"""
+        while True:
+            socketio.sleep(BACKPRESSURE_INTERVAL)
+            try:
+                deliveries, expired = self.backpressure.poll(list(self.clients))
+                for sid, items, overflowed in deliveries:
+                    if overflowed:
+                        logger.warning(f"Client {sid} fell too far behind; older updates were dropped")
+                    for _, event, data in items:
+                        socketio.emit(event, data, to=sid)
+                for sid in expired:
+                    logger.warning(f"Disconnecting client {sid}: slow for over {CLIENT_MAX_SLOW_SECONDS:g} s")
+                    socketio.server.disconnect(sid)
+            except Exception as e:
+                logger.error(f"Error checking client backlogs: {str(e)}")
+    
     def broadcast_signal(self, signal):
         """
         Broadcast a new signal to all connected clients
@@ -146,4 +196,47 @@ class SocketIOService:
             if hasattr(signal, 'to_dict'):
                 signal_data = signal.to_dict()
             else:
-                signal_data ...
+                signal_data = signal
+            
+            # Every signal is its own event, so slow clients get them all rather than the latest
+            key = signal_data.get('id')
+            if key is None:
+                key = ('unsaved', next(self._signal_numbers))
+            self.broadcast('new_signal', signal_data, key=key)
+            logger.info(f"Signal broadcast: {signal_data.get('symbol')} {signal_data.get('direction')}")
+        except Exception as e:
+            logger.error(f"Error broadcasting signal: {str(e)}")
+    
+    def broadcast_trade(self, trade):
+        """
+        Broadcast a trade update to all connected clients
+        
+        Args:
+            trade: Trade object or dictionary with trade data
+        """
+        try:
+            trade_data = trade.to_dict() if hasattr(trade, 'to_dict') else trade
+            
+            # Updates of one trade supersede each other for slow clients
+            self.broadcast('trade_update', trade_data, key=trade_data.get('id') or trade_data.get('symbol'))
+        except Exception as e:
+            logger.error(f"Error broadcasting trade: {str(e)}")
+
+
+# Singleton instance for the application to use
+_socketio_service = None
+
+def get_socketio_service():
+    """Get the singleton Socket.IO service instance"""
+    global _socketio_service
+    if _socketio_service is None:
+        _socketio_service = SocketIOService()
+    return _socketio_service
+
+def broadcast_signal(signal):
+    """Broadcast a new signal through the Socket.IO service"""
+    get_socketio_service().broadcast_signal(signal)
+
+def broadcast_trade(trade):
+    """Broadcast a trade update through the Socket.IO service"""
+    get_socketio_service().broadcast_trade(trade)
@@ -0,0 +1,80 @@
+// Quote Delta Decoder - Rebuilds full quotes from QuotestreamPY quote_snapshot/quote_delta messages
+//
+// Messages look like {s: symbol, n: seq, t: epoch_ms, d: {code: value}}. A
+// snapshot carries every field, a delta only the changed ones. Prices arrive
+// as integer cents, with bid/ask as offsets below/above last. When a delta
+// arrives out of sequence the decoder calls onGap(symbol) so the page can ask
+// the server to 'resync'.
+
+const QUOTE_FIELD_CODES = {
+    l: 'last',
+    b: 'bid',
+    a: 'ask',
+    bs: 'bid_size',
+    as: 'ask_size',
+    v: 'volume',
+    o: 'open',
+    h: 'high',
+    lo: 'low',
+    pc: 'prev_close',
+    vw: 'vwap',
+    ds: 'description',
+    sc: 'sector'
+};
+
+// Codes whose values are integer cents
+const QUOTE_PRICE_CODES = new Set(['l', 'b', 'a', 'o', 'h', 'lo', 'pc', 'vw']);
+
+class QuoteDeltaDecoder {
+    constructor(onGap) {
+        this.quotes = {};
+        this.fields = {};
+        this.seqs = {};
+        this.onGap = onGap || function() {};
+    }
+
+    // Replace the stored quote for a symbol with a full snapshot
+    snapshot(message) {
+        this.quotes[message.s] = { symbol: message.s };
+        this.fields[message.s] = {};
+        return this._apply(message);
+    }
+
+    // Apply a delta; returns the updated quote, or null if a resync is needed
+    delta(message) {
+        const symbol = message.s;
+        if (message.n === 0) {
+            // The server restarted this stream from a full quote
+            return this.snapshot(message);
+        }
+        if (!(symbol in this.seqs) || message.n !== this.seqs[symbol] + 1) {
+            delete this.seqs[symbol];
+            this.onGap(symbol);
+            return null;
+        }
+        return this._apply(message);
+    }
+
+    _apply(message) {
+        const quote = this.quotes[message.s];
+        const fields = Object.assign(this.fields[message.s], message.d);
+        for (const code in fields) {
+            const value = fields[code];
+            quote[QUOTE_FIELD_CODES[code] || code] = QUOTE_PRICE_CODES.has(code) ? value / 100 : value;
+        }
+        
+        // Bid and ask are offsets from last
+        quote.bid = (fields.l - fields.b) / 100;
+        quote.ask = (fields.l + fields.a) / 100;
+
+        // Derived fields are not sent over the wire
+        if (quote.prev_close) {
+            quote.change = Math.round((quote.last - quote.prev_close) * 100) / 100;
+            quote.change_percent = Math.round((quote.last - quote.prev_close) / quote.prev_close * 10000) / 100;
+        }
+        quote.timestamp = new Date(message.t).toISOString();
+
+        this.seqs[message.s] = message.n;
+        return quote;
+    }
+}
@@ -5,6 +5,7 @@ let currentSymbol = null;
 let watchlist = [];
 let quotes = {};
 let marketDepth = {};
+let depthResyncs = new Set();  // symbols waiting for a full book after a gap
 let recentTrades = {};
 
 // Auto-refresh configuration
@@ -15,6 +16,17 @@ let refreshTimer = null;
 // Socket connection for real-time updates
 const socket = io();
 
+// Symbols this page has subscribed to for real-time updates
+let subscribedSymbols = new Set();
+
+// Rebuilds quotes from delta-encoded updates; asks for a resync on gaps
+const quoteDecoder = new QuoteDeltaDecoder(function(symbol) {
+    socket.emit('resync', { symbols: [symbol] });
+});
+
+// Delivery options sent with every subscription
+const STREAM_OPTIONS = { batch: true, delta: true };
+
 // Initialize the dashboard on page load
 document.addEventListener('DOMContentLoaded', function() {
     // Initial loading of data
@@ -74,6 +86,7 @@ function loadWatchlist() {
         .then(data => {
             watchlist = data.symbols || [];
             updateWatchlistUI();
+            syncSubscriptions(watchlist);
             
             if (watchlist.length > 0) {
                 // Load quotes for all watchlist symbols
@@ -188,7 +201,7 @@ function loadQuoteDetails(symbol) {
     fetch(`/quotestream/api/depth/${symbol}`)
         .then(response => response.json())
         .then(data => {
-            marketDepth[symbol] = data;
+            applyDepth(symbol, data);
             updateMarketDepthUI(symbol);
             hideLoading('marketDepth');
         })
@@ -554,6 +567,22 @@ function selectSearchResult(symbol) {
     document.getElementById('symbolSearchResults').style.display = 'none';
 }
 
+// Subscribe to real-time updates for symbols and drop ones no longer shown
+function syncSubscriptions(symbols) {
+    const wanted = new Set(symbols);
+    const added = symbols.filter(symbol => !subscribedSymbols.has(symbol));
+    const removed = [...subscribedSymbols].filter(symbol => !wanted.has(symbol));
+    
+    if (added.length > 0) {
+        socket.emit('subscribe', Object.assign({ symbols: added }, STREAM_OPTIONS));
+    }
+    if (removed.length > 0) {
+        socket.emit('unsubscribe', { symbols: removed });
+    }
+    
+    subscribedSymbols = wanted;
+}
+
 // Set up Socket.IO event listeners
 function setupSocketListeners() {
     // Connection events
@@ -561,6 +590,11 @@ function setupSocketListeners() {
         console.log('Connected to Socket.IO server');
         updateConnectionStatus(true);
         showStatusMessage('Connected to real-time updates', 'success');
+        
+        // Rooms do not survive a reconnect, so subscribe again
+        if (subscribedSymbols.size > 0) {
+            socket.emit('subscribe', Object.assign({ symbols: [...subscribedSymbols] }, STREAM_OPTIONS));
+        }
     });
     
     socket.on('disconnect', function() {
@@ -571,11 +605,8 @@ function setupSocketListeners() {
     
     // Quote updates
     socket.on('quote_update', function(data) {
-        console.log('Quote update received:', data);
-        
-        // Update quotes data
         if (data.symbol && data.quote) {
-            quotes[data.symbol] = data.quote;
+            applyQuote(data.symbol, data.quote);
             
             // Update UI if needed
             updateWatchlistUI();
@@ -586,10 +617,20 @@ function setupSocketListeners() {
         }
     });
     
-    // Market depth updates
+    // Full quote sent on subscribe and after a resync
+    socket.on('quote_snapshot', function(message) {
+        applyQuote(message.s, quoteDecoder.snapshot(message));
+        updateWatchlistUI();
+        
+        if (message.s === currentSymbol) {
+            updateQuoteDetailsUI(message.s);
+        }
+    });
+    
+    // Full order book, sent on subscribe and after a resync
     socket.on('depth_update', function(data) {
         if (data.symbol && data.depth) {
-            marketDepth[data.symbol] = data.depth;
+            applyDepth(data.symbol, data.depth);
             
             if (data.symbol === currentSymbol) {
                 updateMarketDepthUI(data.symbol);
@@ -597,26 +638,118 @@ function setupSocketListeners() {
         }
     });
     
+    // Changed order book levels
+    socket.on('depth_delta', function(delta) {
+        if (applyDepthDelta(delta.s, delta) && delta.s === currentSymbol) {
+            updateMarketDepthUI(delta.s);
+        }
+    });
+    
     // Trade updates
     socket.on('trade_update', function(data) {
         if (data.symbol && data.trade) {
-            if (!recentTrades[data.symbol]) {
-                recentTrades[data.symbol] = [];
-            }
-            
-            // Add new trade to the beginning
-            recentTrades[data.symbol].unshift(data.trade);
-            
-            // Limit to 20 trades
-            if (recentTrades[data.symbol].length > 20) {
-                recentTrades[data.symbol] = recentTrades[data.symbol].slice(0, 20);
-            }
+            applyTrades(data.symbol, [data.trade]);
             
             if (data.symbol === currentSymbol) {
                 updateRecentTradesUI(data.symbol);
             }
         }
     });
+    
+    // Coalesced quote/depth/trade updates, one frame per server flush
+    socket.on('market_batch', function(data) {
+        const batchQuotes = data.quotes || {};
+        const batchDepth = data.depth_deltas || {};
+        
+        // Delta-encoded quotes only carry the fields that changed; the symbol
+        // is the key and the tick time is shared unless an entry has its own
+        const batchDeltas = data.quote_deltas || {};
+        for (const symbol in batchDeltas) {
+            const message = Object.assign({ s: symbol, t: data.t }, batchDeltas[symbol]);
+            const quote = quoteDecoder.delta(message);
+            if (quote) {
+                batchQuotes[symbol] = quote;
+            }
+        }
+        const batchTrades = data.trades || {};
+        
+        for (const symbol in batchQuotes) {
+            applyQuote(symbol, batchQuotes[symbol]);
+        }
+        for (const symbol in batchDepth) {
+            applyDepthDelta(symbol, batchDepth[symbol]);
+        }
+        for (const symbol in batchTrades) {
+            applyTrades(symbol, batchTrades[symbol]);
+        }
+        
+        // Re-render each panel at most once per frame
+        if (Object.keys(batchQuotes).length > 0) {
+            updateWatchlistUI();
+        }
+        if (currentSymbol) {
+            if (batchQuotes[currentSymbol]) {
+                updateQuoteDetailsUI(currentSymbol);
+            }
+            if (batchDepth[currentSymbol]) {
+                updateMarketDepthUI(currentSymbol);
+            }
+            if (batchTrades[currentSymbol]) {
+                updateRecentTradesUI(currentSymbol);
+            }
+        }
+    });
+}
+
+// Store the latest quote for a symbol
+function applyQuote(symbol, quote) {
+    quotes[symbol] = Object.assign({}, quote);
+}
+
+// Store the latest market depth for a symbol
+function applyDepth(symbol, depth) {
+    marketDepth[symbol] = depth;
+    depthResyncs.delete(symbol);
+}
+
+// Apply an L2 delta ({f, n, t, b, a}) to the stored book. Sizes are absolute,
+// so a delta may overlap the book's seq; a gap asks the server for a resync.
+function applyDepthDelta(symbol, delta) {
+    const depth = marketDepth[symbol];
+    if (!depth || depth.seq === undefined || delta.f > depth.seq + 1) {
+        if (!depthResyncs.has(symbol)) {
+            depthResyncs.add(symbol);
+            socket.emit('resync', { symbols: [symbol] });
+        }
+        return false;
+    }
+    if (delta.n <= depth.seq) {
+        return false;
+    }
+    depth.bids = mergeDepthLevels(depth.bids, delta.b || [], (x, y) => y.price - x.price);
+    depth.asks = mergeDepthLevels(depth.asks, delta.a || [], (x, y) => x.price - y.price);
+    depth.seq = delta.n;
+    depth.timestamp = new Date(delta.t).toISOString();
+    return true;
+}
+
+// Set or remove (size 0) [price, size, exchange] levels, keeping the side best-first
+function mergeDepthLevels(levels, changes, order) {
+    const byPrice = new Map(levels.map(level => [level.price, level]));
+    for (const [price, size, exchange] of changes) {
+        if (size > 0) {
+            byPrice.set(price, { price: price, size: size, exchange: exchange });
+        } else {
+            byPrice.delete(price);
+        }
+    }
+    return [...byPrice.values()].sort(order);
+}
+
+// Prepend new trades (newest first) for a symbol, keeping the 20 most recent
+function applyTrades(symbol, newTrades) {
+    const existing = recentTrades[symbol] || [];
+    recentTrades[symbol] = newTrades.concat(existing).slice(0, 20);
 }
 
 // Start auto-refresh timer
@@ -639,7 +772,7 @@ function startAutoRefresh() {
                     fetch(`/quotestream/api/depth/${currentSymbol}`)
                         .then(response => response.json())
                         .then(data => {
-                            marketDepth[currentSymbol] = data;
+                            applyDepth(currentSymbol, data);
                             updateMarketDepthUI(currentSymbol);
                         });
                     